@@ -0,0 +1,19 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; json.loads accepts the same documents, only slower
+    orjson = None
+
+
+def loads(data):
+    """
+    Decodes bytes or str; raises json.JSONDecodeError like json.loads
+    (Responses still go through JsonResponse so their bytes stay unchanged.)
+    """
+    if orjson is None:
+        return json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)  # Accepts what orjson is stricter about (NaN, lone surrogates), else re-raises
@@ -1,3 +1,30 @@
-from django.test import TestCase
+import json
+from django.http import JsonResponse
+from django.test import SimpleTestCase
 
-# Create your tests here.
+
+class ProcessRequestTest(SimpleTestCase):
+
+    def test_echo_bytes_match_json_response(self):
+        """ The echoed body is byte-for-byte what JsonResponse writes (separators, \\uXXXX escapes) """
+        payload = {"game": "Pokémon", "gamerID": "GYUTDTE", "points": [1, 2.5, None], "emoji": "😀"}
+
+        response = self.client.post("/api/process/", json.dumps(payload), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content,
+            b'{"game": "Pok\\u00e9mon", "gamerID": "GYUTDTE", "points": [1, 2.5, null], "emoji": "\\ud83d\\ude00"}',
+        )
+        self.assertEqual(response.content, JsonResponse(payload).content)
+
+    def test_non_object_body_is_rejected_like_json_response(self):
+        """ JsonResponse's safe=True check still applies to non-dict bodies """
+        with self.assertRaises(TypeError):
+            self.client.post("/api/process/", "[1, 2]", content_type="application/json")
+
+    def test_invalid_json(self):
+        response = self.client.post("/api/process/", "invalid json data", content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content, b'{"error": "Invalid JSON"}')
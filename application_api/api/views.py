@@ -1,18 +1,18 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-import json
+from .json_codec import loads
 
 @csrf_exempt
 def process_request(request):
     if request.method == 'POST':
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             return JsonResponse(data, status=200)
-        except json.JSONDecodeError:
+        except ValueError:
             return JsonResponse({"error": "Invalid JSON"}, status=400)
     return JsonResponse({"error": "Only POST allowed"}, status=405)
 
 @csrf_exempt
 def health_check(request):
     """ ✅ Health Check Endpoint for Application Instances """
-    return JsonResponse({"status": "healthy"}, status=200) 
\ No newline at end of file
+    return JsonResponse({"status": "healthy"}, status=200)
@@ -1,18 +1,273 @@
-from locust import HttpUser, task, between
+"""
+Load test scenarios for the load balancer
 
-class LoadBalancerTest(HttpUser):
-    wait_time = between(1, 3)  # ✅ Simulate real users with a wait time of 1-3 seconds
+Users (pick on the command line, e.g. `locust -f locustfile.py ArrivalRateUser`; default: both):
+- GamerUser: closed model, every user sends its next request after a short think time.
+- ArrivalRateUser: open model, each user starts --arrival-rate requests per second whether or not
+  earlier ones have finished, so a slow balancer cannot slow the offered load down.
+
+Shapes (--shape): step, spike, soak, or manual (the shape is switched off and the UI or -u/-r/-t control the users).
+
+At exit, p99 latency and the error rate are checked against --slo-p99-ms and --slo-error-rate;
+the result is written as JSON to --slo-report and a failed SLO makes locust exit with 1.
+"""
+import json
+import random
+import time
+from functools import lru_cache
+
+import gevent
+from gevent.lock import Semaphore
+from locust import HttpUser, LoadTestShape, events, task
+from locust.runners import WorkerRunner
+
+# Size class -> number of match records attached to the payload (roughly 80 bytes each)
+PAYLOAD_HISTORY = {"small": 0, "medium": 25, "large": 400}
+GAMES = ["Mobile Legends", "PUBG Mobile", "Free Fire", "Genshin Impact", "Clash Royale"]
+
+# Outcomes Locust's request stats do not track; workers send them to the master with every stats report
+COUNTERS = {"throttled": 0, "dropped_arrivals": 0}
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    group = parser.add_argument_group("Load balancer scenarios")
+    group.add_argument("--shape", choices=["manual", "step", "spike", "soak"], default="manual", env_var="LOCUST_SHAPE",
+                       help="Load shape (manual = users and spawn rate from the UI or -u/-r)")
+    group.add_argument("--step-users", type=int, default=20, env_var="LOCUST_STEP_USERS", help="Users added per step")
+    group.add_argument("--step-seconds", type=int, default=60, env_var="LOCUST_STEP_SECONDS", help="Seconds per step")
+    group.add_argument("--max-users", type=int, default=200, env_var="LOCUST_MAX_USERS",
+                       help="Step: last step; soak: users held")
+    group.add_argument("--base-users", type=int, default=20, env_var="LOCUST_BASE_USERS", help="Spike: users around the spike")
+    group.add_argument("--spike-users", type=int, default=300, env_var="LOCUST_SPIKE_USERS", help="Spike: users at the peak")
+    group.add_argument("--spike-seconds", type=int, default=30, env_var="LOCUST_SPIKE_SECONDS", help="Spike: peak duration")
+    group.add_argument("--soak-seconds", type=int, default=3600, env_var="LOCUST_SOAK_SECONDS", help="Soak: hold duration")
+    group.add_argument("--arrival-rate", type=float, default=5, env_var="LOCUST_ARRIVAL_RATE",
+                       help="ArrivalRateUser: requests per second per user")
+    group.add_argument("--max-in-flight", type=int, default=50, env_var="LOCUST_MAX_IN_FLIGHT",
+                       help="ArrivalRateUser: outstanding requests per user before arrivals are dropped")
+    group.add_argument("--think-time", type=float, default=0.2, env_var="LOCUST_THINK_TIME",
+                       help="GamerUser: max seconds between requests")
+    group.add_argument("--gamer-ids", type=int, default=100000, env_var="LOCUST_GAMER_IDS", help="Distinct gamerIDs")
+    group.add_argument("--payload-mix", default="small=70,medium=25,large=5", env_var="LOCUST_PAYLOAD_MIX",
+                       help="Share of small/medium/large payloads")
+    group.add_argument("--slo-p99-ms", type=float, default=500, env_var="LOCUST_SLO_P99_MS", help="p99 latency SLO")
+    group.add_argument("--slo-error-rate", type=float, default=0.01, env_var="LOCUST_SLO_ERROR_RATE",
+                       help="Error rate SLO (0.01 = 1%%)")
+    group.add_argument("--slo-report", default="slo_report.json", env_var="LOCUST_SLO_REPORT", help="Where to write the SLO report")
+
+
+@lru_cache
+def parse_mix(text):
+    """ "small=70,medium=25,large=5" -> ([size, ...], [weight, ...]) """
+    mix = dict(pair.split("=") for pair in text.split(",") if pair.strip())
+    unknown = set(mix) - set(PAYLOAD_HISTORY)
+    if unknown:
+        raise ValueError(f"Unknown payload sizes {sorted(unknown)}; expected {sorted(PAYLOAD_HISTORY)}")
+    return list(mix), [float(weight) for weight in mix.values()]
+
+
+def make_payload(options, rng=random):
+    """ One request body: a random gamer, and a match history sized by the payload mix """
+    sizes, weights = parse_mix(options.payload_mix)
+    size = rng.choices(sizes, weights)[0]
+    payload = {
+        "game": rng.choice(GAMES),
+        "gamerID": f"GAMER{rng.randrange(options.gamer_ids):06d}",
+        "points": rng.randrange(1000),
+    }
+    if PAYLOAD_HISTORY[size]:
+        payload["history"] = [
+            {"match": index, "kills": rng.randrange(20), "deaths": rng.randrange(20), "mvp": rng.random() < 0.1}
+            for index in range(PAYLOAD_HISTORY[size])
+        ]
+    return size, payload
+
+
+class LoadBalancerUser(HttpUser):
+    """ Sends one record to the balancer and checks that it is echoed back """
+
+    abstract = True
+
+    def send(self):
+        size, payload = make_payload(self.environment.parsed_options)
+        with self.client.post("/api/process/", json=payload, name=f"/api/process/ [{size}]", catch_response=True) as response:
+            if response.status_code == 429:
+                COUNTERS["throttled"] += 1
+                response.failure("Throttled (429)")
+            elif response.status_code != 200:
+                response.failure(f"HTTP {response.status_code}")
+            else:
+                try:
+                    echoed = response.json().get("gamerID")
+                except ValueError:
+                    echoed = None
+                if echoed != payload["gamerID"]:
+                    response.failure("Response does not echo the request")
+
+
+class GamerUser(LoadBalancerUser):
+    """ Closed model: a new request only after the previous one returned and a short think time """
+
+    def wait_time(self):
+        return random.uniform(0, self.environment.parsed_options.think_time)
 
     @task
-    def send_post_request(self):
-        """ Simulates a client sending a POST request to the load balancer """
-        payload = {
-            "game": "Mobile Legends",
-            "gamerID": "TEST_USER",
-            "points": 50
+    def send_record(self):
+        self.send()
+
+
+class ArrivalRateUser(LoadBalancerUser):
+    """
+    Open model: starts requests on a fixed schedule (--arrival-rate per user) in their own greenlets
+    - A slow balancer does not lower the offered load; requests pile up instead, as with real traffic.
+    - Past --max-in-flight outstanding requests, arrivals are dropped and counted in the report.
+    """
+
+    def wait_time(self):
+        return 0
+
+    def on_start(self):
+        self.in_flight = Semaphore(self.environment.parsed_options.max_in_flight)
+        self.next_arrival = time.monotonic()
+
+    @task
+    def arrive(self):
+        self.next_arrival += 1 / self.environment.parsed_options.arrival_rate
+        gevent.sleep(max(0, self.next_arrival - time.monotonic()))
+        if self.in_flight.acquire(blocking=False):
+            gevent.spawn(self.send_and_release)
+        else:
+            COUNTERS["dropped_arrivals"] += 1
+
+    def send_and_release(self):
+        try:
+            self.send()
+        finally:
+            self.in_flight.release()
+
+
+class ScenarioShape(LoadTestShape):
+    """ Step, spike or soak load chosen with --shape (detached in manual mode, see `select_shape`) """
+
+    use_common_options = True  # Manual mode uses -u/-r; shapes ignore them but still stop at -t
+
+    def tick(self):
+        options = self.runner.environment.parsed_options
+        run_time = self.get_run_time()
+        if options.shape == "step":
+            return self.step(options, run_time)
+        if options.shape == "spike":
+            return self.spike(options, run_time)
+        return self.soak(options, run_time)
+
+    @staticmethod
+    def step(options, run_time):
+        """ +step_users every step_seconds up to max_users, held for one more step """
+        steps = options.max_users // options.step_users
+        current = int(run_time // options.step_seconds) + 1
+        if current > steps + 1:
+            return None
+        users = min(current, steps) * options.step_users
+        return users, options.step_users
+
+    @staticmethod
+    def spike(options, run_time):
+        """ base_users, a jump to spike_users for spike_seconds, then base_users again to watch recovery """
+        calm = options.step_seconds
+        if run_time < calm:
+            return options.base_users, options.base_users
+        if run_time < calm + options.spike_seconds:
+            return options.spike_users, options.spike_users  # All at once
+        if run_time < 2 * calm + options.spike_seconds:
+            return options.base_users, options.spike_users
+        return None
+
+    @staticmethod
+    def soak(options, run_time):
+        """ Ramps up to max_users over one step, then holds them for soak_seconds """
+        if run_time > options.step_seconds + options.soak_seconds:
+            return None
+        return options.max_users, max(1, options.max_users / options.step_seconds)
+
+
+@events.init.add_listener
+def select_shape(environment, **kwargs):
+    """ In manual mode the shape is removed, so Locust's normal user count/spawn rate controls apply """
+    if environment.parsed_options and environment.parsed_options.shape == "manual":
+        environment.shape_class = None
+
+
+@events.report_to_master.add_listener
+def send_counters(client_id, data):
+    """ Worker: ships the counts since the last report """
+    data["lb_counters"] = dict(COUNTERS)
+    for name in COUNTERS:
+        COUNTERS[name] = 0
+
+
+@events.worker_report.add_listener
+def add_counters(client_id, data):
+    """ Master: adds up the counts of every worker """
+    for name, value in data.get("lb_counters", {}).items():
+        COUNTERS[name] += value
+
+
+def build_slo_report(environment):
+    """ p50/p99/p99.9 and error rate against the SLOs, per request type and overall """
+    options = environment.parsed_options
+    stats = environment.stats
+
+    def summarize(entry):
+        requests = entry.num_requests
+        return {
+            "requests": requests,
+            "failures": entry.num_failures,
+            "error_rate": round(entry.num_failures / requests, 5) if requests else 0,
+            "p50_ms": entry.get_response_time_percentile(0.5),
+            "p99_ms": entry.get_response_time_percentile(0.99),
+            "p999_ms": entry.get_response_time_percentile(0.999),
+            "rps": round(entry.total_rps, 1),
+            "avg_content_length": round(entry.avg_content_length),
         }
-        headers = {"Content-Type": "application/json"}
-        
-        response = self.client.post("/api/process/", json=payload, headers=headers)
-        if response.status_code != 200:
-            print(f"❌{response}")
+
+    total = summarize(stats.total)
+    checks = {
+        "p99_latency": {"slo_ms": options.slo_p99_ms, "actual_ms": total["p99_ms"],
+                        "passed": total["requests"] > 0 and total["p99_ms"] <= options.slo_p99_ms},
+        "error_rate": {"slo": options.slo_error_rate, "actual": total["error_rate"],
+                       "passed": total["requests"] > 0 and total["error_rate"] <= options.slo_error_rate},
+    }
+    return {
+        "passed": all(check["passed"] for check in checks.values()),
+        "checks": checks,
+        "total": total,
+        "endpoints": {f"{entry.method} {entry.name}": summarize(entry) for entry in stats.entries.values()},
+        "errors": {f"{error.method} {error.name}: {error.error}": error.occurrences for error in stats.errors.values()},
+        "throttled": COUNTERS["throttled"],
+        "dropped_arrivals": COUNTERS["dropped_arrivals"],
+        "scenario": {
+            "shape": options.shape,
+            "users": [cls.__name__ for cls in environment.user_classes],
+            "payload_mix": options.payload_mix,
+            "gamer_ids": options.gamer_ids,
+            "arrival_rate": options.arrival_rate,
+        },
+    }
+
+
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    """ Writes the SLO report and fails the run when an SLO is missed (master or standalone only) """
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    report = build_slo_report(environment)
+    with open(environment.parsed_options.slo_report, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+    verdict = "✅ SLOs met" if report["passed"] else "❌ SLOs missed"
+    print(f"{verdict}: p99 {report['total']['p99_ms']} ms, error rate {report['total']['error_rate']:.2%} "
+          f"(report: {environment.parsed_options.slo_report})", flush=True)
+    if not report["passed"]:
+        environment.process_exit_code = 1
@@ -0,0 +1,156 @@
+import contextvars
+import logging
+import threading
+import time
+from django.conf import settings
+from .http_client_adapter import HttpClientAdapter
+from ..monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+# Whether the last guarded call of the current task was rejected by an open circuit
+FAILED_FAST = contextvars.ContextVar("circuit_failed_fast", default=False)
+
+
+class CircuitBreaker:
+    """ Closed → Open after repeated failures → Half-open trial requests → Closed again """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, open_timeout, half_open_max_calls):
+        self.failure_threshold = failure_threshold
+        self.open_timeout = open_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials = 0  # Trial requests in flight while half-open
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        """ Returns False (fail fast) while open or when half-open trials are used up """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.trials = 0
+            if self.trials >= self.half_open_max_calls:
+                return False
+            self.trials += 1
+            return True
+
+    def record_success(self):
+        """ Returns True if the state changed """
+        with self.lock:
+            changed = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trials = 0
+            return changed
+
+    def record_failure(self):
+        """ Returns True if the circuit just opened """
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trials = 0
+                return True
+            return False
+
+    def release_trial(self):
+        """ Gives back a half-open trial slot whose request never completed """
+        with self.lock:
+            if self.state == self.HALF_OPEN and self.trials > 0:
+                self.trials -= 1
+
+    def is_open(self):
+        """ True while the circuit is open and its timeout has not elapsed yet """
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.open_timeout
+
+
+class CircuitBreakerAdapter(HttpClientAdapter):
+    """
+    Wraps another HTTP adapter with one circuit breaker per backend
+    - Open circuits fail fast (returns None like any failed request) instead of waiting for the timeout.
+    - After CIRCUIT_OPEN_TIMEOUT a limited number of half-open trial requests decide whether to close it.
+    - `on_state_change` is called when a circuit opens or its timeout elapses, so the routing table
+      can skip open circuits right away.
+    """
+
+    def __init__(self, http_client, on_state_change=None):
+        self.http_client = http_client
+        self.on_state_change = on_state_change
+        self.breakers = {}  # instance_url -> CircuitBreaker
+
+    def get_breaker(self, url):
+        breaker = self.breakers.get(url)
+        if breaker is None:
+            breaker = self.breakers[url] = CircuitBreaker(
+                settings.CIRCUIT_FAILURE_THRESHOLD,
+                settings.CIRCUIT_OPEN_TIMEOUT,
+                settings.CIRCUIT_HALF_OPEN_MAX_CALLS,
+            )
+        return breaker
+
+    async def post(self, url: str, json: dict):
+        return await self.guard(url, lambda: self.http_client.post(url, json=json))
+
+    async def stream(self, url: str, content: bytes, headers=None):
+        return await self.guard(url, lambda: self.http_client.stream(url, content, headers))
+
+    async def guard(self, url, call):
+        """ Runs `call()` through the circuit of `url` and records its outcome """
+        breaker = self.get_breaker(url)
+        if not breaker.allow_request():
+            FAILED_FAST.set(True)
+            return None  # Fail fast
+        FAILED_FAST.set(False)
+
+        completed = False
+        try:
+            response = await call()
+            completed = True
+        finally:
+            if not completed:
+                breaker.release_trial()  # Cancelled before an outcome was known
+
+        if response is None or response.status_code >= 500:
+            if breaker.record_failure():
+                logger.warning("🔌 Circuit for %s opened for %ss.", url, breaker.open_timeout)
+                metrics.CIRCUITS_OPENED.inc(url)
+                self.notify()
+                timer = threading.Timer(breaker.open_timeout, self.notify)  # Let half-open trials back in
+                timer.daemon = True
+                timer.start()
+        elif breaker.record_success():
+            logger.info("🔌 Circuit for %s closed.", url)
+            self.notify()
+        return response
+
+    def notify(self):
+        if self.on_state_change is not None:
+            self.on_state_change()
+
+    @staticmethod
+    def failed_fast():
+        """ True if the last request of the current task never left the load balancer because its circuit was open """
+        return FAILED_FAST.get()
+
+    def is_open(self, url):
+        """ True if requests to `url` would currently fail fast """
+        breaker = self.breakers.get(url)
+        return breaker is not None and breaker.is_open()
+
+    def get_states(self):
+        """ Current state of every known circuit """
+        return {url: breaker.state for url, breaker in self.breakers.items()}
+
+    async def aclose(self):
+        await self.http_client.aclose()
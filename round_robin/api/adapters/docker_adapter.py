@@ -1,4 +1,5 @@
 import docker
+from ..monitoring.metrics import DOCKER_API_DURATION
 
 
 class DockerAdapter:
@@ -7,25 +8,45 @@ class DockerAdapter:
     def __init__(self):
         self.client = docker.from_env()
 
-    def get_running_containers(self, prefix="app"):
-        """Returns a list of running containers matching a prefix"""
-        return [
-            container.name
-            for container in self.client.containers.list()
-            if prefix in container.name
-        ]
+    def get_running_containers(self, prefix="app", label=None):
+        """Returns a list of running containers matching a prefix (or carrying a label)"""
+        with DOCKER_API_DURATION.time("containers.list"):
+            if label:
+                return [container.name for container in self.client.containers.list(filters={"label": label})]
+            return [
+                container.name
+                for container in self.client.containers.list()
+                if prefix in container.name
+            ]
+
+    def get_container_events(self, label=None):
+        """Streams container lifecycle events (blocking generator of decoded events)"""
+        filters = {"type": "container", "event": ["start", "stop", "die", "health_status"]}
+        if label:
+            filters["label"] = label
+        return self.client.events(decode=True, filters=filters)
 
     def get_container_status(self, container_name):
         """Returns the status of a specific container"""
         try:
-            container = self.client.containers.get(container_name)
+            with DOCKER_API_DURATION.time("containers.get"):
+                container = self.client.containers.get(container_name)
             return container.status  # Returns 'running' or other states
         except docker.errors.NotFound:
             return "stopped"
 
+    def get_container_labels(self, container_name):
+        """Returns the Docker labels of a specific container"""
+        try:
+            with DOCKER_API_DURATION.time("containers.get"):
+                return self.client.containers.get(container_name).labels or {}
+        except docker.errors.APIError:  # Also covers NotFound
+            return {}
+
     def get_container_stats(self, container_name):
         """Returns CPU & Memory stats for a specific container"""
         try:
-            return self.client.containers.get(container_name).stats(stream=False)
+            with DOCKER_API_DURATION.time("stats"):
+                return self.client.containers.get(container_name).stats(stream=False)
         except docker.errors.APIError:
             return None
@@ -8,3 +8,12 @@ class HttpClientAdapter(ABC):
     async def post(self, url: str, json: dict):
         """Sends a POST request and returns response"""
         pass
+
+    @abstractmethod
+    async def stream(self, url: str, content: bytes, headers=None):
+        """Sends raw bytes and returns the response with its body still unread (the caller closes it)"""
+        pass
+
+    async def aclose(self):
+        """Releases pooled connections (no-op for adapters without a pool)"""
+        pass
@@ -1,16 +1,97 @@
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
 import httpx
 from django.conf import settings
 from .http_client_adapter import HttpClientAdapter
 
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support is optional)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 class HttpxAdapter(HttpClientAdapter):
-    """Adapter for HTTPX"""
+    """
+    Adapter for HTTPX with long-lived connection pools.
+    - One AsyncClient per event loop and backend, so keep-alive connections are reused.
+    - Per-backend connection limits and keep-alive expiry come from settings.
+    - HTTP/2 is enabled only when requested and the `h2` package is installed.
+    """
+
+    def __init__(
+        self,
+        max_connections=None,
+        max_keepalive_connections=None,
+        keepalive_expiry=None,
+        http2=None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=settings.UPSTREAM_MAX_CONNECTIONS if max_connections is None else max_connections,
+            max_keepalive_connections=(
+                settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS if max_keepalive_connections is None else max_keepalive_connections
+            ),
+            keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY if keepalive_expiry is None else keepalive_expiry,
+        )
+        http2 = settings.UPSTREAM_HTTP2 if http2 is None else http2
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("⚠️ UPSTREAM_HTTP2 is enabled but 'h2' is not installed. Falling back to HTTP/1.1.")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        # Clients are bound to the loop that created them. Their pools keep the loop alive, so entries of
+        # closed loops are dropped explicitly whenever a new loop shows up.
+        self._clients = {}
+
+    def build_client(self):
+        """Creates a pooled client for a single backend"""
+        return httpx.AsyncClient(
+            timeout=settings.REQUEST_TIMEOUT,
+            limits=self.limits,
+            http2=self.http2,
+        )
+
+    def get_client(self, url: str):
+        """Returns the pooled client for the running loop and the backend behind `url`"""
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            self.evict_closed_loops()
+            clients = self._clients[loop] = {}
+
+        backend = urlsplit(url).netloc
+        client = clients.get(backend)
+        if client is None or client.is_closed:
+            client = clients[backend] = self.build_client()
+        return client
+
+    def evict_closed_loops(self):
+        """Forgets the clients of loops that were closed without aclose() (their sockets go with them)"""
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
 
     async def post(self, url: str, json: dict):
-        async with httpx.AsyncClient(timeout=settings.REQUEST_TIMEOUT) as client:
-            try:
-                response = await client.post(url, json=json)
-                return response
-            except httpx.RequestError as e:
-                print(f"🚨 HTTPX Request Failed: {url} | Error: {str(e)}", flush=True)
-                return None
+        try:
+            response = await self.get_client(url).post(url, json=json)
+            return response
+        except httpx.RequestError as e:
+            logger.warning("🚨 HTTPX Request Failed: %s | Error: %s", url, e)
+            return None
+
+    async def stream(self, url: str, content: bytes, headers=None):
+        client = self.get_client(url)
+        try:
+            request = client.build_request("POST", url, content=content, headers=headers)
+            return await client.send(request, stream=True)
+        except httpx.RequestError as e:
+            logger.warning("🚨 HTTPX Request Failed: %s | Error: %s", url, e)
+            return None
+
+    async def aclose(self):
+        """Closes every pooled client that belongs to the running loop"""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
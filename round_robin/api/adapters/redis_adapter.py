@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is optional; without it the shared tiers stay disabled
+    redis = None
+
+
+class RedisAdapter:
+    """
+    Thin async wrapper around the `redis_cache` container
+    - Every call is bounded by REDIS_TIMEOUT and never raises: errors read as a miss (None).
+    - Callers decide what a miss means (cache miss, fail-open throttle, ...).
+    """
+
+    def __init__(self, host=None, port=None, timeout=None, client=None):
+        self.timeout = settings.REDIS_TIMEOUT if timeout is None else timeout
+        if client is None:
+            if redis is None:
+                raise RuntimeError("❌ The `redis` package is required for the shared Redis tier")
+            client = redis.Redis(
+                host=host or settings.REDIS_HOST,
+                port=port or settings.REDIS_PORT,
+                socket_timeout=self.timeout,
+                socket_connect_timeout=self.timeout,
+            )
+        self.client = client
+
+    async def get(self, key):
+        """ Returns the stored bytes, or None on a miss or error """
+        try:
+            return await asyncio.wait_for(self.client.get(key), self.timeout)
+        except Exception as e:
+            logger.warning("⚠️ Redis GET failed: %s", e)
+            return None
+
+    async def set(self, key, value, ttl):
+        """ Stores `value` for `ttl` seconds; returns False on error """
+        try:
+            await asyncio.wait_for(self.client.set(key, value, px=max(1, int(ttl * 1000))), self.timeout)
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Redis SET failed: %s", e)
+            return False
+
+    async def run_script(self, script, keys, args):
+        """ Runs a Lua script (EVALSHA, loading it on first use); returns None on error """
+        sha = hashlib.sha1(script.encode()).hexdigest()
+        try:
+            try:
+                return await asyncio.wait_for(self.client.evalsha(sha, len(keys), *keys, *args), self.timeout)
+            except Exception as e:
+                if "NOSCRIPT" not in str(e):
+                    raise
+                return await asyncio.wait_for(self.client.eval(script, len(keys), *keys, *args), self.timeout)
+        except Exception as e:
+            logger.warning("⚠️ Redis script failed: %r", e)
+            return None
+
+    async def aclose(self):
+        try:
+            await self.client.aclose()
+        except Exception:
+            pass
@@ -1,36 +1,151 @@
-import json
-from django.http import JsonResponse
-from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
-from asgiref.sync import async_to_sync  # Import async_to_sync
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import MethodNotAllowed, Throttled
+from .json_codec import loads
 from .proxies.factory import ProxyFactory
 from .handlers.request_handler import RequestHandler
+from .monitoring.metrics import CONTENT_TYPE, REGISTRY
+from .handlers.request_coalescer import RequestCoalescer
+from .handlers.response_cache import ResponseCache
+from .handlers.batch_handler import BatchHandler, iter_records
+from .handlers.passthrough import build_streaming_response, get_forward_headers
+from .adapters.redis_adapter import RedisAdapter
+from .throttling.local_throttle import LocalAnonRateThrottle, LocalUserRateThrottle
+from .throttling.redis_throttle import RedisAnonRateThrottle, RedisUserRateThrottle
 
 # Create the proxy **once** when Django starts
 proxy = ProxyFactory.get_proxy()
+coalescer = RequestCoalescer() if settings.REQUEST_COALESCING else None  # Shared by all requests
+cache = ResponseCache(shared=RedisAdapter() if settings.CACHE_REDIS else None) if settings.RESPONSE_CACHE else None
+if settings.METRICS_DIR:
+    REGISTRY.start_flushing(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)  # Lets any worker serve every worker's metrics
 
-class ProxyForwardView(APIView):
+class ProxyForwardView(View):
     """
     Handles forwarding requests asynchronously through the proxy system.
     Uses dynamic proxy selection and automatic instance retrieval.
-    - Implements API Throttling using DRF's built-in rate limit system.
+    - Runs natively on the ASGI event loop (no async_to_sync bridge per request).
+    - Implements API Throttling using DRF's throttle classes and rates.
+    - With PASSTHROUGH_MODE, relays the raw body and streams the upstream response back.
     """
-    permission_classes = [AllowAny]  # Allow any user to call this API
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]  # Apply IP-based throttling
+    if settings.THROTTLE_BACKEND == "redis":
+        throttle_classes = [RedisAnonRateThrottle, RedisUserRateThrottle]  # Limits shared by every worker and replica
+    else:
+        throttle_classes = [LocalAnonRateThrottle, LocalUserRateThrottle]  # Apply IP-based throttling
 
-    def post(self, request):  # Change from async def to def
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        """ Same CSRF behaviour as DRF's APIView """
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        throttled_response = await self.check_throttles(request)
+        if throttled_response is not None:
+            return throttled_response
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def check_throttles(self, request):
+        """ Runs every throttle and returns DRF's 429 response if any of them rejects the request """
+        request.user = await request.auser()  # Resolve the user without touching the DB from the event loop
+
+        exc = await self.charge_throttles(request)
+        if exc is None:
+            return None
+
+        response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+        if exc.wait is not None:
+            response["Retry-After"] = "%d" % exc.wait
+        return response
+
+    async def charge_throttles(self, request):
+        """ Takes one request from every throttle; returns DRF's Throttled error if any of them rejects it """
+        durations = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if hasattr(throttle, "aallow_request"):
+                allowed = await throttle.aallow_request(request, self)  # Throttles backed by Redis
+            else:
+                allowed = throttle.allow_request(request, self)
+            if not allowed:
+                durations.append(throttle.wait())
+
+        if not durations:
+            return None
+
+        durations = [duration for duration in durations if duration is not None]
+        return Throttled(wait=max(durations, default=None))
+
+    async def post(self, request):
+        if settings.PASSTHROUGH_MODE:
+            return await self.pass_through(request)
+
+        try:
+            data = loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+        handler = RequestHandler(proxy=proxy, coalescer=coalescer, cache=cache)
+        response_data, status = await handler.handle_request(data, headers=request.headers)
+
+        return JsonResponse(response_data, status=status, safe=False)
+
+    async def pass_through(self, request):
+        """ Forwards the raw body and streams the upstream response back unparsed """
+        data = None
+        if settings.PASSTHROUGH_VALIDATE_JSON:
+            try:
+                data = loads(request.body)
+            except ValueError:
+                return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+        upstream = await proxy.forward_raw(request.body, headers=get_forward_headers(request), data=data)
+        if upstream is None:
+            response_data, status = proxy.generate_error_response()
+            return JsonResponse(response_data, status=status)
+        return build_streaming_response(upstream)
+
+    async def get(self, request):
+        return JsonResponse({"error": "Only POST allowed"}, status=405)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        """ Keeps DRF's 405 body for methods other than GET/POST """
+        exc = MethodNotAllowed(request.method)
+        response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+        response["Allow"] = ", ".join(self._allowed_methods())
+
+        if self.view_is_async:
+            async def func():
+                return response
+            return func()
+        return response
+
+
+class BatchForwardView(ProxyForwardView):
+    """
+    Accepts a JSON array or a JSON Lines body and forwards every record through the proxy.
+    - Streams one JSONL result per record, in input order, followed by a summary line.
+    - Every forwarded record is charged to the throttles, so a batch gets no more through than single
+      requests would; the first refused record ends the batch with a 429 line.
+    - BATCH_MAX_RECORDS bounds how many records one request can forward.
+    """
+
+    async def post(self, request):
         try:
-            data = json.loads(request.body)
-            handler = RequestHandler(proxy=proxy)
-            
-            # Convert async call to sync
-            response_data, status = async_to_sync(handler.handle_request)(data)  
-
-            return Response(response_data, status=status)
-        except json.JSONDecodeError:
-            return Response({"error": "Invalid JSON"}, status=400)
-
-    def get(self, request):
-        return Response({"error": "Only POST allowed"}, status=405)
+            records = iter_records(request)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+        async def throttle():
+            exc = await self.charge_throttles(request)
+            return None if exc is None else exc.detail
+
+        handler = BatchHandler(RequestHandler(proxy=proxy, coalescer=coalescer, cache=cache), throttle=throttle)
+        return StreamingHttpResponse(handler.stream(records, headers=request.headers), content_type="application/x-ndjson")
+
+
+def metrics(request):
+    """ Prometheus scrape endpoint (merged across workers when METRICS_DIR is set) """
+    return HttpResponse(REGISTRY.render(settings.METRICS_DIR), content_type=CONTENT_TYPE)
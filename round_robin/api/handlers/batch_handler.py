@@ -0,0 +1,176 @@
+import asyncio
+import codecs
+import json
+import logging
+import re
+from collections import deque
+from django.conf import settings
+from ..json_codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class InvalidRecord:
+    """ Placeholder for a JSONL line that is not valid JSON (reported, never forwarded) """
+
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def iter_records(stream):
+    """
+    Reads records from a file-like body as the batch consumes them: one JSON array, or JSON Lines.
+    - Neither form is read whole, so a batch that stops early (record limit, throttle) stops reading too.
+    - A JSONL line that is not valid JSON becomes an InvalidRecord; a broken array ends with one.
+    Raises ValueError if the body is empty.
+    """
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if not first:
+        raise ValueError("Empty batch")
+
+    if first == b"[":
+        return parse_array(stream)
+    return parse_lines(first + stream.readline(), stream)
+
+
+def parse_lines(first, stream):
+    line = first
+    while line:
+        if line.strip():
+            try:
+                yield loads(line)
+            except ValueError:
+                yield InvalidRecord("Invalid JSON")
+        line = stream.readline()
+
+
+def parse_array(stream):
+    """ Yields the elements of a JSON array whose opening bracket was already read, a chunk at a time """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, eof = "", 0, False
+    expect_value, empty = True, True
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(max(CHUNK_SIZE, len(buffer) - pos))  # Grows with a large record, so re-parsing stays linear
+        eof = not chunk
+        buffer = buffer[pos:] + text.decode(chunk, final=eof)
+        pos = 0
+
+    try:
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                if eof:
+                    break
+                fill()
+                continue
+
+            char = buffer[pos]
+            if char == "]" and (not expect_value or empty):
+                return
+            if not expect_value:
+                if char != ",":
+                    break
+                pos += 1
+                expect_value = True
+                continue
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    break
+                fill()  # Most likely cut off at the chunk boundary
+                continue
+            if end == len(buffer) and not eof:
+                fill()  # A number or literal may go on in the next chunk
+                continue
+
+            pos = end
+            expect_value = empty = False
+            yield record
+    except UnicodeDecodeError:
+        pass
+    yield InvalidRecord("Invalid JSON")
+
+
+class BatchHandler:
+    """
+    Fans a batch of records out through the normal request path (proxy strategy, cache, coalescing)
+    - At most `concurrency` records are in flight; the window slides forward as the oldest one finishes.
+    - Results are streamed as JSON Lines in input order, then one summary line.
+    - A failed record is reported in its own line and never fails the rest of the batch.
+    - Past `max_records`, or when `throttle` refuses a record, one 413/429 line is reported and the body
+      is not read any further.
+    - `throttle` is an async callable that charges one record to the caller's rate limits and returns
+      None, or the error to report. The first record is not charged (the request itself already was).
+    """
+
+    def __init__(self, request_handler, concurrency=None, max_records=None, throttle=None):
+        self.request_handler = request_handler
+        self.throttle = throttle
+        self.concurrency = settings.BATCH_CONCURRENCY if concurrency is None else concurrency
+        self.max_records = settings.BATCH_MAX_RECORDS if max_records is None else max_records
+
+    async def stream(self, records, headers=None):
+        """ Yields one encoded JSONL line per record, then the summary """
+        total = succeeded = 0
+        async for index, status, result in self.process(records, headers):
+            line = {"index": index, "status": status}
+            if 200 <= status < 300:
+                succeeded += 1
+                line["response"] = result
+            else:
+                line["error"] = result
+            total += 1
+            yield dumps(line) + b"\n"
+
+        yield dumps({"summary": {"total": total, "succeeded": succeeded, "failed": total - succeeded}}) + b"\n"
+
+    async def process(self, records, headers=None):
+        """ Yields (index, status, body or error) in input order with a bounded sliding window """
+        window = deque()
+        stopped = None
+        prepaid = True
+        try:
+            for index, record in enumerate(records):
+                if index >= self.max_records:
+                    stopped = index, 413, f"Batch limit of {self.max_records} records exceeded"
+                    break
+                if self.throttle is not None and not isinstance(record, InvalidRecord):
+                    error = None if prepaid else await self.throttle()
+                    prepaid = False
+                    if error is not None:
+                        stopped = index, 429, error
+                        break
+
+                window.append(asyncio.ensure_future(self.forward(index, record, headers)))
+                if len(window) >= self.concurrency:
+                    yield await window.popleft()
+            while window:
+                yield await window.popleft()
+            if stopped is not None:
+                yield stopped
+        finally:
+            for task in window:
+                task.cancel()  # Client went away; stop the records still in flight
+
+    async def forward(self, index, record, headers):
+        if isinstance(record, InvalidRecord):
+            return index, 400, record.error
+
+        try:
+            body, status = await self.request_handler.handle_request(record, headers=headers)
+        except Exception as e:
+            logger.error("❌ Batch record %s failed: %r", index, e)
+            return index, 502, "Upstream request failed"
+        return index, status, body
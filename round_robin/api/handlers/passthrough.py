@@ -0,0 +1,70 @@
+import logging
+from django.http import StreamingHttpResponse
+from ..logs import REQUEST_ID_HEADER
+
+logger = logging.getLogger(__name__)
+
+# Connection-level headers never cross a proxy (RFC 9110 §7.6.1); lengths are recomputed per hop
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "proxy-connection",
+    "te", "trailer", "transfer-encoding", "upgrade", "host", "content-length",
+})
+
+
+def get_forward_headers(request):
+    """ The client's end-to-end headers plus X-Forwarded-For and the request id """
+    headers = {name: value for name, value in request.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+    client_ip = request.META.get("REMOTE_ADDR")
+    if client_ip:
+        forwarded = headers.pop("X-Forwarded-For", None)
+        headers["X-Forwarded-For"] = f"{forwarded}, {client_ip}" if forwarded else client_ip
+    request_id = getattr(request, "request_id", None)
+    if request_id:
+        headers.pop("X-Request-Id", None)
+        headers[REQUEST_ID_HEADER] = request_id  # Lets the backend's logs be joined with ours
+    return headers
+
+
+async def stream_body(upstream):
+    """ Yields the upstream body as received (still encoded) and always releases the connection """
+    try:
+        async for chunk in upstream.aiter_raw():
+            yield chunk
+    except Exception as e:
+        logger.warning("🚨 Upstream stream broke off: %r", e)
+    finally:
+        await upstream.aclose()
+
+
+class UpstreamResponse(StreamingHttpResponse):
+    """
+    Streaming response that also carries the upstream Set-Cookie headers verbatim
+    - Set-Cookie cannot be comma-joined, and ResponseHeaders keeps one value per name, so they are kept
+      aside and added to `items()`, which Django's WSGI and ASGI handlers send one header at a time.
+    - Cookies set through `set_cookie()` are still sent as usual, after the upstream ones.
+    """
+
+    def __init__(self, *args, set_cookies=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_cookies = list(set_cookies)
+
+    def items(self):
+        return [*super().items(), *(("Set-Cookie", value) for value in self.set_cookies)]
+
+
+def build_streaming_response(upstream):
+    """ Relays the upstream status, headers and body without parsing it """
+    response = UpstreamResponse(stream_body(upstream), status=upstream.status_code)
+    for name, value in upstream.headers.multi_items():
+        lowered = name.lower()
+        if lowered in HOP_BY_HOP_HEADERS:
+            continue
+        if lowered == "set-cookie":
+            response.set_cookies.append(value)
+        elif name in response.headers:
+            response.headers[name] = f"{response.headers[name]}, {value}"  # Repeated fields combine (RFC 9110 §5.3)
+        else:
+            response.headers[name] = value
+    if "content-length" in upstream.headers:
+        response.headers["Content-Length"] = upstream.headers["content-length"]  # Raw body, so it still matches
+    return response
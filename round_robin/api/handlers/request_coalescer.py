@@ -0,0 +1,54 @@
+import asyncio
+import hashlib
+import json
+from django.conf import settings
+
+
+class Flight:
+    """ One upstream call shared by every identical request waiting on it """
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Single-flight request coalescing
+    - Identical concurrent requests (same canonical JSON body and selected headers) share one upstream call.
+    - The result or exception is fanned out to every waiter.
+    - A cancelled waiter only stops waiting; the upstream call is cancelled once nobody waits for it.
+    """
+
+    def __init__(self, header_names=None):
+        self.header_names = settings.COALESCE_HEADERS if header_names is None else header_names
+        self.in_flight = {}  # key -> Flight
+
+    def make_key(self, data, headers=None):
+        """ Hash of the canonical JSON body plus the configured headers """
+        parts = [json.dumps(data, sort_keys=True, separators=(",", ":"))]
+        if headers:
+            parts.extend(f"{name.lower()}:{headers.get(name, '')}" for name in self.header_names)
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    async def run(self, key, call):
+        """ Awaits the in-flight call for `key`, starting `call()` if there is none """
+        flight = self.in_flight.get(key)
+        if flight is None:
+            flight = self.in_flight[key] = Flight(asyncio.ensure_future(call()))
+            flight.task.add_done_callback(lambda _: self.forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()  # Nobody is waiting for the result any more
+                self.forget(key, flight)  # New requests start a fresh call instead of joining a cancelled one
+
+    def forget(self, key, flight):
+        if self.in_flight.get(key) is flight:
+            del self.in_flight[key]
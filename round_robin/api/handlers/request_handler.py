@@ -1,9 +1,22 @@
 class RequestHandler:
-    """Handles API requests using an injected proxy"""
+    """Handles API requests using an injected proxy (and optional response cache / request coalescer)"""
 
-    def __init__(self, proxy):
+    def __init__(self, proxy, coalescer=None, cache=None):
         self.proxy = proxy
+        self.coalescer = coalescer
+        self.cache = cache
 
-    async def handle_request(self, data):
-        """Forwards request using the injected proxy strategy"""
-        return await self.proxy.forward_request(data)
+    async def handle_request(self, data, headers=None):
+        """Serves cache hits directly, otherwise forwards using the injected proxy strategy"""
+        if self.cache is None:
+            return await self.forward(data, headers)
+
+        key = self.cache.make_key(data, headers)
+        return await self.cache.fetch(key, lambda: self.forward(data, headers))
+
+    async def forward(self, data, headers=None):
+        if self.coalescer is None:
+            return await self.proxy.forward_request(data, headers=headers)
+
+        key = self.coalescer.make_key(data, headers)
+        return await self.coalescer.run(key, lambda: self.proxy.forward_request(data, headers=headers))
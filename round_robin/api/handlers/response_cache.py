@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from django.conf import settings
+from ..proxies.proxy import ProxyResponse
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    body: object
+    status: int
+    headers: dict
+    fresh_until: float  # Wall clock, so entries can be shared between processes through Redis
+    stale_until: float
+
+
+class LocalCache:
+    """ Size-bounded in-process LRU; entries past their stale window are dropped on read """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if now >= entry.stale_until:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # Evict the least recently used entry
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def parse_cache_control(headers):
+    """
+    Returns (ttl, stale_while_revalidate) from an upstream Cache-Control header.
+    None when the header is absent or sets no lifetime (e.g. just "public"), so the configured defaults apply.
+    """
+    value = next((v for k, v in (headers or {}).items() if k.lower() == "cache-control"), None)
+    if value is None:
+        return None
+
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        directives[name.lower()] = arg.strip('"')
+
+    if {"no-store", "no-cache", "private"} & directives.keys():
+        return 0, 0
+
+    def seconds(name):
+        try:
+            return max(0, int(directives[name]))
+        except (KeyError, ValueError):
+            return None
+
+    ttl = seconds("s-maxage")
+    if ttl is None:
+        ttl = seconds("max-age")
+    if ttl is None:
+        return None
+    return ttl, seconds("stale-while-revalidate") or 0
+
+
+class ResponseCache:
+    """
+    Response cache in front of the proxy
+    - Keyed by selected body fields (whole body by default) and headers.
+    - In-process LRU, optionally backed by a shared Redis tier (RedisAdapter).
+    - Upstream Cache-Control wins over CACHE_TTL; no-store/no-cache/private responses are not cached.
+    - Stale entries are served while one background call revalidates them.
+    """
+
+    def __init__(self, shared=None, key_fields=None, key_headers=None, max_entries=None):
+        self.local = LocalCache(settings.CACHE_MAX_ENTRIES if max_entries is None else max_entries)
+        self.shared = shared
+        self.key_fields = settings.CACHE_KEY_FIELDS if key_fields is None else key_fields
+        self.key_headers = settings.CACHE_KEY_HEADERS if key_headers is None else key_headers
+        self.revalidating = {}  # key -> background refresh task
+
+    def make_key(self, data, headers=None):
+        """ Hash of the configured body fields (or the canonical body) plus the configured headers """
+        if self.key_fields and isinstance(data, dict):
+            data = {field: data.get(field) for field in self.key_fields}
+        parts = [json.dumps(data, sort_keys=True, separators=(",", ":"))]
+        if headers:
+            parts.extend(f"{name.lower()}:{headers.get(name, '')}" for name in self.key_headers)
+        return "lb:cache:" + hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    async def fetch(self, key, call):
+        """ Returns the cached response for `key`, calling `call()` on a miss """
+        entry = await self.lookup(key)
+        if entry is not None:
+            if time.time() >= entry.fresh_until:
+                self.revalidate(key, call)  # Stale, but still within its grace window
+            return ProxyResponse(entry.body, entry.status, entry.headers)
+
+        return await self.fill(key, call)
+
+    async def lookup(self, key):
+        now = time.time()
+        entry = self.local.get(key, now)
+        if entry is not None or self.shared is None:
+            return entry
+
+        raw = await self.shared.get(key)
+        if raw is None:
+            return None
+        entry = CachedResponse(*json.loads(raw))
+        if now >= entry.stale_until:
+            return None
+        self.local.set(key, entry)
+        return entry
+
+    async def fill(self, key, call):
+        result = await call()
+        await self.store(key, result)
+        return result
+
+    async def store(self, key, result):
+        body, status = result
+        if status != 200:
+            return  # Errors are never cached
+
+        headers = dict(getattr(result, "headers", {}))
+        policy = parse_cache_control(headers)
+        if policy is None:
+            policy = settings.CACHE_TTL, settings.CACHE_STALE_WHILE_REVALIDATE
+        ttl, stale = policy
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        entry = CachedResponse(body, status, headers, now + ttl, now + ttl + stale)
+        self.local.set(key, entry)
+        if self.shared is not None:
+            await self.shared.set(key, json.dumps(entry), ttl + stale)
+
+    def revalidate(self, key, call):
+        """ Refreshes `key` in the background, at most once at a time """
+        if key in self.revalidating:
+            return
+
+        task = asyncio.ensure_future(self.fill(key, call))
+        self.revalidating[key] = task
+
+        def done(task):
+            self.revalidating.pop(key, None)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning("⚠️ Cache revalidation failed: %s", task.exception())
+
+        task.add_done_callback(done)
@@ -0,0 +1,59 @@
+import json
+import re
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib produces the same bytes, only slower
+    orjson = None
+
+# Floats orjson writes differently from Python's repr (1e16 vs 1e+16, 0.00001 vs 1e-05).
+# Matches can also come from inside strings; those just take the (identical) stdlib path.
+FLOAT_MISMATCH = re.compile(rb"\de-?\d|0\.0000")
+
+ORJSON_OPTIONS = 0
+if orjson is not None:
+    # Leave everything the stdlib encodes differently (datetimes, dataclasses, subclasses) to the fallback
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+
+def reject(obj):
+    raise TypeError  # Makes orjson give up so the stdlib encoder decides
+
+
+def stdlib_dumps(obj):
+    """ The reference encoding: DRF's compact, UTF-8, JS-safe JSON """
+    text = json.dumps(obj, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":"))
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def fast_dumps(obj):
+    """ orjson encoding of `obj`, or None when it would not match the stdlib byte for byte """
+    if orjson is None:
+        return None
+    try:
+        content = orjson.dumps(obj, default=reject, option=ORJSON_OPTIONS)
+    except TypeError:  # Non-str keys, ints beyond 64 bits, Decimal, datetimes, ...
+        return None
+    if FLOAT_MISMATCH.search(content):
+        return None
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+def dumps(obj):
+    """
+    Encodes `obj` like stdlib_dumps, using orjson when it gives the same bytes.
+    (NaN/Infinity are not JSON; orjson writes them as null.)
+    """
+    content = fast_dumps(obj)
+    return stdlib_dumps(obj) if content is None else content
+
+
+def loads(data):
+    """ Decodes bytes or str; raises json.JSONDecodeError like json.loads """
+    if orjson is None:
+        return json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)  # Accepts what orjson is stricter about (NaN, lone surrogates), else re-raises
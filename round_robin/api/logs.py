@@ -0,0 +1,202 @@
+import contextvars
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+REQUEST_ID = contextvars.ContextVar("request_id", default=None)
+REQUEST_ID_HEADER = "X-Request-ID"
+VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+# LogRecord attributes that are not user-supplied `extra` fields
+RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "suppressed", "dropped"}
+
+
+class RequestIdFilter(logging.Filter):
+    """ Stamps every record with the id of the request being handled ("-" outside a request) """
+
+    def filter(self, record):
+        record.request_id = REQUEST_ID.get() or "-"
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per message template (logger name + unformatted message)
+    - `rate` records per second with bursts of `burst` pass; the rest are dropped before they are queued.
+    - The next record that passes carries `suppressed`, the number dropped since the last one.
+    - No lock: under a race a bucket may let one record too many through, which is fine for logs.
+    """
+
+    def __init__(self, rate=10.0, burst=20):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}  # (name, msg) -> [tokens, updated_at, suppressed]
+
+    def filter(self, record):
+        if not self.rate:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.msg)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) > 10000:
+                self.buckets.clear()  # Unbounded templates (f-strings); forget them all rather than grow
+            bucket = self.buckets[key] = [self.burst, now, 0]
+
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """ Keeps a `rate` fraction of records below `level`; warnings and errors are never sampled away """
+
+    def __init__(self, rate=1.0, level="WARNING"):
+        super().__init__()
+        self.rate = rate
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record):
+        return record.levelno >= self.level or self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """ One JSON object per line: time, level, logger, request id, message and any `extra` fields """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_FIELDS:
+                entry[key] = value
+        for key in ("suppressed", "dropped"):
+            if getattr(record, key, None):
+                entry[key] = getattr(record, key)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+    def formatTime(self, record, datefmt=None):
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+
+
+class TextFormatter(logging.Formatter):
+    """ Human-readable variant for local development """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        for key in ("suppressed", "dropped"):
+            if getattr(record, key, None):
+                text += f" ({getattr(record, key)} {key})"
+        return text
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    Hands records to a background thread that does the formatting and the writing
+    - The caller only pays for a bounded `put_nowait`; a full queue drops the record instead of blocking.
+    - Dropped records are counted and reported on the next record that gets through.
+    - The listener thread writes to `stream` (stdout by default) and is drained when logging shuts down.
+    """
+
+    def __init__(self, json_format=True, max_size=10000, stream=None):
+        super().__init__(queue.Queue(max_size))
+        self.dropped = 0
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JsonFormatter() if json_format else TextFormatter())
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+        self.listening = True
+
+    def prepare(self, record):
+        """ Renders only what cannot cross threads (args, tracebacks); the formatter runs in the listener """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        dropped = record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped -= dropped
+
+    def close(self):
+        """ Called by logging.shutdown at exit: drains the queue before the process ends """
+        if self.listening:
+            self.listening = False
+            self.listener.stop()
+        super().close()
+
+
+class RequestIdMiddleware:
+    """
+    Sets the request id for the duration of a request
+    - Reuses a well-formed incoming X-Request-ID header, otherwise generates one.
+    - The id is echoed back in the response and attached to every log record of the request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = REQUEST_ID.set(get_request_id(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            REQUEST_ID.reset(token)
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        token = REQUEST_ID.set(get_request_id(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            REQUEST_ID.reset(token)
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
+
+
+def get_request_id(request):
+    request_id = request.headers.get(REQUEST_ID_HEADER, "")
+    if not VALID_REQUEST_ID.fullmatch(request_id):
+        request_id = uuid.uuid4().hex
+    request.request_id = request_id
+    return request_id
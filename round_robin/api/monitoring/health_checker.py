@@ -1,63 +1,145 @@
+import logging
 import time
+import random
 import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import requests
 from django.conf import settings
 from ..monitoring.system_monitor_docker import  DockerSystemMonitor
 from ..adapters.docker_adapter import DockerAdapter
+from .routing_table import EMPTY_ROUTING_TABLE, RoutingTable
+from . import metrics
+
+logger = logging.getLogger(__name__)
 
 class HealthChecker:
-    """ Monitors instances via Docker and prevents overloading failing servers """
+    """
+    Monitors instances via Docker and prevents overloading failing servers
+    - Probes run in parallel on a bounded thread pool, so a sweep takes about as long as the slowest probe.
+    """
 
-    def __init__(self, instance_manager, system_monitor: DockerSystemMonitor):
+    def __init__(
+        self,
+        instance_manager,
+        system_monitor: DockerSystemMonitor,
+        collect_weights=False,
+        outlier_detector=None,
+        circuit_breakers=None,
+    ):
         self.instance_manager = instance_manager
         self.system_monitor = system_monitor
+        self.outlier_detector = outlier_detector  # Optional passive outlier detection fed by proxied responses
+        self.circuit_breakers = circuit_breakers  # Optional CircuitBreakerAdapter; open circuits are skipped
         self.docker_adapter = DockerAdapter()
         self.instances = instance_manager.get_instances()
         self.failed_instances = set()  # Tracks failing instances
+        self.collect_weights = collect_weights  # Only weighted strategies need CPU/Memory of healthy instances
+        self.instance_weights = {}  # instance_url -> dynamic weight (replaced as a whole by the health loop)
+        self.static_weights = {}  # container_name -> weight from the Docker label
+        self.routing_table = EMPTY_ROUTING_TABLE  # Replaced, never mutated, so readers need no lock
+        self.publish_lock = threading.Lock()  # Serializes writers only
+        self.listeners = []
+        self.probe_executor = ThreadPoolExecutor(
+            max_workers=settings.HEALTH_PROBE_CONCURRENCY, thread_name_prefix="health-probe"
+        )
+        self.pending_probes = set()  # Instances whose previous probe has not finished yet
         self.running = True
+        self.publish_routing_table()
+        self.watch_containers()
+        instance_manager.add_listener(self.on_instances_changed)  # Event-driven discovery pushes changes
 
         # Start background health check process
         self.health_check_thread = threading.Thread(target=self.health_check_loop, daemon=True)
         self.health_check_thread.start()
-        print("🩺 Health Checker Thread Started!", flush=True)
+        logger.info("🩺 Health Checker Thread Started!")
 
     def health_check_loop(self):
         """ Runs every 5 seconds to check instance health and refresh instances """
         while self.running:
             time.sleep(settings.HEALTH_CHECK_INTERVAL)
-            print("🔄 Checking health of instances and refreshing available ones...", flush=True)
-            self.instances = self.instance_manager.get_instances()  # Fetch latest running instances
-            self.check_instances_health()
+            logger.debug("🔄 Checking health of instances and refreshing available ones...")
+            started = time.monotonic()
+            try:
+                self.run_sweep()
+            except Exception:
+                logger.exception("❌ Health sweep failed. Retrying on the next interval.")  # Never let one sweep stop the loop
+            metrics.HEALTH_SWEEP_DURATION.observe(time.monotonic() - started)
+
+    def run_sweep(self):
+        """ One health sweep: refresh instances, eject outliers, probe failed instances and publish the routing table """
+        self.instances = self.instance_manager.get_instances()  # Fetch latest running instances
+        self.watch_containers()
+        self.eject_outliers()
+        self.check_instances_health()
+        if self.collect_weights:
+            self.update_instance_weights()
+        self.publish_routing_table()
+
+    def on_instances_changed(self, instances):
+        """ Applies an instance change from discovery without waiting for the health loop """
+        self.instances = instances
+        self.static_weights = {}  # A recreated container may carry a different weight label
+        self.watch_containers()
+        self.publish_routing_table()
+
+    def watch_containers(self):
+        """ Keeps streaming stats collectors running for the current instances """
+        self.system_monitor.watch([self.get_container_name(url) for url in self.instances])
 
     def check_instances_health(self):
-        """ Checks if instances are running and removes them from the failed list if healthy """
-        for instance_url in list(self.failed_instances):  # Check only failed instances
-            container_name = instance_url.replace("http://", "").split(":")[0]
+        """ Probes all failed instances in parallel and removes the ones that recovered """
+        targets = [
+            url for url in list(self.failed_instances)  # Snapshot: the request path adds to it concurrently
+            if url not in self.pending_probes and not self.is_ejected(url)  # Ejected outliers wait out their backoff
+        ]
+        if not targets:
+            return
+
+        self.pending_probes.update(targets)
+        futures = {self.probe_executor.submit(self.probe_instance, url): url for url in targets}
+        deadline = settings.HEALTH_PROBE_TIMEOUT + settings.HEALTH_PROBE_JITTER
+        done, not_done = wait(futures, timeout=deadline)
+
+        for future in not_done:
+            instance_url = futures[future]
+            logger.warning("⏱️ Health probe for %s exceeded %ss. Keeping it failed.", instance_url, deadline)
+            future.add_done_callback(lambda _, url=instance_url: self.pending_probes.discard(url))
+
+        for future in done:
+            instance_url = futures[future]
+            self.pending_probes.discard(instance_url)
+            if future.exception() is None and future.result():
+                logger.info("%s has recovered! Removing from failure list.", instance_url)
+                self.failed_instances.discard(instance_url)
 
-            is_running = self.docker_adapter.get_container_status(container_name) == "running"
-            is_healthy = self.is_application_healthy(instance_url)
+        self.publish_routing_table()
 
-            # Skip CPU/Memory check if the container is not running
-            if not is_running:
-                print(f"🚨 {instance_url} is stopped. Marking as failed!", flush=True)
-                self.failed_instances.add(instance_url)
-                continue  # ❌ Skip this instance
+    def probe_instance(self, instance_url):
+        """ Returns True if the instance is running, healthy and not overloaded (runs on the probe pool) """
+        time.sleep(random.uniform(0, settings.HEALTH_PROBE_JITTER))  # Spread probes so they don't hit Docker at once
+        container_name = self.get_container_name(instance_url)
 
-            is_overloaded = self.is_container_overloaded(container_name)
+        is_running = self.docker_adapter.get_container_status(container_name) == "running"
+        is_healthy = self.is_application_healthy(instance_url)
 
-            if is_running and not is_overloaded and is_healthy:
-                print(f"{instance_url} has recovered! Removing from failure list.", flush=True)
-                self.failed_instances.remove(instance_url)  
+        # Skip CPU/Memory check if the container is not running
+        if not is_running:
+            logger.warning("🚨 %s is stopped. Marking as failed!", instance_url)
+            return False  # ❌ Skip this instance
+
+        is_overloaded = self.is_container_overloaded(container_name)
+
+        return is_running and not is_overloaded and is_healthy
 
     def is_application_healthy(self, instance_url):
         """ Checks if the application is responding to health check API """
         health_url = instance_url.replace("/api/process/", "/api/process/health")
 
         try:
-            response = requests.get(health_url, timeout=5)
+            response = requests.get(health_url, timeout=settings.HEALTH_PROBE_TIMEOUT)
             return response.status_code == 200  # Healthy if it returns 200 OK
         except requests.exceptions.RequestException:
-            print(f"🚨 {instance_url} failed health check!", flush=True)
+            logger.warning("🚨 %s failed health check!", instance_url)
             return False
 
     def is_container_overloaded(self, container_name):
@@ -67,22 +149,114 @@ class HealthChecker:
 
         # Skip CPU/Memory check if container is missing or stopped
         if cpu_usage is None or memory_usage is None:
-            print(f"⚠️ Skipping CPU/Memory check for {container_name}.", flush=True)
+            logger.warning("⚠️ Skipping CPU/Memory check for %s.", container_name)
             return False  # Consider it NOT overloaded
 
-        print(f"🖥️ {container_name} → CPU: {cpu_usage}%, Memory: {memory_usage}%", flush=True)
+        logger.debug("🖥️ %s → CPU: %s%%, Memory: %s%%", container_name, cpu_usage, memory_usage)
 
         return cpu_usage > settings.CPU_THRESHOLD or memory_usage > settings.MEMORY_THRESHOLD  # ❌ Mark as failed if overloaded
 
+    def update_instance_weights(self):
+        """ Turns CPU & Memory headroom of healthy instances into routing weights """
+        healthy = [url for url in self.instances if url not in self.failed_instances]
+        weights = dict(zip(healthy, self.probe_executor.map(self.get_instance_weight, healthy)))
+
+        self.instance_weights = weights  # Swap the whole dict so readers never see a partial update
+        logger.debug("⚖️ Instance weights: %s", weights)
+
+    def get_instance_weight(self, instance_url):
+        """ Label weight scaled by CPU & Memory headroom (runs on the probe pool) """
+        container_name = self.get_container_name(instance_url)
+        return self.get_static_weight(container_name) * self.get_headroom(container_name)
+
+    def get_static_weight(self, container_name):
+        """ Reads the per-container weight from its Docker label (defaults to 1, 0 drains the instance) """
+        if container_name not in self.static_weights:
+            label = self.docker_adapter.get_container_labels(container_name).get(settings.WEIGHT_LABEL)
+            try:
+                weight = float(label) if label is not None else 1.0
+            except ValueError:
+                logger.warning("⚠️ Invalid %s label '%s' on %s. Using 1.", settings.WEIGHT_LABEL, label, container_name)
+                weight = 1.0
+            self.static_weights[container_name] = max(weight, 0.0)
+        return self.static_weights[container_name]
+
+    def get_headroom(self, container_name):
+        """ Fraction of the CPU/Memory budget still free, floored so no instance is starved """
+        cpu_usage = self.system_monitor.get_cpu_usage(container_name)
+        memory_usage = self.system_monitor.get_memory_usage(container_name)
+
+        headroom = 1.0
+        if cpu_usage is not None:
+            headroom = min(headroom, 1 - cpu_usage / settings.CPU_THRESHOLD)
+        if memory_usage is not None:
+            headroom = min(headroom, 1 - memory_usage / settings.MEMORY_THRESHOLD)
+
+        return max(headroom, settings.MIN_WEIGHT_FACTOR)
+
+    def record_result(self, instance_url, elapsed, success):
+        """ Feeds one proxied response to the outlier detector (request path) """
+        if self.outlier_detector is None:
+            return
+        if not success and self.circuit_breakers is not None and self.circuit_breakers.failed_fast():
+            return  # The open circuit already took this instance out; a fail-fast is not a new failure
+        if self.outlier_detector.record(instance_url, elapsed, success, len(self.instances)):
+            self.eject(instance_url)
+
+    def eject_outliers(self):
+        """ Ejects success-rate and latency outliers found since the last sweep """
+        if self.outlier_detector is None:
+            return
+        for instance_url in self.outlier_detector.analyze(self.get_healthy_instances(), len(self.instances)):
+            self.eject(instance_url)
+
+    def eject(self, instance_url):
+        """ Takes an outlier out of rotation; it is probed again once its ejection time is over """
+        metrics.EJECTIONS.inc(instance_url)
+        self.failed_instances.add(instance_url)
+        self.publish_routing_table()
+
+    def is_ejected(self, instance_url):
+        return self.outlier_detector is not None and self.outlier_detector.is_ejected(instance_url)
+
     def mark_failed(self, instance_url):
         """ Adds instance to the failed list (Used when request fails) """
-        print(f"❌ Marking {instance_url} as failed due to request failure!", flush=True)
+        logger.error("❌ Marking %s as failed due to request failure!", instance_url)
         self.failed_instances.add(instance_url)
+        if instance_url in self.routing_table.instances:
+            self.publish_routing_table()
+
+    @staticmethod
+    def get_container_name(instance_url):
+        """ Extracts the container name from an instance URL """
+        return instance_url.replace("http://", "").split(":")[0]
+
+    def publish_routing_table(self):
+        """ Publishes a new immutable snapshot of the healthy instances """
+        with self.publish_lock:
+            instances = tuple(
+                inst for inst in self.instances
+                if inst not in self.failed_instances and not self.is_circuit_open(inst)
+            )
+            if instances != self.routing_table.instances:
+                self.routing_table = RoutingTable(self.routing_table.version + 1, instances)
+                for listener in self.listeners:
+                    listener(self.routing_table)  # Under the lock, so listeners see tables in order
+
+    def add_listener(self, listener):
+        """ Registers a callback that receives the current routing table and every one published after it """
+        with self.publish_lock:
+            self.listeners.append(listener)
+            listener(self.routing_table)
+
+    def is_circuit_open(self, instance_url):
+        return self.circuit_breakers is not None and self.circuit_breakers.is_open(instance_url)
 
     def get_healthy_instances(self):
-        """Returns only healthy instances for proxy selection"""
-        return [inst for inst in self.instances if inst not in self.failed_instances]
-    
+        """Returns only healthy instances for proxy selection (the current snapshot, no copy)"""
+        return self.routing_table.instances
+
     def stop(self):
         """ Gracefully stop the health checker """
         self.running = False
+        self.probe_executor.shutdown(wait=False, cancel_futures=True)
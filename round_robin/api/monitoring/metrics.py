@@ -0,0 +1,276 @@
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Registry:
+    """
+    Holds every metric of the process and renders them in Prometheus text format
+    - With a metrics directory, each worker writes its snapshot to `metrics-<pid>.json` and a scrape
+      of any worker merges all of them (counters and histograms are summed; gauges of dead workers are dropped).
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        """ {name: [[labels, value], ...]} for this process """
+        return {name: metric.collect() for name, metric in self.metrics.items()}
+
+    def write(self, directory):
+        """ Atomically replaces this worker's snapshot file """
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        with open(path + ".tmp", "wb") as file:
+            file.write(json.dumps({"pid": os.getpid(), "metrics": self.snapshot()}).encode())
+        os.replace(path + ".tmp", path)
+
+    def read_others(self, directory):
+        """ Yields (alive, snapshot) for every other worker's file """
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path, "rb") as file:
+                    data = json.loads(file.read())
+            except (OSError, ValueError):
+                continue  # Being replaced right now; the next scrape picks it up
+            if data["pid"] != os.getpid():
+                yield is_alive(data["pid"]), data["metrics"]
+
+    def remove_dead(self, directory):
+        """ Drops snapshots left behind by workers of a previous run """
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            pid = os.path.basename(path)[len("metrics-"):-len(".json")]
+            if pid.isdigit() and not is_alive(int(pid)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def start_flushing(self, directory, interval):
+        """ Writes this worker's snapshot every `interval` seconds so other workers can serve it """
+        os.makedirs(directory, exist_ok=True)
+        self.remove_dead(directory)
+
+        def flush_loop():
+            while True:
+                try:
+                    self.write(directory)
+                except OSError as e:
+                    logger.warning("⚠️ Could not write metrics to %s: %s", directory, e)
+                time.sleep(interval)
+
+        threading.Thread(target=flush_loop, name="metrics-flush", daemon=True).start()
+
+    def render(self, directory=None):
+        """ Prometheus text exposition of this worker, merged with the others when `directory` is set """
+        snapshots = [(True, self.snapshot())]
+        if directory:
+            self.write(directory)
+            snapshots.extend(self.read_others(directory))
+
+        lines = []
+        for name, metric in self.metrics.items():
+            merged = {}
+            for alive, snapshot in snapshots:
+                if not alive and metric.type == "gauge":
+                    continue  # In-flight requests of a dead worker are gone
+                for labels, value in snapshot.get(name, ()):
+                    merged[tuple(labels)] = metric.merge(merged.get(tuple(labels)), value)
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, value in sorted(merged.items()):
+                lines.extend(metric.render(labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+def format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    """
+    Base for lock-free metrics
+    - Each thread writes to its own dict (labels -> value), so recording takes no lock.
+    - The per-thread dicts are summed only when the metrics are collected.
+    - Shards of threads that exited (circuit breaker timers, stats collectors) are folded into
+      `retired`, so short-lived threads do not pile up shards.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.local = threading.local()
+        self.shards = {}  # Thread -> its values
+        self.retired = {}  # Totals of threads that exited
+        self.shards_lock = threading.Lock()  # Taken when a thread creates its shard and on collect
+        registry.register(self)
+
+    def shard(self):
+        try:
+            return self.local.values
+        except AttributeError:
+            values = self.local.values = {}
+            with self.shards_lock:
+                self.retire_dead_shards()
+                self.shards[threading.current_thread()] = values
+            return values
+
+    def retire_dead_shards(self):
+        """ Folds the shards of exited threads into `retired` (caller holds shards_lock) """
+        for thread in [thread for thread in self.shards if not thread.is_alive()]:
+            for labels, value in self.shards.pop(thread).items():  # Its thread is gone, nothing writes to it anymore
+                self.retired[labels] = self.merge(self.retired.get(labels), value)
+
+    def collect(self):
+        with self.shards_lock:
+            self.retire_dead_shards()
+            merged = dict(self.retired)
+            shards = list(self.shards.values())
+        for shard in shards:
+            for labels, value in snapshot_items(shard):
+                merged[labels] = self.merge(merged.get(labels), value)
+        return [[list(labels), value] for labels, value in merged.items()]
+
+    @staticmethod
+    def merge(total, value):
+        return value if total is None else total + value
+
+    def render(self, labels, value):
+        return [f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"]
+
+
+def snapshot_items(shard):
+    """ Copies a shard another thread may be inserting into """
+    while True:
+        try:
+            return list(shard.items())
+        except RuntimeError:  # Dict changed size during iteration; try again
+            continue
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        values = self.shard()
+        values[labels] = values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """ Up/down gauge kept as per-thread deltas (e.g. in-flight requests) """
+
+    type = "gauge"
+
+    def inc(self, *labels, amount=1):
+        values = self.shard()
+        values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        values = self.shard()
+        values[labels] = values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    """ Fixed buckets; each thread keeps [count per bucket..., +Inf count, sum] per label set """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        values = self.shard()
+        cells = values.get(labels)
+        if cells is None:
+            cells = values[labels] = [0] * (len(self.buckets) + 2)
+        cells[bisect.bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    @staticmethod
+    def merge(total, value):
+        return list(value) if total is None else [a + b for a, b in zip(total, value)]
+
+    def render(self, labels, cells):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), cells):
+            cumulative += count
+            le = ("le", format_value(float(bound)))
+            lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} {cumulative}")
+        label_text = format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_text} {format_value(cells[-1])}")
+        lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+UPSTREAM_REQUESTS = Counter(
+    "lb_upstream_requests_total", "Requests sent to each backend by outcome.", ("backend", "outcome")
+)
+UPSTREAM_IN_FLIGHT = Gauge("lb_upstream_in_flight", "Requests currently waiting on each backend.", ("backend",))
+UPSTREAM_LATENCY = Histogram(
+    "lb_upstream_request_duration_seconds", "Upstream response time per backend.", ("backend",)
+)
+RETRIES = Counter("lb_retries_total", "Requests retried on another backend.")
+HEDGES = Counter("lb_hedged_requests_total", "Slow requests duplicated to a second backend.")
+EJECTIONS = Counter("lb_outlier_ejections_total", "Backends ejected by outlier detection.", ("backend",))
+CIRCUITS_OPENED = Counter("lb_circuit_opened_total", "Times a backend's circuit breaker opened.", ("backend",))
+HEALTH_SWEEP_DURATION = Histogram(
+    "lb_health_sweep_duration_seconds", "Duration of one health checker sweep.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DOCKER_API_DURATION = Histogram("lb_docker_api_duration_seconds", "Docker API call latency.", ("call",))
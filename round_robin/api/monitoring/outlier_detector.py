@@ -0,0 +1,137 @@
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InstanceWindow:
+    """ Outcomes of one instance since the last analysis """
+
+    __slots__ = ("successes", "failures", "consecutive_failures", "latencies")
+
+    def __init__(self, max_samples):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latencies = deque(maxlen=max_samples)
+
+    @property
+    def total(self):
+        return self.successes + self.failures
+
+
+class OutlierDetector:
+    """
+    Passive outlier detection fed by every proxied response
+    - Ejects an instance after OUTLIER_CONSECUTIVE_FAILURES failures in a row.
+    - On each health sweep, ejects instances whose success rate is far below the pool mean
+      or whose p99 latency is several times the peers' median p99.
+    - Ejections last OUTLIER_BASE_EJECTION_TIME x 2^(n-1) seconds (capped), so flapping
+      instances stay out longer each time; HealthChecker re-admits them after a passing probe.
+    - Never ejects more than OUTLIER_MAX_EJECTION_PERCENT of the pool (and never the last instance).
+    """
+
+    max_samples = 1000
+
+    def __init__(self):
+        self.consecutive_failures = settings.OUTLIER_CONSECUTIVE_FAILURES
+        self.base_ejection_time = settings.OUTLIER_BASE_EJECTION_TIME
+        self.max_ejection_time = settings.OUTLIER_MAX_EJECTION_TIME
+        self.max_ejection_percent = settings.OUTLIER_MAX_EJECTION_PERCENT
+        self.min_requests = settings.OUTLIER_MIN_REQUESTS
+        self.success_rate_stdev = settings.OUTLIER_SUCCESS_RATE_STDEV
+        self.latency_factor = settings.OUTLIER_LATENCY_FACTOR
+
+        self.windows = {}  # instance_url -> InstanceWindow
+        self.ejected_until = {}  # instance_url -> monotonic time the current ejection ends
+        self.ejection_counts = {}  # instance_url -> ejections in a row (drives the backoff)
+        self.lock = threading.Lock()
+
+    def record(self, instance_url, elapsed, success, pool_size):
+        """ Records one response; returns True if the instance must be ejected right away """
+        with self.lock:
+            window = self.windows.get(instance_url)
+            if window is None:
+                window = self.windows[instance_url] = InstanceWindow(self.max_samples)
+
+            window.latencies.append(elapsed)
+            if success:
+                window.successes += 1
+                window.consecutive_failures = 0
+                return False
+
+            window.failures += 1
+            window.consecutive_failures += 1
+            if window.consecutive_failures < self.consecutive_failures:
+                return False
+            window.consecutive_failures = 0
+            return self.eject(instance_url, pool_size)
+
+    def analyze(self, instances, pool_size=None):
+        """
+        Finds success-rate and latency outliers among `instances` and starts a new window
+        `pool_size` is the full instance count (healthy or not), the same one `record` caps ejections with.
+        """
+        pool_size = len(instances) if pool_size is None else pool_size
+        with self.lock:
+            windows, self.windows = self.windows, {}
+            windows = {url: windows[url] for url in instances if url in windows}
+            self.forget_old_ejections()
+
+            eligible = {url: window for url, window in windows.items() if window.total >= self.min_requests}
+            if len(eligible) < 2:
+                return []  # Outliers need peers to compare against
+
+            outliers = []
+            rates = {url: window.successes / window.total for url, window in eligible.items()}
+            mean = statistics.fmean(rates.values())
+            threshold = mean - self.success_rate_stdev * statistics.pstdev(rates.values())
+            outliers.extend(url for url, rate in rates.items() if rate < threshold)
+
+            p99s = {url: self.percentile(window.latencies, 0.99) for url, window in eligible.items()}
+            for url, p99 in p99s.items():
+                peers = [value for peer, value in p99s.items() if peer != url]
+                if p99 > self.latency_factor * statistics.median(peers) and url not in outliers:
+                    outliers.append(url)
+
+            return [url for url in outliers if self.eject(url, pool_size)]
+
+    def eject(self, instance_url, pool_size):
+        """ Starts an ejection unless the pool-share cap is reached (caller holds the lock) """
+        now = time.monotonic()
+        if self.ejected_until.get(instance_url, 0) > now:
+            return False  # Already ejected
+
+        currently_ejected = sum(1 for until in self.ejected_until.values() if until > now)
+        allowed = min(max(1, int(pool_size * self.max_ejection_percent / 100)), pool_size - 1)
+        if currently_ejected >= allowed:
+            logger.warning("⚠️ Not ejecting %s: %s/%s instances already ejected.", instance_url, currently_ejected, pool_size)
+            return False
+
+        count = self.ejection_counts.get(instance_url, 0) + 1
+        duration = min(self.base_ejection_time * 2 ** (count - 1), self.max_ejection_time)
+        self.ejection_counts[instance_url] = count
+        self.ejected_until[instance_url] = now + duration
+        logger.warning("⛔ Ejecting outlier %s for %ss (ejection #%s).", instance_url, duration, count)
+        return True
+
+    def forget_old_ejections(self):
+        """ Resets the backoff of instances that stayed in the pool for a full max ejection time """
+        now = time.monotonic()
+        for url, until in list(self.ejected_until.items()):
+            if now - until > self.max_ejection_time:
+                self.ejection_counts.pop(url, None)
+                del self.ejected_until[url]
+
+    def is_ejected(self, instance_url):
+        """ True while the instance is still serving its ejection time """
+        return self.ejected_until.get(instance_url, 0) > time.monotonic()
+
+    @staticmethod
+    def percentile(samples, fraction):
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
@@ -0,0 +1,14 @@
+from typing import NamedTuple, Tuple
+
+
+class RoutingTable(NamedTuple):
+    """
+    Immutable snapshot of the instances that may receive traffic.
+    Published by HealthChecker whenever the healthy set changes; readers just load the attribute.
+    """
+
+    version: int
+    instances: Tuple[str, ...]
+
+
+EMPTY_ROUTING_TABLE = RoutingTable(version=0, instances=())
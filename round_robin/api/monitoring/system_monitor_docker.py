@@ -1,32 +1,104 @@
+import logging
+import threading
+import time
+from typing import NamedTuple, Optional
+
 import docker
+import requests
+from django.conf import settings
+from .metrics import DOCKER_API_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+class ContainerStats(NamedTuple):
+    """CPU and Memory usage computed from one Docker stats sample"""
+
+    cpu_usage: Optional[float]
+    memory_usage: Optional[float]
+    timestamp: float
 
 
 class DockerSystemMonitor:
-    """Monitors CPU and Memory usage of Docker containers"""
+    """
+    Monitors CPU and Memory usage of Docker containers
+    - Watched containers get a background collector that consumes `stats(stream=True)`
+      and caches CPU and Memory from the same sample.
+    - Readers get the cached reading without locks or Docker calls; they fall back to a
+      one-shot stats call when no fresh reading exists.
+    """
 
     def __init__(self):
         self.client = docker.from_env()
+        self.readings = {}  # container_name -> ContainerStats (each entry is replaced, never mutated)
+        self.watched = frozenset()
+        self.collectors = {}  # container_name -> collector thread
+        self.lock = threading.Lock()  # Guards starting/stopping collectors only
+
+    def watch(self, container_names):
+        """Keeps one streaming collector per watched container and stops the others"""
+        if not settings.DOCKER_STATS_STREAMING:
+            return
+
+        with self.lock:
+            self.watched = frozenset(container_names)
+            for container_name in self.watched:
+                collector = self.collectors.get(container_name)
+                if collector is None or not collector.is_alive():
+                    collector = threading.Thread(
+                        target=self.collect, args=(container_name,), name=f"stats-{container_name}", daemon=True
+                    )
+                    self.collectors[container_name] = collector
+                    collector.start()
+
+    def collect(self, container_name):
+        """Consumes the stats stream of one container until it stops or is unwatched"""
+        try:
+            stream = self.client.containers.get(container_name).stats(stream=True, decode=True)
+            for stats in stream:
+                if container_name not in self.watched:
+                    break
+                if not stats.get("precpu_stats", {}).get("system_cpu_usage"):
+                    continue  # The first sample has no previous CPU reading to diff against
+                self.readings[container_name] = ContainerStats(
+                    self.calculate_cpu_usage(stats), self.calculate_memory_usage(stats), time.monotonic()
+                )
+        except (docker.errors.DockerException, requests.exceptions.RequestException) as e:
+            logger.warning("⚠️ Stats stream for %s stopped: %s", container_name, e)
+        finally:
+            self.readings.pop(container_name, None)
+            with self.lock:
+                if self.collectors.get(container_name) is threading.current_thread():
+                    del self.collectors[container_name]
+
+    def get_reading(self, container_name):
+        """Returns the cached reading if it is fresh enough, otherwise None"""
+        reading = self.readings.get(container_name)
+        if reading is not None and time.monotonic() - reading.timestamp <= settings.DOCKER_STATS_MAX_AGE:
+            return reading
+        return None
 
     def get_cpu_usage(self, container_name):
         """Returns CPU usage percentage using Docker stats"""
+        reading = self.get_reading(container_name)
+        if reading is not None:
+            return reading.cpu_usage
+
         try:
-            container = self.client.containers.get(container_name)
+            with DOCKER_API_DURATION.time("containers.get"):
+                container = self.client.containers.get(container_name)
 
             # If the container is NOT running, don't check CPU usage
             if container.status != "running":
-                print(
-                    f"🚨 {container_name} is not running. Skipping CPU check.",
-                    flush=True,
-                )
+                logger.warning("🚨 %s is not running. Skipping CPU check.", container_name)
                 return None
-            stats = container.stats(stream=False)
+            with DOCKER_API_DURATION.time("stats"):
+                stats = container.stats(stream=False)
             return (
                 self.calculate_cpu_usage(stats) if stats else None
             )  # If stats missing, return None
         except docker.errors.NotFound:
-            print(
-                f"🚨 {container_name} does not exist. Skipping CPU check.", flush=True
-            )
+            logger.warning("🚨 %s does not exist. Skipping CPU check.", container_name)
             return None
         except docker.errors.APIError:
             return None
@@ -47,40 +119,44 @@ class DockerSystemMonitor:
             else:
                 return None
         except KeyError as e:
-            print(f"⚠️ Missing CPU stat {e}, skipping CPU check.", flush=True)
+            logger.warning("⚠️ Missing CPU stat %s, skipping CPU check.", e)
             return None
 
+    def calculate_memory_usage(self, stats):
+        """Calculates Memory usage percentage from Docker stats"""
+        if (
+            "memory_stats" in stats
+            and "usage" in stats["memory_stats"]
+            and "limit" in stats["memory_stats"]
+        ):
+            mem_usage = stats["memory_stats"]["usage"]
+            mem_limit = stats["memory_stats"]["limit"]
+            return (
+                round((mem_usage / mem_limit) * 100, 2) if mem_limit > 0 else None
+            )
+
+        return None
+
     def get_memory_usage(self, container_name):
         """Returns Memory usage percentage using Docker stats"""
+        reading = self.get_reading(container_name)
+        if reading is not None:
+            return reading.memory_usage
+
         try:
-            container = self.client.containers.get(container_name)
+            with DOCKER_API_DURATION.time("containers.get"):
+                container = self.client.containers.get(container_name)
 
             # If the container is NOT running, don't check Memory usage
             if container.status != "running":
-                print(
-                    f"🚨 {container_name} is not running. Skipping Memory check.",
-                    flush=True,
-                )
+                logger.warning("🚨 %s is not running. Skipping Memory check.", container_name)
                 return None
-            stats = container.stats(stream=False)
-
-            if (
-                "memory_stats" in stats
-                and "usage" in stats["memory_stats"]
-                and "limit" in stats["memory_stats"]
-            ):
-                mem_usage = stats["memory_stats"]["usage"]
-                mem_limit = stats["memory_stats"]["limit"]
-                return (
-                    round((mem_usage / mem_limit) * 100, 2) if mem_limit > 0 else None
-                )
+            with DOCKER_API_DURATION.time("stats"):
+                stats = container.stats(stream=False)
 
-            return None
+            return self.calculate_memory_usage(stats)
         except docker.errors.NotFound:
-            print(
-                f"🚨 {container_name} does not exist. Skipping Memory check.",
-                flush=True,
-            )
+            logger.warning("🚨 %s does not exist. Skipping Memory check.", container_name)
             return None
         except docker.errors.APIError:
             return None
@@ -0,0 +1,139 @@
+import bisect
+import contextvars
+import hashlib
+import math
+import random
+import threading
+from typing import FrozenSet, NamedTuple, Optional, Sequence, Tuple
+from django.conf import settings
+from api.proxies.proxy import Proxy
+
+
+def ring_hash(value):
+    """ 64-bit position on the hash ring """
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing(NamedTuple):
+    """ Immutable ring snapshot; replaced as a whole so lookups never see a half-built ring """
+
+    source: Optional[Sequence[str]]  # Healthy-instance snapshot the ring was built from
+    members: FrozenSet[str]
+    hashes: Tuple[int, ...]  # Sorted virtual node positions
+    instances: Tuple[str, ...]  # Instance owning the virtual node at the same index
+
+
+EMPTY_RING = HashRing(source=None, members=frozenset(), hashes=(), instances=())
+
+
+class ConsistentHashProxy(Proxy):
+    """
+    Async Consistent Hash Proxy with bounded loads
+    - Routes requests with the same key (request field or header) to the same instance.
+    - Each instance owns several virtual nodes on the ring; when instances join or leave,
+      only their own virtual nodes change, so only ~1/N of the keys move.
+    - An instance never takes more than (1 + HASH_LOAD_FACTOR) x the average in-flight load,
+      so a hot key spills over to the next instance on the ring.
+    - The ring is rebuilt when the health checker publishes a routing table; lookups only read it.
+    """
+
+    def __init__(self, instance_manager, http_client, health_checker, system_monitor):
+        super().__init__(instance_manager, http_client, health_checker, system_monitor)
+        self.key_field = settings.HASH_KEY_FIELD
+        self.key_header = settings.HASH_KEY_HEADER
+        self.virtual_nodes = settings.HASH_VIRTUAL_NODES
+        self.load_factor = settings.HASH_LOAD_FACTOR
+
+        self.ring = EMPTY_RING  # Replaced, never mutated, so lookups need no lock
+        self.in_flight = {}  # instance_url -> number of outstanding requests
+        self.lock = threading.Lock()  # Serializes ring rebuilds only
+        self.current_key = contextvars.ContextVar("hash_key", default=None)
+        health_checker.add_listener(self.on_routing_table)
+
+    def on_routing_table(self, routing_table):
+        """ Rebuilds the ring for a newly published routing table (health checker thread) """
+        self.update_ring(routing_table.instances)
+
+    async def forward_request(self, data, headers=None):
+        """ Remembers the request's hash key for every retry of this request """
+        token = self.current_key.set(self.get_hash_key(data, headers))
+        try:
+            return await super().forward_request(data, headers=headers)
+        finally:
+            self.current_key.reset(token)
+
+    async def forward_raw(self, content, headers=None, data=None):
+        """ Same affinity in pass-through mode (from the header, or the body when it was parsed) """
+        token = self.current_key.set(self.get_hash_key(data, headers))
+        try:
+            return await super().forward_raw(content, headers=headers, data=data)
+        finally:
+            self.current_key.reset(token)
+
+    def get_hash_key(self, data, headers=None):
+        """ Reads the affinity key from the configured header, then from the request body """
+        if self.key_header and headers:
+            value = headers.get(self.key_header)
+            if value:
+                return str(value)
+        if isinstance(data, dict) and data.get(self.key_field) is not None:
+            return str(data[self.key_field])
+        return None
+
+    def update_ring(self, healthy_instances):
+        """
+        Builds and publishes the ring for `healthy_instances`
+        - Only the virtual nodes of instances that joined or left are added or removed.
+        - The new ring is built aside and published with a single assignment.
+        """
+        with self.lock:
+            ring = self.ring
+            members = frozenset(healthy_instances)
+            if members == ring.members:
+                nodes = None
+            else:
+                nodes = [(h, inst) for h, inst in zip(ring.hashes, ring.instances) if inst in members]
+                for instance in members - ring.members:
+                    nodes.extend((ring_hash(f"{instance}#{replica}"), instance) for replica in range(self.virtual_nodes))
+                nodes.sort()
+            ring = self.ring = HashRing(
+                source=healthy_instances,
+                members=members,
+                hashes=ring.hashes if nodes is None else tuple(h for h, _ in nodes),
+                instances=ring.instances if nodes is None else tuple(inst for _, inst in nodes),
+            )
+        return ring
+
+    def select_instance(self, healthy_instances, tried, key=None):
+        """ Walks the ring clockwise from the key and takes the first instance under its load bound """
+        ring = self.ring  # One snapshot for the whole lookup
+        if not ring.hashes:
+            # No routing table published to this proxy yet
+            return next((instance for instance in healthy_instances if instance not in tried), healthy_instances[0])
+        key = key if key is not None else self.current_key.get()
+
+        ring_size = len(ring.hashes)
+        start = bisect.bisect(ring.hashes, ring_hash(key)) if key is not None else random.randrange(ring_size)
+        total_load = sum(self.in_flight.values()) + 1  # Include the request being placed
+        capacity = math.ceil(total_load * (1 + self.load_factor) / len(ring.members))
+
+        fallback = None
+        for step in range(ring_size):
+            instance = ring.instances[(start + step) % ring_size]
+            if instance in tried:
+                continue
+            if self.in_flight.get(instance, 0) < capacity:
+                return instance
+            fallback = fallback or instance
+
+        return fallback or ring.instances[start % ring_size]
+
+    def on_request_start(self, instance_url):
+        self.in_flight[instance_url] = self.in_flight.get(instance_url, 0) + 1
+
+    def on_request_end(self, instance_url, elapsed, response):
+        remaining = self.in_flight.get(instance_url, 0) - 1
+        if remaining > 0:
+            self.in_flight[instance_url] = remaining
+        else:
+            self.in_flight.pop(instance_url, None)
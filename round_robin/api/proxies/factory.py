@@ -1,30 +1,62 @@
+import logging
 from django.conf import settings
 from .round_robin import RoundRobinProxy
+from .least_connections import LeastConnectionsProxy
+from .peak_ewma import PeakEwmaProxy
+from .weighted_round_robin import WeightedRoundRobinProxy
+from .consistent_hash import ConsistentHashProxy
 from .instance_manager import InstanceManager
 from ..monitoring.health_checker import HealthChecker
+from ..monitoring.outlier_detector import OutlierDetector
 from ..monitoring.system_monitor_docker import DockerSystemMonitor
 from ..adapters.httpx_adapter import HttpxAdapter
+from ..adapters.circuit_breaker_adapter import CircuitBreakerAdapter
+
+logger = logging.getLogger(__name__)
+
+# PROXY_STRATEGY value -> proxy class
+STRATEGIES = {
+    "round_robin": RoundRobinProxy,
+    "least_connections": LeastConnectionsProxy,
+    "peak_ewma": PeakEwmaProxy,
+    "weighted_round_robin": WeightedRoundRobinProxy,
+    "consistent_hash": ConsistentHashProxy,
+}
 
 class ProxyFactory:
     """ Factory to create different proxy strategies with dependency injection """
 
     @staticmethod
-    def create_round_robin_proxy():
-        """ Creates a Round Robin Proxy with all dependencies injected """
+    def create_dependencies(collect_weights=False):
+        """ Builds the dependencies shared by every proxy strategy """
         instance_manager = InstanceManager()
+        if settings.DISCOVERY_EVENTS:
+            instance_manager.start_watching()
         http_adapter = HttpxAdapter()
+        circuit_breakers = CircuitBreakerAdapter(http_adapter) if settings.CIRCUIT_BREAKER else None
         system_monitor = DockerSystemMonitor()
-        health_checker = HealthChecker(instance_manager, system_monitor)
+        outlier_detector = OutlierDetector() if settings.OUTLIER_DETECTION else None
+        health_checker = HealthChecker(
+            instance_manager,
+            system_monitor,
+            collect_weights=collect_weights,
+            outlier_detector=outlier_detector,
+            circuit_breakers=circuit_breakers,
+        )
+
+        if circuit_breakers is not None:
+            circuit_breakers.on_state_change = health_checker.publish_routing_table
+            http_adapter = circuit_breakers
 
-        return RoundRobinProxy(instance_manager, http_adapter, health_checker, system_monitor)
+        return instance_manager, http_adapter, health_checker, system_monitor
 
     @staticmethod
     def get_proxy():
         """ Selects proxy strategy and injects dependencies """
         strategy = settings.PROXY_STRATEGY
-        print(f"🔹 Selected Proxy Strategy: {strategy}")
+        logger.info("🔹 Selected Proxy Strategy: %s", strategy)
 
-        if strategy == "round_robin":
-            return ProxyFactory.create_round_robin_proxy()
-        else:
+        proxy_class = STRATEGIES.get(strategy)
+        if proxy_class is None:
             raise ValueError("❌ Invalid Proxy Strategy in .env")
+        return proxy_class(*ProxyFactory.create_dependencies(collect_weights=proxy_class.collect_weights))
@@ -0,0 +1,60 @@
+from collections import deque
+from django.conf import settings
+
+
+class HedgingPolicy:
+    """
+    Decides when a request may be hedged (duplicated to a second instance)
+    - Hedge delay: the HEDGE_PERCENTILE of recent successful upstream latencies,
+      recomputed every `refresh_every` samples so the request path never sorts.
+    - Budget: every eligible request earns HEDGE_BUDGET_PERCENT credits and every hedge
+      spends 100, so extra load stays below that share of traffic.
+    - Only idempotent requests are hedged: ones carrying HEDGE_IDEMPOTENCY_HEADER,
+      or all of them when HEDGE_ALL_REQUESTS is set.
+    """
+
+    min_samples = 20
+    refresh_every = 50
+    hedge_cost = 100.0
+    max_tokens = 1000.0  # Burst allowance of ten hedges
+
+    def __init__(self):
+        self.percentile = settings.HEDGE_PERCENTILE
+        self.budget_percent = settings.HEDGE_BUDGET_PERCENT
+        self.min_delay = settings.HEDGE_MIN_DELAY
+        self.idempotency_header = settings.HEDGE_IDEMPOTENCY_HEADER
+        self.all_requests = settings.HEDGE_ALL_REQUESTS
+
+        self.samples = deque(maxlen=1000)
+        self.recorded = 0
+        self.current_delay = None  # None until enough samples were seen
+        self.tokens = 0.0
+
+    def is_idempotent(self, headers):
+        if self.all_requests:
+            return True
+        return bool(headers and self.idempotency_header and headers.get(self.idempotency_header))
+
+    def record(self, elapsed):
+        """ Adds a successful upstream latency sample """
+        self.samples.append(elapsed)
+        self.recorded += 1
+        if self.recorded % self.refresh_every == 0 or (self.current_delay is None and len(self.samples) >= self.min_samples):
+            ordered = sorted(self.samples)
+            index = min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)
+            self.current_delay = max(ordered[index], self.min_delay)
+
+    def delay(self):
+        """ Seconds to wait for the first response before hedging, or None if hedging is not possible yet """
+        return self.current_delay
+
+    def earn(self):
+        """ Credits the budget for one eligible request """
+        self.tokens = min(self.tokens + self.budget_percent, self.max_tokens)
+
+    def try_spend(self):
+        """ Takes one hedge from the budget if available """
+        if self.tokens >= self.hedge_cost:
+            self.tokens -= self.hedge_cost
+            return True
+        return False
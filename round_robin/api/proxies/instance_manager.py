@@ -1,15 +1,127 @@
+import logging
+import threading
+import time
+import docker
+import requests
+from django.conf import settings
 from ..adapters.docker_adapter import DockerAdapter
 
+logger = logging.getLogger(__name__)
+
 
 class InstanceManager:
-    """Manages Application API instances dynamically from Docker"""
+    """
+    Manages Application API instances dynamically from Docker
+    - When watching, instances are kept up to date from the Docker events stream
+      (start / stop / die / health_status) and listeners are notified right away.
+    - A periodic full resync corrects anything the event stream missed.
+    """
+
+    prefix = "app"
 
     def __init__(self):
         self.docker_adapter = DockerAdapter()
+        self.label = settings.DISCOVERY_LABEL
+        self.instances = None  # instance_url -> None (ordered set), only maintained while watching
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.watching = False
 
     def get_instances(self):
-        """Fetches all running instances from Docker"""
+        """Fetches all running instances from Docker (from the event-driven cache while watching)"""
+        instances = self.instances
+        if instances is not None:
+            return list(instances)
+        return self.fetch_instances()
+
+    def fetch_instances(self):
+        """Lists running instances with a full Docker API call"""
         return [
-            f"http://{container}:8000/api/process/"
-            for container in self.docker_adapter.get_running_containers()
+            self.get_instance_url(container)
+            for container in self.docker_adapter.get_running_containers(prefix=self.prefix, label=self.label)
         ]
+
+    @staticmethod
+    def get_instance_url(container_name):
+        return f"http://{container_name}:8000/api/process/"
+
+    def add_listener(self, listener):
+        """Registers a callback that receives the instance list whenever it changes"""
+        self.listeners.append(listener)
+
+    def start_watching(self):
+        """Starts the Docker events consumer and the periodic resync"""
+        if self.watching:
+            return
+        self.watching = True
+        self.resync()
+        threading.Thread(target=self.watch_events, name="docker-events", daemon=True).start()
+        threading.Thread(target=self.resync_loop, name="docker-resync", daemon=True).start()
+        logger.info("📡 Watching Docker events for instance changes!")
+
+    def stop_watching(self):
+        self.watching = False
+
+    def watch_events(self):
+        """Applies container events as they arrive and reconnects if the stream drops"""
+        while self.watching:
+            try:
+                for event in self.docker_adapter.get_container_events(label=self.label):
+                    if not self.watching:
+                        return
+                    self.handle_event(event)
+            except (docker.errors.DockerException, requests.exceptions.RequestException) as e:
+                logger.warning("⚠️ Docker events stream failed: %s. Reconnecting...", e)
+            time.sleep(1)
+            self.resync()  # Catch up on anything missed while disconnected
+
+    def handle_event(self, event):
+        """Adds or removes one instance based on a container event"""
+        container_name = event.get("Actor", {}).get("Attributes", {}).get("name", "")
+        if not self.label and self.prefix not in container_name:
+            return
+
+        action = event.get("Action") or event.get("status", "")
+        instance_url = self.get_instance_url(container_name)
+
+        if action == "start" or action == "health_status: healthy":
+            self.update(add=instance_url)
+        elif action in ("stop", "die") or action == "health_status: unhealthy":
+            self.update(remove=instance_url)
+
+    def update(self, add=None, remove=None):
+        """Changes the cached instances incrementally and notifies listeners if anything changed"""
+        with self.lock:
+            instances = dict(self.instances or {})
+            if add:
+                instances[add] = None
+            if remove:
+                instances.pop(remove, None)
+            if instances == self.instances:
+                return
+            self.instances = instances
+        logger.info("📡 Instances changed: %s", list(instances))
+        self.notify(list(instances))
+
+    def resync_loop(self):
+        while self.watching:
+            time.sleep(settings.DISCOVERY_RESYNC_INTERVAL)
+            self.resync()
+
+    def resync(self):
+        """Replaces the cache with a full listing (safety net for missed events)"""
+        try:
+            instances = dict.fromkeys(self.fetch_instances())
+        except (docker.errors.DockerException, requests.exceptions.RequestException) as e:
+            logger.warning("⚠️ Instance resync failed: %s", e)
+            return
+
+        with self.lock:
+            if instances == self.instances:
+                return
+            self.instances = instances
+        self.notify(list(instances))
+
+    def notify(self, instances):
+        for listener in self.listeners:
+            listener(instances)
@@ -0,0 +1,33 @@
+import random
+from api.proxies.proxy import Proxy
+
+
+class LeastConnectionsProxy(Proxy):
+    """
+    Async Least Outstanding Requests Proxy
+    - Tracks in-flight requests per instance.
+    - Sends each request to the healthy instance with the fewest in-flight requests,
+      breaking ties at random so idle instances share traffic fairly.
+    """
+
+    def __init__(self, instance_manager, http_client, health_checker, system_monitor):
+        super().__init__(instance_manager, http_client, health_checker, system_monitor)
+        self.in_flight = {}  # instance_url -> number of outstanding requests
+
+    def select_instance(self, healthy_instances, tried):
+        """ Picks the least-loaded instance that has not been tried yet """
+        candidates = [instance for instance in healthy_instances if instance not in tried] or healthy_instances
+
+        fewest = min(self.in_flight.get(instance, 0) for instance in candidates)
+        least_loaded = [instance for instance in candidates if self.in_flight.get(instance, 0) == fewest]
+        return random.choice(least_loaded)
+
+    def on_request_start(self, instance_url):
+        self.in_flight[instance_url] = self.in_flight.get(instance_url, 0) + 1
+
+    def on_request_end(self, instance_url, elapsed, response):
+        remaining = self.in_flight.get(instance_url, 0) - 1
+        if remaining > 0:
+            self.in_flight[instance_url] = remaining
+        else:
+            self.in_flight.pop(instance_url, None)  # Keep the table as small as the active set
@@ -0,0 +1,105 @@
+import math
+import random
+import time
+from django.conf import settings
+from api.proxies.proxy import Proxy
+
+
+class LatencyStats:
+    """ Peak-sensitive EWMA of response time and outstanding requests for one instance """
+
+    __slots__ = ("ewma", "stamp", "outstanding")
+
+    def __init__(self):
+        self.ewma = 0.0
+        self.stamp = 0.0
+        self.outstanding = 0
+
+    def decayed(self, now, decay_time):
+        """ EWMA decayed towards zero for the time since the last sample """
+        if not self.ewma:
+            return 0.0
+        return self.ewma * math.exp(-max(now - self.stamp, 0.0) / decay_time)
+
+    def observe(self, rtt, now, decay_time):
+        """ Jumps to latency peaks immediately, otherwise blends the stored value towards `rtt` """
+        if rtt > self.ewma:
+            self.ewma = rtt
+        else:
+            weight = math.exp(-max(now - self.stamp, 0.0) / decay_time)
+            self.ewma = self.ewma * weight + rtt * (1 - weight)
+        self.stamp = now
+
+    def cost(self, now, decay_time, penalty):
+        """ Expected latency (seconds) scaled by the queue in front of the instance """
+        ewma = self.decayed(now, decay_time)
+        if not ewma:
+            # Unmeasured instances are tried first while idle; once busy, each queued request counts as `penalty` seconds
+            return penalty * self.outstanding
+        return ewma * (self.outstanding + 1)
+
+
+class PeakEwmaProxy(Proxy):
+    """
+    Async Peak-EWMA Proxy (power of two choices)
+    - Keeps a time-decayed, peak-sensitive EWMA of response time per instance.
+    - Penalizes instances by their outstanding requests.
+    - Samples two random healthy instances and picks the cheaper one, so selection is O(1).
+    - Forgets the stats of instances that leave the routing table once their requests have finished.
+    """
+
+    def __init__(self, instance_manager, http_client, health_checker, system_monitor, decay_time=None):
+        super().__init__(instance_manager, http_client, health_checker, system_monitor)
+        self.decay_time = decay_time or settings.EWMA_DECAY_TIME
+        self.failure_penalty = float(settings.REQUEST_TIMEOUT)  # Failed requests count as timeouts
+        self.stats = {}  # instance_url -> LatencyStats
+        health_checker.add_listener(self.on_routing_table)
+
+    def on_routing_table(self, routing_table):
+        """ Drops idle stats of instances that are no longer routed to (health checker thread) """
+        members = set(routing_table.instances)
+        for instance_url in list(self.stats):  # Copied first; the request path may add entries meanwhile
+            stats = self.stats.get(instance_url)
+            if instance_url not in members and stats is not None and not stats.outstanding:
+                self.stats.pop(instance_url, None)
+
+    def get_stats(self, instance_url):
+        stats = self.stats.get(instance_url)
+        if stats is None:
+            stats = self.stats[instance_url] = LatencyStats()
+        return stats
+
+    def select_instance(self, healthy_instances, tried):
+        """ Picks the cheaper of two randomly sampled instances """
+        total_servers = len(healthy_instances)
+        if total_servers == 1:
+            return healthy_instances[0]
+
+        first = random.randrange(total_servers)
+        second = random.randrange(total_servers - 1)
+        if second >= first:
+            second += 1  # Two distinct indexes without building a list
+        choices = [
+            instance for instance in (healthy_instances[first], healthy_instances[second])
+            if instance not in tried
+        ]
+
+        if not choices:
+            # Only reachable on retries: fall back to any instance not tried yet
+            choices = [next((instance for instance in healthy_instances if instance not in tried), healthy_instances[first])]
+
+        now = time.monotonic()
+        return min(choices, key=lambda instance: self.get_stats(instance).cost(now, self.decay_time, self.failure_penalty))
+
+    def on_request_start(self, instance_url):
+        self.get_stats(instance_url).outstanding += 1
+
+    def on_request_end(self, instance_url, elapsed, response):
+        stats = self.get_stats(instance_url)
+        stats.outstanding = max(stats.outstanding - 1, 0)
+        if elapsed is None:
+            return  # Cancelled (e.g. a hedging loser): no latency sample
+
+        failed = response is None or response.status_code >= 500
+        rtt = max(elapsed, self.failure_penalty) if failed else elapsed
+        stats.observe(rtt, time.monotonic(), self.decay_time)
@@ -1,12 +1,216 @@
+import asyncio
+import logging
+import time
 from abc import ABC, abstractmethod
+from django.conf import settings
+from .hedging import HedgingPolicy
+from ..monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def get_outcome(elapsed, response):
+    """ Metrics label for how a request ended """
+    if elapsed is None:
+        return "cancelled"
+    if response is None:
+        return "error"
+    return f"{response.status_code // 100}xx"
+
+
+class ProxyResponse(tuple):
+    """ (body, status) pair that also carries the upstream response headers """
+
+    def __new__(cls, body, status, headers=None):
+        result = super().__new__(cls, (body, status))
+        result.headers = headers if headers is not None else {}
+        return result
 
 
 class Proxy(ABC):
-    """Abstract Base Proxy Class"""
+    """
+    Abstract Base Proxy Class
+    - Owns the retry loop so strategies only decide which instance to try next.
+    - Strategies can hook into request start/end to track load or latency.
+    - Optionally hedges idempotent requests that take longer than the observed latency percentile.
+    """
+
+    collect_weights = False  # Weighted strategies make the health checker collect CPU/Memory weights
+
+    def __init__(self, instance_manager, http_client, health_checker, system_monitor):
+        """ Inject all dependencies instead of hardcoding them """
+        self.instance_manager = instance_manager
+        self.http_client = http_client
+        self.system_monitor = system_monitor
+        self.health_checker = health_checker
+        self.hedging = HedgingPolicy() if settings.HEDGING_ENABLED else None
 
     @abstractmethod
-    def forward_request(self, data):
-        """Must be implemented by subclasses"""
+    def select_instance(self, healthy_instances, tried):
+        """Returns the next instance to try, preferring ones not in `tried`"""
+        pass
+
+    async def forward_request(self, data, headers=None):
+        """ Retries with another server asynchronously if the current one fails """
+        healthy_instances = self.health_checker.get_healthy_instances()
+
+        if not healthy_instances:
+            logger.error("🚨 No healthy instances available. Returning error response.")
+            return self.generate_error_response()
+
+        total_servers = len(healthy_instances)
+        tried = set()
+        hedge = self.hedging is not None and total_servers > 1 and self.hedging.is_idempotent(headers)
+        if hedge:
+            self.hedging.earn()  # Once per client request, so retries do not grow the hedge budget
+
+        for attempt in range(total_servers):
+            if attempt:
+                metrics.RETRIES.inc()
+            instance_url = self.select_instance(healthy_instances, tried)
+            tried.add(instance_url)
+
+            if hedge:
+                result = await self.attempt_hedged(instance_url, data, healthy_instances, tried)
+            else:
+                result = await self.attempt(instance_url, data, total_servers)
+            if result:
+                return result  # Return response if successful
+
+            if len(tried) >= total_servers:
+                break  # Hedges may have used up the remaining instances
+
+        logger.error("❌ All retries failed. Returning error response.")
+        return self.generate_error_response()
+
+    async def forward_raw(self, content, headers=None, data=None):
+        """
+        Pass-through variant of forward_request: sends the raw bytes and returns the upstream
+        response with its body unread (the caller streams and closes it), or None if every instance failed.
+        `data` is the parsed body when the caller validated it (used by strategies that route on it).
+        """
+        healthy_instances = self.health_checker.get_healthy_instances()
+
+        if not healthy_instances:
+            logger.error("🚨 No healthy instances available. Returning error response.")
+            return None
+
+        total_servers = len(healthy_instances)
+        tried = set()
+
+        for attempt in range(total_servers):
+            if attempt:
+                metrics.RETRIES.inc()
+            instance_url = self.select_instance(healthy_instances, tried)
+            tried.add(instance_url)
+
+            response = await self.send(instance_url, content=content, headers=headers)
+            if response is None:
+                logger.error("❌ Request to %s failed (HTTP client returned None). Skipping to next instance.", instance_url)
+                continue
+
+            if response.status_code >= 500:
+                await response.aclose()
+                logger.warning("⚠️ %s failed with %s. Marking as failed & retrying.", instance_url, response.status_code)
+                self.health_checker.mark_failed(instance_url)
+                continue
+
+            return response  # Any other status is the upstream's answer and is passed through
+
+        logger.error("❌ All retries failed. Returning error response.")
+        return None
+
+    async def attempt(self, instance_url, data, total_servers=None):
+        """ Sends one request and returns the proxied result, or None to retry elsewhere """
+        response = await self.send(instance_url, data)
+
+        if response is None:
+            logger.error("❌ Request to %s failed (HTTP client returned None). Skipping to next instance.", instance_url)
+            return None  # Skip to the next server if response is None
+
+        # Process response separately
+        return self.handle_response(response, instance_url, total_servers)
+
+    async def attempt_hedged(self, instance_url, data, healthy_instances, tried):
+        """ Like attempt(), but duplicates the request to a second instance if the first is slow """
+        delay = self.hedging.delay()
+        if delay is None:
+            return await self.attempt(instance_url, data)
+
+        tasks = [asyncio.ensure_future(self.attempt(instance_url, data))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or len(tried) >= len(healthy_instances) or not self.hedging.try_spend():
+                return await tasks[0]
+
+            hedge_url = self.select_instance(healthy_instances, tried)
+            tried.add(hedge_url)
+            logger.info("🪞 %s slower than %.3fs. Hedging to %s.", instance_url, delay, hedge_url)
+            metrics.HEDGES.inc()
+            tasks.append(asyncio.ensure_future(self.attempt(hedge_url, data)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result:
+                        return result  # First successful response wins
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()  # The loser is cancelled (and not counted as a failure)
+
+    async def send(self, instance_url, data=None, content=None, headers=None):
+        """
+        Posts to one instance and reports the outcome to the strategy hooks and health checker.
+        With `content`, the raw bytes are streamed and timing stops at the response headers.
+        """
+        self.on_request_start(instance_url)
+        metrics.UPSTREAM_IN_FLIGHT.inc(instance_url)
+        started = time.monotonic()
+        response = None
+        elapsed = None
+        try:
+            if content is None:
+                response = await self.http_client.post(instance_url, json=data)
+            else:
+                response = await self.http_client.stream(instance_url, content, headers)
+            elapsed = time.monotonic() - started
+            return response
+        finally:
+            metrics.UPSTREAM_IN_FLIGHT.dec(instance_url)
+            self.on_request_end(instance_url, elapsed, response)
+            metrics.UPSTREAM_REQUESTS.inc(instance_url, get_outcome(elapsed, response))
+            if elapsed is not None:
+                metrics.UPSTREAM_LATENCY.observe(elapsed, instance_url)
+                success = response is not None and response.status_code < 500
+                self.health_checker.record_result(instance_url, elapsed, success)
+                if success and self.hedging is not None:
+                    self.hedging.record(elapsed)
+
+    def handle_response(self, response, instance_url, total_servers=None):
+        """ Handles HTTP response & determines next actions """
+
+        if response and response.status_code == 200:
+            return ProxyResponse(response.json(), 200, response.headers)
+
+        if response and response.status_code >= 500:
+            logger.warning("⚠️ %s failed with %s. Marking as failed & retrying.", instance_url, response.status_code)
+            self.health_checker.mark_failed(instance_url)
+
+        return None
+
+    def on_request_start(self, instance_url):
+        """Called before a request is sent to `instance_url`"""
+        pass
+
+    def on_request_end(self, instance_url, elapsed, response):
+        """
+        Called once a request to `instance_url` is over.
+        `response` is None on transport errors; `elapsed` is None if the request was cancelled.
+        """
         pass
 
     def generate_error_response(self):
@@ -18,3 +222,8 @@ class Proxy(ABC):
             "support_email": "support@example.com",
             "retry_after_seconds": 30,
         }, 503
+
+    async def aclose(self):
+        """Stops background health checks and releases pooled upstream connections"""
+        self.health_checker.stop()
+        await self.http_client.aclose()
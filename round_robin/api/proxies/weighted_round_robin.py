@@ -0,0 +1,48 @@
+import threading
+from api.proxies.proxy import Proxy
+
+
+class WeightedRoundRobinProxy(Proxy):
+    """
+    Async Smooth Weighted Round Robin Proxy (nginx algorithm)
+    - Weights come from HealthChecker.instance_weights, refreshed by the background health loop
+      from Docker label weights and CPU/Memory headroom.
+    - Spreads picks evenly instead of sending bursts to the heaviest instance.
+    - Instances with weight 0 are drained; if every candidate has weight 0 they share traffic equally.
+    """
+
+    collect_weights = True
+
+    def __init__(self, instance_manager, http_client, health_checker, system_monitor):
+        super().__init__(instance_manager, http_client, health_checker, system_monitor)
+        self.current_weights = {}  # instance_url -> smooth WRR running weight
+        self.lock = threading.Lock()
+
+    def select_instance(self, healthy_instances, tried):
+        """ Adds every weight to its running total, picks the largest and subtracts the total from it """
+        candidates = [instance for instance in healthy_instances if instance not in tried] or healthy_instances
+        weights = self.health_checker.instance_weights
+        weighted = [(instance, weights.get(instance, 1.0)) for instance in candidates]
+        weighted = [(instance, weight) for instance, weight in weighted if weight > 0]
+        if not weighted:
+            weighted = [(instance, 1.0) for instance in candidates]  # All drained: share equally rather than pin one
+
+        with self.lock:
+            if len(self.current_weights) > len(healthy_instances):
+                # Forget instances that left the pool
+                self.current_weights = {
+                    instance: self.current_weights[instance]
+                    for instance in healthy_instances if instance in self.current_weights
+                }
+
+            total_weight = 0.0
+            selected = None
+            for instance, weight in weighted:
+                current = self.current_weights.get(instance, 0.0) + weight
+                self.current_weights[instance] = current
+                total_weight += weight
+                if selected is None or current > self.current_weights[selected]:
+                    selected = instance
+
+            self.current_weights[selected] -= total_weight
+        return selected
@@ -0,0 +1,42 @@
+"""
+Generic Cell Rate Algorithm (GCRA)
+A limit of `limit` requests per `duration` becomes one token every `interval = duration / limit`
+seconds with a burst of `limit`. The only state per key is the theoretical arrival time (TAT).
+"""
+
+
+def acquire(tat, now, interval, burst, wanted=1):
+    """
+    Takes up to `wanted` tokens.
+    Returns (granted, new_tat, retry_after); retry_after is 0 unless nothing was granted.
+    """
+    tat = max(tat or now, now)
+    available = int((now + burst * interval - tat) // interval)
+    if available < 1:
+        return 0, tat, tat + interval - burst * interval - now
+
+    granted = min(wanted, available)
+    return granted, tat + granted * interval, 0
+
+
+# The same algorithm as one atomic Redis call. Uses the Redis clock so replicas never disagree on "now".
+# KEYS[1] = key, ARGV = interval (ms), burst, wanted -> {granted, retry_after (ms)}
+REDIS_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+
+local available = math.floor((now + burst * interval - tat) / interval)
+if available < 1 then
+  return {0, math.ceil(tat + interval - burst * interval - now)}
+end
+
+local granted = math.min(wanted, available)
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], string.format('%.3f', tat), 'PX', math.ceil(tat - now))
+return {granted, 0}
+"""
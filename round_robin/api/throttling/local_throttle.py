@@ -0,0 +1,86 @@
+import threading
+import time
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+from . import gcra
+
+
+class GcraTable:
+    """
+    Per-process GCRA state with O(1) memory per key (its theoretical arrival time)
+    - Keys are spread over independently locked shards, so concurrent requests rarely contend.
+    - A key whose TAT has passed is indistinguishable from a new one, so idle keys are evicted
+      without changing any decision. Each shard sweeps itself once it doubles in size.
+    """
+
+    min_sweep_size = 1024
+
+    def __init__(self, shards=None):
+        count = settings.THROTTLE_SHARDS if shards is None else shards
+        self.shards = [{} for _ in range(count)]
+        self.locks = [threading.Lock() for _ in range(count)]
+        self.sweep_at = [self.min_sweep_size] * count
+
+    def acquire(self, key, interval, burst, now):
+        """ Returns None if the request may proceed, otherwise the seconds to wait """
+        index = hash(key) % len(self.shards)
+        shard = self.shards[index]
+        with self.locks[index]:
+            granted, tat, retry_after = gcra.acquire(shard.get(key), now, interval, burst)
+            if not granted:
+                return retry_after
+
+            shard[key] = tat
+            if len(shard) >= self.sweep_at[index]:
+                self.sweep(index, now)
+            return None
+
+    def sweep(self, index, now):
+        """ Drops idle keys from one shard (caller holds its lock) """
+        shard = self.shards[index]
+        for key in [key for key, tat in shard.items() if tat <= now]:
+            del shard[key]
+        self.sweep_at[index] = max(self.min_sweep_size, 2 * len(shard))
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+
+class LocalRateThrottle(SimpleRateThrottle):
+    """
+    Drop-in replacement for DRF's SimpleRateThrottle
+    - Same rates, scopes, cache keys and Retry-After, but GCRA instead of a timestamp history per key.
+    - One table per process, shared by every throttle scope.
+    """
+
+    table = None  # Created on first use
+
+    @classmethod
+    def get_table(cls):
+        if LocalRateThrottle.table is None:
+            LocalRateThrottle.table = GcraTable()
+        return LocalRateThrottle.table
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = self.duration / self.num_requests
+        self.wait_time = self.get_table().acquire(self.key, interval, self.num_requests, time.monotonic())
+        return self.wait_time is None
+
+    def wait(self):
+        return self.wait_time
+
+
+class LocalAnonRateThrottle(LocalRateThrottle, AnonRateThrottle):
+    """ AnonRateThrottle (per client IP) on the GCRA table """
+
+
+class LocalUserRateThrottle(LocalRateThrottle, UserRateThrottle):
+    """ UserRateThrottle (per user, IP for anonymous requests) on the GCRA table """
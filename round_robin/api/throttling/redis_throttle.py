@@ -0,0 +1,124 @@
+import logging
+import time
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+from ..adapters.redis_adapter import RedisAdapter
+from .gcra import REDIS_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+
+class Lease:
+    """ Tokens this process took from Redis ahead of time for one throttle key """
+
+    __slots__ = ("tokens", "expires_at", "blocked_until")
+
+    def __init__(self, tokens=0, expires_at=0.0, blocked_until=0.0):
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.blocked_until = blocked_until
+
+
+class RedisRateLimiter:
+    """
+    Cluster-wide GCRA limiter
+    - One atomic script call per Redis round trip, shared by every worker and replica.
+    - Each call leases up to THROTTLE_BATCH_SIZE tokens, handed out locally until used or expired.
+      Unused tokens simply lapse, so the cluster-wide limit is never exceeded.
+    - Rejections are remembered locally until their Retry-After, so blocked clients cost no Redis traffic.
+    - Fails open: if Redis errors or is slower than REDIS_TIMEOUT, requests are allowed and
+      Redis is skipped for THROTTLE_FAIL_OPEN_BACKOFF seconds.
+    """
+
+    max_leases = 10000  # Expired leases are pruned once the table grows past this
+
+    def __init__(self, redis, batch_size=None, lease_time=None, backoff=None):
+        self.redis = redis
+        self.batch_size = settings.THROTTLE_BATCH_SIZE if batch_size is None else batch_size
+        self.lease_time = settings.THROTTLE_LEASE_TIME if lease_time is None else lease_time
+        self.backoff = settings.THROTTLE_FAIL_OPEN_BACKOFF if backoff is None else backoff
+        self.leases = {}  # key -> Lease
+        self.skip_redis_until = 0.0
+
+    async def acquire(self, key, limit, duration):
+        """ Returns None if the request may proceed, otherwise the seconds to wait """
+        now = time.monotonic()
+        lease = self.leases.get(key)
+        if lease is not None:
+            if now < lease.blocked_until:
+                return lease.blocked_until - now
+            if lease.tokens > 0 and now < lease.expires_at:
+                lease.tokens -= 1
+                return None
+
+        if now < self.skip_redis_until:
+            return None  # Redis is unavailable, fail open
+
+        interval = duration * 1000 / limit
+        result = await self.redis.run_script(REDIS_SCRIPT, [key], [interval, limit, min(self.batch_size, limit)])
+        if result is None:
+            logger.warning("⚠️ Rate limiting fails open for %ss (Redis unavailable).", self.backoff)
+            self.skip_redis_until = now + self.backoff
+            return None
+
+        granted, retry_after = int(result[0]), int(result[1]) / 1000
+        self.prune(now)
+        if granted:
+            self.leases[key] = Lease(tokens=granted - 1, expires_at=now + self.lease_time)
+            return None
+
+        self.leases[key] = Lease(blocked_until=now + retry_after)
+        return retry_after
+
+    def prune(self, now):
+        if len(self.leases) < self.max_leases:
+            return
+        self.leases = {
+            key: lease for key, lease in self.leases.items()
+            if (lease.tokens and now < lease.expires_at) or now < lease.blocked_until
+        }
+
+
+class RedisRateThrottle(SimpleRateThrottle):
+    """
+    DRF throttle backed by RedisRateLimiter
+    - Same rates, scopes and cache keys as DRF's throttles, but the limit holds across the cluster.
+    - Async only: ProxyForwardView awaits `aallow_request`; the sync `allow_request` raises, so it cannot
+      be dropped into a sync DRF view where an un-awaited coroutine would always pass.
+    """
+
+    limiter = None  # Shared by every throttle in the process, created on first use
+    key_prefix = "lb:"
+
+    @classmethod
+    def get_limiter(cls):
+        if RedisRateThrottle.limiter is None:
+            RedisRateThrottle.limiter = RedisRateLimiter(RedisAdapter())
+        return RedisRateThrottle.limiter
+
+    def allow_request(self, request, view):
+        raise ImproperlyConfigured(f"{type(self).__name__} is async only; await aallow_request() instead")
+
+    async def aallow_request(self, request, view):
+        self.wait_time = None
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.wait_time = await self.get_limiter().acquire(self.key_prefix + self.key, self.num_requests, self.duration)
+        return self.wait_time is None
+
+    def wait(self):
+        return self.wait_time
+
+
+class RedisAnonRateThrottle(RedisRateThrottle, AnonRateThrottle):
+    """ AnonRateThrottle (per client IP), limited cluster-wide """
+
+
+class RedisUserRateThrottle(RedisRateThrottle, UserRateThrottle):
+    """ UserRateThrottle (per user, IP for anonymous requests), limited cluster-wide """
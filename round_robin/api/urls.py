@@ -1,6 +1,7 @@
 from django.urls import path
-from .apis import ProxyForwardView
+from .apis import BatchForwardView, ProxyForwardView
 
 urlpatterns = [
    path("process/", ProxyForwardView.as_view(), name="proxy_forward"),
+   path("process/batch/", BatchForwardView.as_view(), name="proxy_forward_batch"),
 ]
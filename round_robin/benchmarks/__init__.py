@@ -0,0 +1,4 @@
+"""
+Load balancer benchmarks that run without Docker
+- `python -m benchmarks.run` starts stub backends on loopback and drives every proxy strategy through them.
+"""
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import random
+from typing import NamedTuple
+
+REASONS = {200: b"OK", 500: b"Internal Server Error"}
+
+
+class BackendProfile(NamedTuple):
+    """ How one stub backend behaves (times in seconds) """
+
+    latency: float = 0.005  # Typical service time
+    jitter: float = 0.001  # Uniform +/- around `latency`
+    error_rate: float = 0.0  # Share of requests answered with a 500
+    slow_rate: float = 0.0  # Share of requests that take `slow_latency` instead (tail latency)
+    slow_latency: float = 0.1
+    weight: float = 1.0  # Static weight handed to weighted_round_robin
+
+    @classmethod
+    def parse(cls, text):
+        """ "latency=0.01,error_rate=0.05" -> BackendProfile; unknown keys raise ValueError """
+        values = {}
+        for pair in filter(None, (part.strip() for part in text.split(","))):
+            name, _, value = pair.partition("=")
+            if name not in cls._fields:
+                raise ValueError(f"Unknown backend setting '{name}' (expected one of {', '.join(cls._fields)})")
+            values[name] = float(value)
+        return cls(**values)
+
+
+class StubBackend:
+    """
+    Minimal HTTP/1.1 keep-alive server on loopback that answers like the application instances
+    - Every request is answered with a small JSON body after a delay drawn from its profile.
+    - Counts the requests it served so a run can report how evenly a strategy spread the load.
+    """
+
+    def __init__(self, name, profile, seed=None):
+        self.name = name
+        self.profile = profile
+        self.random = random.Random(seed)
+        self.server = None
+        self.port = None
+        self.served = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/api/process"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def reset(self):
+        self.served = self.errors = self.max_in_flight = 0
+
+    def draw(self):
+        """ Returns (delay, status) for the next request """
+        profile = self.profile
+        if self.random.random() < profile.slow_rate:
+            delay = profile.slow_latency
+        else:
+            delay = max(0.0, profile.latency + self.random.uniform(-profile.jitter, profile.jitter))
+        status = 500 if self.random.random() < profile.error_rate else 200
+        return delay, status
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                writer.write(await self.respond())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass  # Client closed the connection
+        finally:
+            writer.close()
+
+    async def respond(self):
+        delay, status = self.draw()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+        self.served += 1
+        if status != 200:
+            self.errors += 1
+            body = b'{"status": "error"}'
+        else:
+            body = json.dumps({"status": "ok", "backend": self.name}).encode()
+        return (
+            b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+            % (status, REASONS[status], len(body))
+        ) + body
+
+
+async def start_backends(profiles, seed=None):
+    """ Starts one stub backend per profile, named app1..appN like the compose services """
+    return [
+        await StubBackend(f"app{index}", profile, None if seed is None else seed + index).start()
+        for index, profile in enumerate(profiles, start=1)
+    ]
@@ -0,0 +1,72 @@
+import time
+from api.monitoring.routing_table import EMPTY_ROUTING_TABLE, RoutingTable
+
+
+class FakeInstanceManager:
+    """ Fixed instance list; discovery never changes during a benchmark """
+
+    def __init__(self, instances):
+        self.instances = list(instances)
+
+    def get_instances(self):
+        return list(self.instances)
+
+    def add_listener(self, listener):
+        pass
+
+    def stop_watching(self):
+        pass
+
+
+class FakeHealthChecker:
+    """
+    Stands in for HealthChecker without Docker or probe threads
+    - An instance marked failed leaves the routing table for `recovery_time` seconds, roughly what a
+      real health sweep takes to bring it back.
+    - Static weights from the backend profiles feed weighted_round_robin.
+    """
+
+    def __init__(self, instance_manager, weights=None, recovery_time=1.0, clock=time.monotonic):
+        self.instance_manager = instance_manager
+        self.instances = instance_manager.get_instances()
+        self.instance_weights = dict(weights or {})
+        self.recovery_time = recovery_time
+        self.clock = clock
+        self.failed_until = {}  # instance_url -> time it is routed to again
+        self.failures = 0
+        self.routing_table = EMPTY_ROUTING_TABLE
+        self.listeners = []
+        self.publish_routing_table()
+
+    def publish_routing_table(self):
+        instances = tuple(instance for instance in self.instances if instance not in self.failed_until)
+        if instances != self.routing_table.instances:
+            self.routing_table = RoutingTable(self.routing_table.version + 1, instances)
+            for listener in self.listeners:
+                listener(self.routing_table)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        listener(self.routing_table)
+
+    def get_healthy_instances(self):
+        if self.failed_until:
+            now = self.clock()
+            recovered = [instance for instance, until in self.failed_until.items() if until <= now]
+            if recovered:
+                for instance in recovered:
+                    del self.failed_until[instance]
+                self.publish_routing_table()
+        return self.routing_table.instances
+
+    def mark_failed(self, instance_url):
+        self.failures += 1
+        if instance_url not in self.failed_until:
+            self.failed_until[instance_url] = self.clock() + self.recovery_time
+            self.publish_routing_table()
+
+    def record_result(self, instance_url, elapsed, success):
+        pass
+
+    def stop(self):
+        pass
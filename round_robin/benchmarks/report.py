@@ -0,0 +1,57 @@
+import math
+import statistics
+
+
+def percentile(sorted_values, q):
+    """ Nearest-rank percentile (q in 0-100) of an already sorted list """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(round(q / 100 * len(sorted_values), 9)))  # Rounded so 99.9% of 1000 is 999, not 1000
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies):
+    """ Mean, p50, p99, p99.9 and max in milliseconds """
+    values = sorted(latencies)
+    if not values:
+        return {"mean": None, "p50": None, "p99": None, "p999": None, "max": None}
+    return {
+        "mean": round(statistics.fmean(values) * 1000, 3),
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "p999": round(percentile(values, 99.9) * 1000, 3),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+
+def get_skew(distribution, weights=None):
+    """
+    How unevenly requests were spread, relative to each backend's weight
+    - 1.0 means every backend got exactly its share; 2.0 means the busiest got twice its share.
+    """
+    weights = weights or {}
+    loads = [count / weights.get(name, 1.0) for name, count in distribution.items() if weights.get(name, 1.0) > 0]
+    if not loads or not any(loads):
+        return None
+    return round(max(loads) / statistics.fmean(loads), 3)
+
+
+def find_regressions(baseline, current, tolerance):
+    """
+    Compares two reports strategy by strategy
+    - Lists every strategy whose throughput fell, or whose p99 grew, by more than `tolerance` (a fraction).
+    """
+    previous = {result["strategy"]: result for result in baseline.get("results", ())}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(result["strategy"])
+        if before is None:
+            continue
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result['strategy']}: throughput {before['throughput_rps']} -> {result['throughput_rps']} req/s"
+            )
+        p99_before, p99 = before["latency_ms"]["p99"], result["latency_ms"]["p99"]
+        if p99_before is not None and p99 is not None and p99 > p99_before * (1 + tolerance):
+            regressions.append(f"{result['strategy']}: p99 {p99_before} -> {p99} ms")
+    return regressions
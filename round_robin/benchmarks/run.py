@@ -0,0 +1,248 @@
+"""
+Benchmarks every proxy strategy against stub backends on loopback (no Docker needed)
+
+    cd round_robin
+    python -m benchmarks.run --backends 4 --requests 20000 --concurrency 64
+    python -m benchmarks.run --backend latency=0.002 --backend latency=0.02,error_rate=0.05 --strategy peak_ewma
+    python -m benchmarks.run --replay recorded.jsonl --output bench.json
+    python -m benchmarks.run --baseline bench.json --tolerance 0.15   # Exit code 1 on a regression
+
+The report (JSON) has, per strategy: throughput, p50/p99/p99.9 latency, the requests each backend served
+and their skew (1.0 = every backend got exactly its weighted share).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from .backends import BackendProfile, start_backends
+from .fakes import FakeHealthChecker, FakeInstanceManager
+from .report import find_regressions, get_skew, summarize_latencies
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "round_robin.settings")
+    from django.apps import apps
+
+    if not apps.ready:
+        import django
+
+        django.setup()
+
+
+def apply_settings(overrides):
+    """ KEY=VALUE pairs override Django settings for the run, coerced to the type of the current value """
+    from django.conf import settings
+
+    for override in overrides:
+        name, _, value = override.partition("=")
+        current = getattr(settings, name)
+        if isinstance(current, bool):
+            value = value.lower() == "true"
+        elif isinstance(current, (int, float)):
+            value = type(current)(value)
+        setattr(settings, name, value)
+
+
+def load_replay(path):
+    """
+    Reads recorded requests from a JSON Lines file, one request per line
+    - A line shaped like {"body": {...}, "headers": {...}} is sent as that body and headers.
+    - Any other JSON value is sent as the body itself.
+    """
+    payloads = []
+    with open(path, "rb") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict) and isinstance(record.get("body"), (dict, list)):
+                payloads.append((record["body"], record.get("headers") or {}))
+            else:
+                payloads.append((record, {}))
+    if not payloads:
+        raise ValueError(f"{path} has no requests")
+    return payloads
+
+
+def generate_payloads(count, keys, seed):
+    """ Requests shaped like the locust ones, spread over `keys` distinct gamerIDs """
+    rng = random.Random(seed)
+    return [
+        ({"game": "Mobile Legends", "gamerID": f"GAMER{rng.randrange(keys):06d}", "points": rng.randrange(100)}, {})
+        for _ in range(count)
+    ]
+
+
+async def drive(proxy, payloads, total, concurrency, rate=None):
+    """
+    Sends `total` requests through the proxy and returns (latencies, status counts)
+    - Closed loop by default: `concurrency` clients, each sending its next request as soon as one returns.
+    - With `rate`, requests start on a fixed schedule (open loop) and latency is measured from the scheduled
+      start, so a stalled proxy is not hidden by clients waiting on it.
+    """
+    latencies = []
+    statuses = Counter()
+
+    async def send(index, started):
+        body, headers = payloads[index % len(payloads)]
+        _, status = await proxy.forward_request(body, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+
+    if rate:
+        began = time.perf_counter()
+        tasks = []
+        for index in range(total):
+            scheduled = began + index / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(send(index, scheduled)))
+        await asyncio.gather(*tasks)
+        return latencies, statuses
+
+    counter = itertools.count()
+
+    async def client():
+        while True:
+            index = next(counter)
+            if index >= total:
+                return
+            await send(index, time.perf_counter())
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses
+
+
+async def run_strategy(strategy, backends, payloads, options):
+    """ Runs one strategy against fresh counters and returns its result entry """
+    from api.adapters.httpx_adapter import HttpxAdapter
+    from api.proxies.factory import STRATEGIES
+
+    urls = [backend.url for backend in backends]
+    weights = {backend.url: backend.profile.weight for backend in backends}
+    instance_manager = FakeInstanceManager(urls)
+    health_checker = FakeHealthChecker(instance_manager, weights, recovery_time=options.recovery_time)
+    proxy = STRATEGIES[strategy](instance_manager, HttpxAdapter(), health_checker, None)
+
+    try:
+        if options.warmup:
+            await drive(proxy, payloads, options.warmup, options.concurrency)
+        for backend in backends:
+            backend.reset()
+        health_checker.failures = 0
+
+        started = time.perf_counter()
+        latencies, statuses = await drive(proxy, payloads, options.requests, options.concurrency, options.rate)
+        duration = time.perf_counter() - started
+    finally:
+        await proxy.aclose()
+
+    distribution = {backend.name: backend.served for backend in backends}
+    return {
+        "strategy": strategy,
+        "requests": options.requests,
+        "succeeded": statuses.get(200, 0),
+        "failed": options.requests - statuses.get(200, 0),
+        "duration_seconds": round(duration, 3),
+        "throughput_rps": round(options.requests / duration, 1),
+        "latency_ms": summarize_latencies(latencies),
+        "distribution": distribution,
+        "skew": get_skew(distribution, {backend.name: backend.profile.weight for backend in backends}),
+        "backend_errors": sum(backend.errors for backend in backends),
+        "max_in_flight": {backend.name: backend.max_in_flight for backend in backends},
+        "marked_failed": health_checker.failures,
+    }
+
+
+async def benchmark(options):
+    """ Starts the stub backends once and runs every selected strategy against them """
+    from api.proxies.factory import STRATEGIES
+
+    profiles = [BackendProfile.parse(text) for text in options.backend] or [
+        BackendProfile(latency=options.latency, jitter=options.jitter)
+    ] * options.backends
+    if options.replay:
+        payloads = load_replay(options.replay)
+    else:
+        payloads = generate_payloads(min(options.requests, 100000), options.keys, options.seed)
+
+    strategies = options.strategy or list(STRATEGIES)
+    backends = await start_backends(profiles, options.seed)
+    try:
+        results = [await run_strategy(strategy, backends, payloads, options) for strategy in strategies]
+    finally:
+        for backend in backends:
+            await backend.stop()
+
+    return {
+        "config": {
+            "backends": [dict(profile._asdict(), name=backend.name) for profile, backend in zip(profiles, backends)],
+            "requests": options.requests,
+            "warmup": options.warmup,
+            "concurrency": None if options.rate else options.concurrency,
+            "rate": options.rate,
+            "replay": options.replay,
+            "settings": options.setting,
+            "python": sys.version.split()[0],
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[1])
+    parser.add_argument("--strategy", action="append", help="Strategy to run (repeatable; default: all)")
+    parser.add_argument("--backends", type=int, default=4, help="Number of identical backends (default: 4)")
+    parser.add_argument("--backend", action="append", default=[], metavar="PROFILE",
+                        help="One backend per flag, e.g. latency=0.01,jitter=0.002,error_rate=0.01,weight=2")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds per request for --backends")
+    parser.add_argument("--jitter", type=float, default=0.001, help="Seconds of +/- jitter for --backends")
+    parser.add_argument("--requests", type=int, default=5000, help="Measured requests per strategy")
+    parser.add_argument("--warmup", type=int, default=500, help="Unmeasured requests before each run")
+    parser.add_argument("--concurrency", type=int, default=64, help="Closed-loop clients")
+    parser.add_argument("--rate", type=float, help="Open-loop requests per second (overrides --concurrency)")
+    parser.add_argument("--keys", type=int, default=1000, help="Distinct gamerIDs in generated requests")
+    parser.add_argument("--replay", help="JSON Lines file of recorded requests to send instead")
+    parser.add_argument("--recovery-time", type=float, default=1.0, help="Seconds a failed backend stays out")
+    parser.add_argument("--setting", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a Django setting, e.g. HEDGING_ENABLED=true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed throughput/p99 change vs --baseline")
+    parser.add_argument("--log-level", default="CRITICAL", help="Level for the load balancer's own logs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    setup_django()
+    apply_settings(options.setting)
+    logging.getLogger("api").setLevel(options.log_level)
+
+    report = asyncio.run(benchmark(options))
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if options.baseline:
+        with open(options.baseline) as file:
+            regressions = find_regressions(json.load(file), report, options.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
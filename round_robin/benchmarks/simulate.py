@@ -0,0 +1,165 @@
+"""
+Discrete-event simulation of the proxy strategies on virtual time (no sockets, no Docker)
+
+    cd round_robin
+    python -m benchmarks.simulate --backends 200 --requests 1000000 --load 0.8
+    python -m benchmarks.simulate --service pareto --sigma 1.5 --speed-spread 0.5 --strategy peak_ewma
+    python -m benchmarks.simulate --incident backend=3,kind=slow,start=5,end=30,value=10 --incident backend=7,kind=down,start=10
+
+The real Proxy subclasses from the factory run unchanged against simulated M/G/c backends;
+the same --seed always gives the same report (apart from wall_seconds).
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from .fakes import FakeHealthChecker, FakeInstanceManager
+from .report import get_skew, summarize_latencies
+from .run import apply_settings, setup_django
+from .simulation import (
+    Incident, KeyPicker, ServiceTime, SimulatedHttpAdapter, VirtualClock, VirtualEventLoop, build_backends,
+    generate_load, virtual_time,
+)
+
+
+def get_rate(options):
+    """ Arrival rate: --rate, or --load times the fleet's capacity """
+    if options.rate:
+        return options.rate
+    capacity = options.backends * options.workers / options.mean  # Speeds average out to 1
+    return options.load * capacity
+
+
+def count(metric):
+    """ Current total of a metrics counter across its label sets """
+    return sum(value for _, value in metric.collect())
+
+
+def simulate_strategy(strategy, options):
+    """ Runs one strategy on a fresh virtual loop and fleet and returns its result entry """
+    from django.conf import settings
+    from api.monitoring import metrics
+    from api.proxies.factory import STRATEGIES
+
+    random.seed(options.seed)  # Strategies draw from the global generator (ties, power of two choices)
+    clock = VirtualClock()
+    loop = VirtualEventLoop(clock)
+    service_time = ServiceTime(options.service, options.mean, options.sigma)
+    incidents = [Incident.parse(text) for text in options.incident]
+    backends = build_backends(options.backends, service_time, options.workers, options.speed_spread, incidents, options.seed)
+    http_client = SimulatedHttpAdapter(backends, clock, settings.REQUEST_TIMEOUT)
+    instance_manager = FakeInstanceManager([backend.url for backend in backends])
+    health_checker = FakeHealthChecker(
+        instance_manager,
+        {backend.url: backend.speed for backend in backends},  # Weighted strategies get the true capacities
+        recovery_time=options.recovery_time,
+        clock=clock.monotonic,
+    )
+    rng = random.Random(f"{options.seed}:load")
+    keys = KeyPicker(options.keys, options.zipf, rng)
+    latencies, statuses = [], {}
+
+    retries, hedges = count(metrics.RETRIES), count(metrics.HEDGES)
+    started = time.perf_counter()
+    with virtual_time(clock):
+        proxy = STRATEGIES[strategy](instance_manager, http_client, health_checker, None)
+        try:
+            loop.run_until_complete(
+                generate_load(proxy, clock, get_rate(options), options.requests, keys, rng, latencies, statuses)
+            )
+        finally:
+            loop.close()
+    wall_seconds = time.perf_counter() - started
+
+    duration = clock.now
+    names = [backend.url.split("//")[1].split(":")[0] for backend in backends]
+    received = {name: backend.received for name, backend in zip(names, backends)}
+    # Backlog queued on a slow backend outlives the run, so utilization is measured until its last worker is free
+    finished = max([duration] + [max(backend.free_at) for backend in backends])
+    utilization = [backend.busy_time / (options.workers * finished) for backend in backends] if finished else [0]
+    result = {
+        "strategy": strategy,
+        "requests": options.requests,
+        "succeeded": statuses.get(200, 0),
+        "failed": options.requests - statuses.get(200, 0),
+        "timeouts": http_client.timeouts,
+        "refused": http_client.refused,
+        "backend_errors": sum(backend.errors for backend in backends),
+        "marked_failed": health_checker.failures,
+        "retries": count(metrics.RETRIES) - retries,
+        "hedges": count(metrics.HEDGES) - hedges,
+        "virtual_seconds": round(duration, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "latency_ms": summarize_latencies(latencies),
+        "load": {
+            "min": min(received.values()),
+            "mean": round(options.requests / len(backends), 1),
+            "max": max(received.values()),
+        },
+        "skew": get_skew(received, {name: backend.speed for name, backend in zip(names, backends)}),
+        "utilization": {"mean": round(sum(utilization) / len(utilization), 3), "max": round(max(utilization), 3)},
+        "max_queue_wait_ms": round(max(backend.max_wait for backend in backends) * 1000, 3),
+    }
+    if options.per_backend:
+        result["distribution"] = received
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.simulate", description=__doc__.split("\n")[1])
+    parser.add_argument("--strategy", action="append", help="Strategy to simulate (repeatable; default: all)")
+    parser.add_argument("--backends", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4, help="Requests each backend serves in parallel")
+    parser.add_argument("--service", default="lognormal", choices=("constant", "exponential", "lognormal", "pareto"))
+    parser.add_argument("--mean", type=float, default=0.02, help="Mean service time in seconds")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal spread, or pareto shape")
+    parser.add_argument("--speed-spread", type=float, default=0.0,
+                        help="Backend speeds drawn from 1 +/- this (0.5 = some twice as fast as others)")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--load", type=float, default=0.7, help="Arrival rate as a share of total capacity")
+    parser.add_argument("--rate", type=float, help="Arrival rate in requests per second (overrides --load)")
+    parser.add_argument("--keys", type=int, default=10000, help="Distinct gamerIDs")
+    parser.add_argument("--zipf", type=float, default=0.0, help="Key popularity skew (0 = uniform, 1.1 = hot keys)")
+    parser.add_argument("--incident", action="append", default=[], metavar="SPEC",
+                        help="backend=N,kind=down|slow|errors,start=S,end=S,value=V (repeatable)")
+    parser.add_argument("--recovery-time", type=float, default=5.0, help="Seconds a failed backend stays out")
+    parser.add_argument("--setting", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a Django setting, e.g. HEDGING_ENABLED=true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--per-backend", action="store_true", help="Include every backend's request count")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--log-level", default="CRITICAL", help="Level for the load balancer's own logs")
+    return parser.parse_args(argv)
+
+
+def simulate(options):
+    """ Simulates every selected strategy and returns the report """
+    from api.proxies.factory import STRATEGIES
+
+    return {
+        "config": {
+            key: value for key, value in vars(options).items() if key not in ("strategy", "output", "log_level")
+        } | {"rate": round(get_rate(options), 1)},
+        "results": [simulate_strategy(strategy, options) for strategy in options.strategy or list(STRATEGIES)],
+    }
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    setup_django()
+    apply_settings(options.setting)
+    logging.getLogger("api").setLevel(options.log_level)
+
+    text = json.dumps(simulate(options), indent=2)
+    if options.output:
+        with open(options.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import asyncio
+import bisect
+import heapq
+import itertools
+import math
+import random
+import selectors
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Modules that read the clock on the request path; they see virtual time during a simulation
+CLOCK_MODULES = (
+    "api.proxies.proxy",
+    "api.proxies.peak_ewma",
+    "api.adapters.circuit_breaker_adapter",
+    "api.monitoring.outlier_detector",
+)
+
+
+class VirtualClock:
+    """ Simulated seconds; stands in for the `time` module of the proxy code """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+    time = monotonic
+
+
+class VirtualSelector(selectors.BaseSelector):
+    """
+    Selector that never waits: asked to block for `timeout` seconds, it moves the virtual clock forward instead
+    - The loop passes the time until its next timer (0 while callbacks are ready), so time jumps straight to it.
+    - There is no real I/O in a simulation; registered file objects (the loop's self-pipe) never become ready.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.keys = {}
+
+    def register(self, fileobj, events, data=None):
+        key = selectors.SelectorKey(fileobj, fileobj if isinstance(fileobj, int) else fileobj.fileno(), events, data)
+        self.keys[fileobj] = key
+        return key
+
+    def unregister(self, fileobj):
+        return self.keys.pop(fileobj)
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError("Simulation stalled: tasks are waiting but nothing is scheduled")
+        self.clock.now += timeout
+        return []
+
+    def close(self):
+        self.keys.clear()
+
+    def get_map(self):
+        return self.keys
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """
+    asyncio event loop running on virtual time
+    - Only public hooks are used: `time()` reads the virtual clock and the selector advances it,
+      so whenever no callback is ready, time jumps to the next timer.
+    - `asyncio.sleep`, `wait_for` and `asyncio.wait(timeout=...)` all work, so the proxy code runs unchanged.
+    - Scheduling is deterministic, so a seeded simulation is reproducible.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or VirtualClock()
+        super().__init__(VirtualSelector(self.clock))
+
+    def time(self):
+        return self.clock.now
+
+
+@contextmanager
+def virtual_time(clock, module_names=CLOCK_MODULES):
+    """ Points the `time` name of the given modules at `clock` for the duration of the block """
+    import importlib
+
+    modules = [importlib.import_module(name) for name in module_names]
+    originals = [module.time for module in modules]
+    for module in modules:
+        module.time = clock
+    try:
+        yield clock
+    finally:
+        for module, original in zip(modules, originals):
+            module.time = original
+
+
+class ServiceTime(NamedTuple):
+    """
+    Service-time distribution of a backend (seconds)
+    - constant: always `mean`
+    - exponential: memoryless with the given mean
+    - lognormal: given mean, `sigma` is the spread of the underlying normal (heavier tail as it grows)
+    - pareto: given mean, `sigma` is the shape alpha (> 1; heavier tail as it approaches 1)
+    """
+
+    kind: str = "lognormal"
+    mean: float = 0.02
+    sigma: float = 0.5
+
+    def sample(self, rng, factor=1.0):
+        if self.kind == "constant":
+            value = self.mean
+        elif self.kind == "exponential":
+            value = rng.expovariate(1 / self.mean)
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(self.mean) - self.sigma ** 2 / 2, self.sigma)
+        elif self.kind == "pareto":
+            value = self.mean * (self.sigma - 1) / self.sigma * rng.paretovariate(self.sigma)
+        else:
+            raise ValueError(f"Unknown service-time distribution '{self.kind}'")
+        return value * factor
+
+
+class Incident(NamedTuple):
+    """
+    A backend misbehaving between `start` and `end` (virtual seconds)
+    - down: connections are refused
+    - slow: service times are multiplied by `value`
+    - errors: a `value` share of responses are 500s
+    """
+
+    backend: int
+    kind: str
+    start: float
+    end: float
+    value: float = 1.0
+
+    @classmethod
+    def parse(cls, text):
+        """ "backend=3,kind=slow,start=10,end=20,value=5" -> Incident """
+        fields = dict(pair.split("=", 1) for pair in text.split(",") if pair.strip())
+        if fields.get("kind") not in ("down", "slow", "errors"):
+            raise ValueError(f"Incident kind must be down, slow or errors: {text}")
+        return cls(
+            backend=int(fields["backend"]), kind=fields["kind"],
+            start=float(fields.get("start", 0)), end=float(fields.get("end", math.inf)),
+            value=float(fields.get("value", 1)),
+        )
+
+
+class SimulatedResponse:
+    __slots__ = ("status_code", "body")
+
+    headers = {}
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class SimulatedBackend:
+    """
+    One backend as a FIFO queue in front of `workers` parallel workers (an M/G/c server)
+    - A request starts when a worker frees up and holds it for a sampled service time,
+      even if the proxy already gave up on it.
+    """
+
+    def __init__(self, url, service_time, workers, rng, speed=1.0, incidents=()):
+        self.url = url
+        self.service_time = service_time
+        self.rng = rng
+        self.speed = speed  # Service times are divided by this (heterogeneous fleets)
+        self.incidents = list(incidents)
+        self.free_at = [0.0] * workers  # Heap of the times each worker becomes free
+        self.received = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.max_wait = 0.0
+
+    def condition(self, now):
+        """ (down, slow factor, error rate) at `now` """
+        down, factor, error_rate = False, 1.0, 0.0
+        for incident in self.incidents:
+            if incident.start <= now < incident.end:
+                if incident.kind == "down":
+                    down = True
+                elif incident.kind == "slow":
+                    factor *= incident.value
+                else:
+                    error_rate = max(error_rate, incident.value)
+        return down, factor, error_rate
+
+    def admit(self, now):
+        """ Returns (seconds until the response, status), or None when the connection is refused """
+        down, factor, error_rate = self.condition(now) if self.incidents else (False, 1.0, 0.0)
+        if down:
+            return None
+        self.received += 1
+        service = self.service_time.sample(self.rng, factor / self.speed)
+        start = max(now, heapq.heappop(self.free_at))
+        heapq.heappush(self.free_at, start + service)
+        self.busy_time += service
+        self.max_wait = max(self.max_wait, start - now)
+        status = 200
+        if error_rate and self.rng.random() < error_rate:
+            status = 500
+            self.errors += 1
+        return start + service - now, status
+
+
+class SimulatedHttpAdapter:
+    """ HttpClientAdapter over simulated backends: same None-on-failure contract as HttpxAdapter """
+
+    connect_time = 0.0005  # Seconds to notice a refused connection
+
+    def __init__(self, backends, clock, timeout):
+        self.backends = {backend.url: backend for backend in backends}
+        self.clock = clock
+        self.timeout = timeout
+        self.timeouts = 0
+        self.refused = 0
+
+    async def post(self, url, json):
+        admitted = self.backends[url].admit(self.clock.now)
+        if admitted is None:
+            self.refused += 1
+            await asyncio.sleep(self.connect_time)
+            return None
+        delay, status = admitted
+        if delay > self.timeout:
+            self.timeouts += 1
+            await asyncio.sleep(self.timeout)
+            return None
+        await asyncio.sleep(delay)
+        return SimulatedResponse(status, json if status == 200 else {"status": "error"})
+
+    async def aclose(self):
+        pass
+
+
+class KeyPicker:
+    """ Request keys (gamerIDs) drawn uniformly, or with Zipf skew `exponent` so a few keys are hot """
+
+    def __init__(self, keys, exponent, rng):
+        self.names = [f"GAMER{index:06d}" for index in range(keys)]
+        self.rng = rng
+        self.cumulative = None
+        if exponent > 0:
+            self.cumulative = list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, keys + 1)))
+
+    def pick(self):
+        if self.cumulative is None:
+            return self.names[self.rng.randrange(len(self.names))]
+        index = bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+        return self.names[min(index, len(self.names) - 1)]
+
+
+async def generate_load(proxy, clock, rate, total, keys, rng, latencies, statuses):
+    """ Poisson arrivals at `rate` per second; each request is one task, timed on the virtual clock """
+
+    async def send(body):
+        started = clock.now
+        _, status = await proxy.forward_request(body, headers={})
+        latencies.append(clock.now - started)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    tasks = set()
+    for _ in range(total):
+        await asyncio.sleep(rng.expovariate(rate))
+        task = asyncio.ensure_future(send({"gamerID": keys.pick(), "points": 20}))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    while tasks:
+        await asyncio.gather(*list(tasks))
+
+
+def build_backends(count, service_time, workers, speed_spread, incidents, seed):
+    """ Backends app1..appN, each with its own seeded random stream """
+    speeds = random.Random(seed)
+    backends = []
+    for index in range(1, count + 1):
+        speed = speeds.uniform(1 - speed_spread, 1 + speed_spread) if speed_spread else 1.0
+        backends.append(SimulatedBackend(
+            f"http://app{index}:8000/api/process", service_time, workers, random.Random(f"{seed}:{index}"),
+            speed=speed, incidents=[incident for incident in incidents if incident.backend == index],
+        ))
+    return backends
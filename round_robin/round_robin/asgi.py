@@ -1,5 +1,44 @@
+import logging
 import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'round_robin.settings')
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+logger = logging.getLogger(__name__)
+
+
+async def application(scope, receive, send):
+    """ Serves Django over ASGI and answers the lifespan events Django itself rejects """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    else:
+        await django_application(scope, receive, send)
+
+
+async def lifespan(receive, send):
+    """
+    Builds the proxy on startup and closes its connection pools on shutdown
+    - A failure is reported back as lifespan.startup.failed / lifespan.shutdown.failed, so the server
+      stops (or exits) with the reason instead of waiting on a reply that never comes.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                from api.apis import proxy  # noqa: F401  (creating the proxy starts the health checker)
+            except Exception as e:
+                logger.exception("🚨 Startup failed")
+                await send({"type": "lifespan.startup.failed", "message": repr(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            try:
+                from api.apis import proxy
+                await proxy.aclose()
+            except Exception as e:
+                logger.exception("🚨 Shutdown failed")
+                await send({"type": "lifespan.shutdown.failed", "message": repr(e)})
+                return
+            await send({"type": "lifespan.shutdown.complete"})
+            return
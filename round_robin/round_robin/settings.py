@@ -23,17 +23,107 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Proxy Settings
 PROXY_STRATEGY = os.getenv("PROXY_STRATEGY", "round_robin")
 HEALTH_CHECK_INTERVAL = int(os.getenv("HEALTH_CHECK_INTERVAL", 5))
+HEALTH_PROBE_CONCURRENCY = int(os.getenv("HEALTH_PROBE_CONCURRENCY", 16))  # Parallel health probes
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 5))  # Deadline per probe in seconds
+HEALTH_PROBE_JITTER = float(os.getenv("HEALTH_PROBE_JITTER", 0.2))  # Random delay before each probe in seconds
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
+EWMA_DECAY_TIME = float(os.getenv("EWMA_DECAY_TIME", 10))  # Seconds for peak_ewma latency to decay by 1/e
+HASH_KEY_FIELD = os.getenv("HASH_KEY_FIELD", "gamerID")  # Request body field used by consistent_hash
+HASH_KEY_HEADER = os.getenv("HASH_KEY_HEADER", "")  # Header used by consistent_hash (takes precedence when set)
+HASH_VIRTUAL_NODES = int(os.getenv("HASH_VIRTUAL_NODES", 100))  # Ring positions per instance
+HASH_LOAD_FACTOR = float(os.getenv("HASH_LOAD_FACTOR", 0.25))  # Max load above the average per instance
+
+# Instance Discovery
+DISCOVERY_EVENTS = os.getenv("DISCOVERY_EVENTS", "True").lower() == "true"  # Follow the Docker events stream
+DISCOVERY_RESYNC_INTERVAL = int(os.getenv("DISCOVERY_RESYNC_INTERVAL", 30))  # Full listing safety net in seconds
+DISCOVERY_LABEL = os.getenv("DISCOVERY_LABEL", "")  # e.g. "lb.backend=true"; empty = names containing "app"
 
 # Docker Health Monitoring
 CPU_THRESHOLD = int(os.getenv("CPU_THRESHOLD", 80))  # Mark as overloaded if CPU > 80%
 MEMORY_THRESHOLD = int(os.getenv("MEMORY_THRESHOLD", 80))  # Memory overload threshold
+DOCKER_STATS_STREAMING = os.getenv("DOCKER_STATS_STREAMING", "True").lower() == "true"  # Background stats collectors
+DOCKER_STATS_MAX_AGE = float(os.getenv("DOCKER_STATS_MAX_AGE", 5))  # Seconds a cached reading stays valid
+WEIGHT_LABEL = os.getenv("WEIGHT_LABEL", "lb.weight")  # Docker label holding a container's static weight
+MIN_WEIGHT_FACTOR = float(os.getenv("MIN_WEIGHT_FACTOR", 0.1))  # Lowest share of its weight a busy container keeps
+
+# Request Hedging (idempotent requests only)
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "False").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))  # Hedge once the first try is slower than this percentile
+HEDGE_BUDGET_PERCENT = float(os.getenv("HEDGE_BUDGET_PERCENT", 10))  # Max extra requests as % of traffic
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 0.005))  # Seconds; never hedge sooner than this
+HEDGE_IDEMPOTENCY_HEADER = os.getenv("HEDGE_IDEMPOTENCY_HEADER", "Idempotency-Key")  # Marks a request as safe to hedge
+HEDGE_ALL_REQUESTS = os.getenv("HEDGE_ALL_REQUESTS", "False").lower() == "true"  # Treat every request as idempotent
+
+# Request Coalescing (identical concurrent requests share one upstream call)
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "False").lower() == "true"
+COALESCE_HEADERS = [name.strip() for name in os.getenv("COALESCE_HEADERS", "").split(",") if name.strip()]
+
+# Pass-through Mode (raw request bytes in, upstream status/headers/body streamed back)
+PASSTHROUGH_MODE = os.getenv("PASSTHROUGH_MODE", "False").lower() == "true"
+PASSTHROUGH_VALIDATE_JSON = os.getenv("PASSTHROUGH_VALIDATE_JSON", "True").lower() == "true"  # Reject invalid JSON with 400
+
+# Batch Endpoint (/api/process/batch/)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 32))  # Records of one batch in flight at once
+BATCH_MAX_RECORDS = int(os.getenv("BATCH_MAX_RECORDS", 10000))  # Records past this are reported, not forwarded
+
+# Response Cache (in-process LRU, optionally shared through Redis)
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "False").lower() == "true"
+CACHE_TTL = float(os.getenv("CACHE_TTL", 5))  # Seconds, used when upstream sends no Cache-Control
+CACHE_STALE_WHILE_REVALIDATE = float(os.getenv("CACHE_STALE_WHILE_REVALIDATE", 10))  # Seconds served stale while refreshing
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))  # In-process LRU size
+CACHE_KEY_FIELDS = [name.strip() for name in os.getenv("CACHE_KEY_FIELDS", "").split(",") if name.strip()]  # Empty = whole body
+CACHE_KEY_HEADERS = [name.strip() for name in os.getenv("CACHE_KEY_HEADERS", "").split(",") if name.strip()]
+CACHE_REDIS = os.getenv("CACHE_REDIS", "False").lower() == "true"  # Share entries through the redis_cache container
+
+# Redis
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", 0.05))  # Seconds before a Redis call is treated as a miss
+
+# Passive Outlier Detection
+OUTLIER_DETECTION = os.getenv("OUTLIER_DETECTION", "True").lower() == "true"
+OUTLIER_CONSECUTIVE_FAILURES = int(os.getenv("OUTLIER_CONSECUTIVE_FAILURES", 5))  # Failures in a row before ejection
+OUTLIER_BASE_EJECTION_TIME = float(os.getenv("OUTLIER_BASE_EJECTION_TIME", 30))  # Doubles with every ejection
+OUTLIER_MAX_EJECTION_TIME = float(os.getenv("OUTLIER_MAX_EJECTION_TIME", 300))
+OUTLIER_MAX_EJECTION_PERCENT = int(os.getenv("OUTLIER_MAX_EJECTION_PERCENT", 50))  # Max share of the pool ejected
+OUTLIER_MIN_REQUESTS = int(os.getenv("OUTLIER_MIN_REQUESTS", 20))  # Requests per sweep before comparing with peers
+OUTLIER_SUCCESS_RATE_STDEV = float(os.getenv("OUTLIER_SUCCESS_RATE_STDEV", 1.9))  # Eject below mean - N x stdev
+OUTLIER_LATENCY_FACTOR = float(os.getenv("OUTLIER_LATENCY_FACTOR", 3))  # Eject when p99 > N x peers' median p99
+
+# Per-backend Circuit Breakers
+CIRCUIT_BREAKER = os.getenv("CIRCUIT_BREAKER", "True").lower() == "true"
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))  # Failures before the circuit opens
+CIRCUIT_OPEN_TIMEOUT = float(os.getenv("CIRCUIT_OPEN_TIMEOUT", 10))  # Seconds before half-open trials
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", 1))  # Concurrent trial requests
+
+# Metrics (/metrics)
+METRICS_DIR = os.getenv("METRICS_DIR", "")  # Shared directory for per-worker snapshots; empty = this process only
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))  # Seconds between snapshot writes
+
+# Logging (queued to a background writer; the request path never blocks on stdout)
+LOGGING_LEVEL = os.getenv("LOGGING_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" (one object per line) or "text"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))  # Records waiting for the writer; more are dropped and counted
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", 10))  # Records per second per message template; 0 = unlimited
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", 20))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1))  # Share of DEBUG/INFO records kept; warnings are always kept
 
 # API Timeout Settings
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 10))  # Default: 10 seconds
 
+# Upstream Connection Pool (per backend, per event loop)
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 100))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", 20))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", 30))  # Seconds an idle connection is kept
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "False").lower() == "true"  # Requires the `h2` package
+
 ANON_THROTTLE_RATE = os.getenv("ANON_THROTTLE_RATE", "10/minute")
 USER_THROTTLE_RATE = os.getenv("USER_THROTTLE_RATE", "20/minute")
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "local")  # "local" (per process) or "redis" (cluster-wide)
+THROTTLE_SHARDS = int(os.getenv("THROTTLE_SHARDS", 16))  # Lock stripes of the local GCRA table
+THROTTLE_BATCH_SIZE = int(os.getenv("THROTTLE_BATCH_SIZE", 5))  # Tokens leased from Redis per round trip
+THROTTLE_LEASE_TIME = float(os.getenv("THROTTLE_LEASE_TIME", 1))  # Seconds before unused leased tokens lapse
+THROTTLE_FAIL_OPEN_BACKOFF = float(os.getenv("THROTTLE_FAIL_OPEN_BACKOFF", 5))  # Seconds to skip Redis after an error
 
 # Debug Mode
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"  # Converts "True"/"False" to boolean
@@ -62,6 +152,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.logs.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,8 +165,8 @@ ROOT_URLCONF = 'round_robin.urls'
 
 REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',  
-        'rest_framework.throttling.UserRateThrottle',  
+        'api.throttling.local_throttle.LocalAnonRateThrottle',
+        'api.throttling.local_throttle.LocalUserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': ANON_THROTTLE_RATE,
@@ -83,6 +174,27 @@ REST_FRAMEWORK = {
     }
 }
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {'()': 'api.logs.RequestIdFilter'},
+        'sampling': {'()': 'api.logs.SamplingFilter', 'rate': LOG_SAMPLE_RATE},
+        'rate_limit': {'()': 'api.logs.RateLimitFilter', 'rate': LOG_RATE_LIMIT, 'burst': LOG_RATE_BURST},
+    },
+    'handlers': {
+        'queue': {
+            '()': 'api.logs.QueueLogHandler',
+            'json_format': LOG_FORMAT == 'json',
+            'max_size': LOG_QUEUE_SIZE,
+            'filters': ['sampling', 'rate_limit', 'request_id'],
+        },
+    },
+    'loggers': {
+        'api': {'handlers': ['queue'], 'level': LOGGING_LEVEL, 'propagate': False},
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.urls import path, include
+from api.apis import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
@@ -1,5 +1,7 @@
 import json
-from django.test import TestCase, Client
+import httpx
+from django.http import JsonResponse
+from django.test import TestCase, Client, AsyncClient, override_settings
 from unittest.mock import AsyncMock, patch
 
 class ProxyForwardRequestIntegrationTest(TestCase):
@@ -40,6 +42,24 @@ class ProxyForwardRequestIntegrationTest(TestCase):
         self.assertEqual(response.status_code, 502)
         self.assertEqual(response.json(), {"error": "Proxy failure"})
 
+    @patch("api.apis.proxy")
+    @patch("api.apis.RequestHandler.handle_request", new_callable=AsyncMock)
+    def test_proxy_forward_body_matches_json_response(self, mock_handle_request, mock_proxy):
+        """ Response bodies stay byte-for-byte what JsonResponse writes (separators, \\uXXXX escapes, lists) """
+        cases = [
+            ({"game": "Pokémon", "gamerID": "GYUTDTE", "points": [1, 2.5, None]},
+             b'{"game": "Pok\\u00e9mon", "gamerID": "GYUTDTE", "points": [1, 2.5, null]}'),
+            ([{"ok": True}, "😀"], b'[{"ok": true}, "\\ud83d\\ude00"]'),
+        ]
+        for payload, expected in cases:
+            with self.subTest(payload=payload):
+                mock_handle_request.return_value = (payload, 200)
+
+                response = self.client.post("/api/process/", json.dumps({"test": "data"}), content_type="application/json")
+
+                self.assertEqual(response.content, expected)
+                self.assertEqual(response.content, JsonResponse(payload, safe=False).content)
+
     def test_proxy_forward_invalid_json(self):
         """ Test handling of invalid JSON input """
         response = self.client.post(
@@ -57,3 +77,190 @@ class ProxyForwardRequestIntegrationTest(TestCase):
 
         self.assertEqual(response.status_code, 405)
         self.assertEqual(response.json(), {"error": "Only POST allowed"})
+
+    @patch("api.apis.LocalAnonRateThrottle.wait", return_value=42)
+    @patch("api.apis.LocalAnonRateThrottle.allow_request", return_value=False)
+    def test_proxy_forward_throttled(self, mock_allow_request, mock_wait):
+        """ Throttled requests keep DRF's 429 body and Retry-After header """
+        response = self.client.post(
+            "/api/process/",
+            json.dumps({"test": "data"}),
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "42")
+        self.assertEqual(response.json(), {"detail": "Request was throttled. Expected available in 42 seconds."})
+
+    def test_proxy_forward_method_not_allowed(self):
+        """ Methods other than GET/POST are rejected with DRF's 405 body """
+        response = self.client.put("/api/process/")
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.json(), {"detail": 'Method "PUT" not allowed.'})
+
+
+@override_settings(PASSTHROUGH_MODE=True, PASSTHROUGH_VALIDATE_JSON=True)
+class ProxyPassThroughIntegrationTest(TestCase):
+    """ Integration tests for the raw pass-through mode """
+
+    def setUp(self):
+        self.client = AsyncClient()
+
+    @patch("api.apis.proxy")
+    async def test_upstream_response_is_relayed(self, mock_proxy):
+        """ Raw bytes go upstream; status, headers and body come back untouched """
+        upstream = httpx.Response(
+            404,
+            stream=httpx.ByteStream(b'{"detail": "Not found"}'),
+            headers={"Content-Type": "application/json", "X-Upstream": "app1", "Connection": "close"},
+        )
+        mock_proxy.forward_raw = AsyncMock(return_value=upstream)
+
+        response = await self.client.post(
+            "/api/process/", b'{"gamerID": "GYUTDTE"}', content_type="application/json",
+            headers={"Authorization": "Token a", "X-Request-ID": "req-1"},
+        )
+        body = b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(body, b'{"detail": "Not found"}')
+        self.assertEqual(response["X-Upstream"], "app1")
+        self.assertFalse(response.has_header("Connection"))
+        content, = mock_proxy.forward_raw.await_args.args
+        kwargs = mock_proxy.forward_raw.await_args.kwargs
+        self.assertEqual(content, b'{"gamerID": "GYUTDTE"}')
+        self.assertEqual(kwargs["data"], {"gamerID": "GYUTDTE"})
+        self.assertEqual(kwargs["headers"]["Authorization"], "Token a")
+        self.assertNotIn("Content-Length", kwargs["headers"])
+        self.assertEqual(kwargs["headers"]["X-Request-ID"], "req-1")
+        self.assertEqual(response["X-Request-ID"], "req-1")
+
+    @patch("api.apis.proxy")
+    async def test_repeated_upstream_headers(self, mock_proxy):
+        """ Every Set-Cookie header is relayed on its own; other repeated headers are comma-joined """
+        upstream = httpx.Response(
+            200,
+            stream=httpx.ByteStream(b"{}"),
+            headers=[
+                ("Set-Cookie", "session=abc; Path=/; HttpOnly"),
+                ("Set-Cookie", "theme=dark; Expires=Wed, 21 Oct 2026 07:28:00 GMT"),
+                ("Vary", "Accept"),
+                ("Vary", "Cookie"),
+            ],
+        )
+        mock_proxy.forward_raw = AsyncMock(return_value=upstream)
+
+        response = await self.client.post("/api/process/", b"{}", content_type="application/json")
+
+        self.assertEqual(
+            [value for name, value in response.items() if name == "Set-Cookie"],
+            ["session=abc; Path=/; HttpOnly", "theme=dark; Expires=Wed, 21 Oct 2026 07:28:00 GMT"],
+        )
+        self.assertEqual(response["Vary"], "Accept, Cookie")
+
+    @patch("api.apis.proxy")
+    async def test_invalid_json_is_rejected_when_validating(self, mock_proxy):
+        response = await self.client.post("/api/process/", "invalid json data", content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        mock_proxy.forward_raw.assert_not_called()
+
+    @override_settings(PASSTHROUGH_VALIDATE_JSON=False)
+    @patch("api.apis.proxy")
+    async def test_validation_can_be_disabled(self, mock_proxy):
+        mock_proxy.forward_raw = AsyncMock(return_value=None)
+        mock_proxy.generate_error_response.return_value = ({"status": "error"}, 503)
+
+        response = await self.client.post("/api/process/", b"not json", content_type="text/plain")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIsNone(mock_proxy.forward_raw.await_args.kwargs["data"])
+
+
+class BatchForwardIntegrationTest(TestCase):
+    """ Integration tests for /api/process/batch/ """
+
+    def setUp(self):
+        self.client = AsyncClient()
+
+    @patch("api.apis.RequestHandler.handle_request", new_callable=AsyncMock)
+    async def test_jsonl_batch(self, mock_handle_request):
+        """ Every record is forwarded and reported as JSONL in input order """
+        mock_handle_request.side_effect = lambda data, headers=None: (data, 200)
+
+        response = await self.client.post(
+            "/api/process/batch/", b'{"gamerID": "A"}\n{"gamerID": "B"}\n', content_type="application/x-ndjson"
+        )
+        lines = [json.loads(line) async for line in response.streaming_content]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(lines, [
+            {"index": 0, "status": 200, "response": {"gamerID": "A"}},
+            {"index": 1, "status": 200, "response": {"gamerID": "B"}},
+            {"summary": {"total": 2, "succeeded": 2, "failed": 0}},
+        ])
+
+    async def test_empty_batch_is_rejected(self):
+        response = await self.client.post("/api/process/batch/", b"\n", content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid JSON"})
+
+    @patch("api.apis.RequestHandler.handle_request", new_callable=AsyncMock)
+    async def test_broken_array_is_reported_in_the_stream(self, mock_handle_request):
+        """ Arrays are parsed as they stream, so a syntax error is the last line rather than a 400 """
+        mock_handle_request.side_effect = lambda data, headers=None: (data, 200)
+
+        response = await self.client.post("/api/process/batch/", b'[{"gamerID": "A"}, {', content_type="application/json")
+        lines = [json.loads(line) async for line in response.streaming_content]
+
+        self.assertEqual(lines, [
+            {"index": 0, "status": 200, "response": {"gamerID": "A"}},
+            {"index": 1, "status": 400, "error": "Invalid JSON"},
+            {"summary": {"total": 2, "succeeded": 1, "failed": 1}},
+        ])
+
+    @patch("api.apis.LocalAnonRateThrottle.wait", return_value=42)
+    @patch("api.apis.LocalAnonRateThrottle.allow_request", side_effect=[True, True, False])
+    @patch("api.apis.RequestHandler.handle_request", new_callable=AsyncMock)
+    async def test_records_are_charged_to_the_throttle(self, mock_handle_request, mock_allow_request, mock_wait):
+        """ A batch cannot forward more records than the throttle would let through as single requests """
+        mock_handle_request.side_effect = lambda data, headers=None: (data, 200)
+        body = b"".join(b'{"gamerID": "%d"}\n' % i for i in range(10))
+
+        response = await self.client.post("/api/process/batch/", body, content_type="application/x-ndjson")
+        lines = [json.loads(line) async for line in response.streaming_content]
+
+        self.assertEqual(mock_handle_request.await_count, 2)
+        self.assertEqual([line.get("status") for line in lines[:-1]], [200, 200, 429])
+        self.assertEqual(lines[2]["error"], "Request was throttled. Expected available in 42 seconds.")
+
+
+class MetricsEndpointIntegrationTest(TestCase):
+    """ /metrics serves Prometheus text """
+
+    def test_metrics(self):
+        response = Client().get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(b"# TYPE lb_upstream_requests_total counter", response.content)
+        self.assertIn(b"# TYPE lb_upstream_request_duration_seconds histogram", response.content)
+
+
+class RequestIdIntegrationTest(TestCase):
+    """ Every response carries the id its log records were written with """
+
+    def test_incoming_id_is_reused(self):
+        response = Client().get("/metrics", headers={"X-Request-ID": "abc-123"})
+
+        self.assertEqual(response["X-Request-ID"], "abc-123")
+
+    def test_missing_or_malformed_id_is_replaced(self):
+        for headers in [{}, {"X-Request-ID": "bad id"}, {"X-Request-ID": "x" * 200}]:
+            with self.subTest(headers=headers):
+                response = Client().get("/metrics", headers=headers)
+
+                self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
@@ -0,0 +1,43 @@
+import sys
+import unittest
+from unittest.mock import AsyncMock, patch
+from round_robin.asgi import lifespan
+
+
+class TestLifespan(unittest.IsolatedAsyncioTestCase):
+
+    async def run_lifespan(self, *events):
+        """ Feeds lifespan events and returns the messages sent back """
+        messages = [{"type": event} for event in events]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await lifespan(receive, send)
+        return sent
+
+    async def test_startup_and_shutdown_complete(self):
+        with patch("api.apis.proxy.aclose", new_callable=AsyncMock) as mock_aclose:
+            sent = await self.run_lifespan("lifespan.startup", "lifespan.shutdown")
+
+        self.assertEqual([message["type"] for message in sent], ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        mock_aclose.assert_awaited_once()
+
+    async def test_startup_failure_is_reported(self):
+        """ The server gets the reason instead of waiting for startup.complete """
+        with patch.dict(sys.modules, {"api.apis": None}), self.assertLogs("round_robin.asgi", "ERROR"):
+            sent = await self.run_lifespan("lifespan.startup")
+
+        self.assertEqual(sent[0]["type"], "lifespan.startup.failed")
+        self.assertIn("api.apis", sent[0]["message"])
+
+    async def test_shutdown_failure_is_reported(self):
+        with patch("api.apis.proxy.aclose", new_callable=AsyncMock, side_effect=RuntimeError("pool busy")), \
+                self.assertLogs("round_robin.asgi", "ERROR"):
+            sent = await self.run_lifespan("lifespan.startup", "lifespan.shutdown")
+
+        self.assertEqual(sent[-1], {"type": "lifespan.shutdown.failed", "message": "RuntimeError('pool busy')"})
@@ -0,0 +1,151 @@
+import asyncio
+import io
+import json
+import random
+import unittest
+from unittest.mock import patch
+from api.handlers.batch_handler import BatchHandler, InvalidRecord, iter_records
+
+
+class FakeRequestHandler:
+    """ Echoes records after a random delay and tracks how many run at once """
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.running = 0
+        self.max_running = 0
+
+    async def handle_request(self, data, headers=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(random.uniform(0, 0.005))
+            if data.get("id") in self.fail_on:
+                return {"status": "error"}, 503
+            if data.get("id") == "boom":
+                raise RuntimeError("boom")
+            return data, 200
+        finally:
+            self.running -= 1
+
+
+class TestIterRecords(unittest.TestCase):
+
+    def test_json_array(self):
+        self.assertEqual(list(iter_records(io.BytesIO(b'\n [{"id": 1}, {"id": 2}]'))), [{"id": 1}, {"id": 2}])
+
+    def test_json_lines(self):
+        records = list(iter_records(io.BytesIO(b'{"id": 1}\n\n{"id": 2}\nnot json\n{"id": 3}')))
+
+        self.assertEqual(records[:2], [{"id": 1}, {"id": 2}])
+        self.assertIsInstance(records[2], InvalidRecord)
+        self.assertEqual(records[3], {"id": 3})
+
+    def test_empty_bodies(self):
+        for body in [b"", b"\n\n"]:
+            with self.subTest(body=body):
+                with self.assertRaises(ValueError):
+                    iter_records(io.BytesIO(body))
+
+    def test_broken_arrays_end_with_an_invalid_record(self):
+        for body, valid in [(b"[{", []), (b"[1, 2", [1, 2]), (b"[1 2]", [1]), (b"[1,]", [1]), (b'[1, "\xff"]', [])]:
+            with self.subTest(body=body):
+                records = list(iter_records(io.BytesIO(body)))
+
+                self.assertEqual(records[:-1], valid)
+                self.assertIsInstance(records[-1], InvalidRecord)
+
+    def test_array_is_parsed_across_chunks(self):
+        """ Records, numbers and multi-byte characters split at chunk boundaries come out whole """
+        expected = [{"id": i, "name": "ゲーマー" * (i % 7), "points": 12345 * i} for i in range(3000)]
+        body = json.dumps(expected, ensure_ascii=False).encode()
+
+        with patch("api.handlers.batch_handler.CHUNK_SIZE", 1000):
+            self.assertEqual(list(iter_records(io.BytesIO(body))), expected)
+        self.assertEqual(list(iter_records(io.BytesIO(b" [ ] "))), [])
+
+    def test_array_is_read_as_it_is_consumed(self):
+        body = io.BytesIO(json.dumps([{"id": i} for i in range(100000)]).encode())
+
+        with patch("api.handlers.batch_handler.CHUNK_SIZE", 1000):
+            records = iter_records(body)
+            next(records)
+
+        self.assertLess(body.tell(), 2000)
+
+
+class TestBatchHandler(unittest.IsolatedAsyncioTestCase):
+
+    async def collect(self, handler, records):
+        return [json.loads(line) async for line in handler.stream(iter(records))]
+
+    async def test_results_keep_input_order(self):
+        """ Records finish out of order but are reported in input order """
+        handler = BatchHandler(FakeRequestHandler(), concurrency=8, max_records=1000)
+
+        lines = await self.collect(handler, [{"id": i} for i in range(50)])
+
+        self.assertEqual([line["index"] for line in lines[:-1]], list(range(50)))
+        self.assertEqual([line["response"]["id"] for line in lines[:-1]], list(range(50)))
+        self.assertEqual(lines[-1], {"summary": {"total": 50, "succeeded": 50, "failed": 0}})
+
+    async def test_concurrency_is_bounded(self):
+        request_handler = FakeRequestHandler()
+        handler = BatchHandler(request_handler, concurrency=4, max_records=1000)
+
+        await self.collect(handler, [{"id": i} for i in range(40)])
+
+        self.assertLessEqual(request_handler.max_running, 4)
+        self.assertGreater(request_handler.max_running, 1)
+
+    async def test_partial_failures_are_reported(self):
+        """ Upstream errors, exceptions, bad lines and records over the limit get their own line """
+        handler = BatchHandler(FakeRequestHandler(fail_on={1}), concurrency=2, max_records=4)
+        records = [{"id": 0}, {"id": 1}, {"id": "boom"}, InvalidRecord("Invalid JSON"), {"id": 4}]
+
+        lines = await self.collect(handler, records)
+
+        self.assertEqual([line["status"] for line in lines[:-1]], [200, 503, 502, 400, 413])
+        self.assertEqual(lines[1]["error"], {"status": "error"})
+        self.assertEqual(lines[-1], {"summary": {"total": 5, "succeeded": 1, "failed": 4}})
+
+    async def test_reading_stops_at_the_record_limit(self):
+        """ One 413 line for the first record over the limit; the rest of the body is never read """
+        consumed = []
+        records = ({"id": consumed.append(i) or i} for i in range(1000))
+        handler = BatchHandler(FakeRequestHandler(), concurrency=2, max_records=3)
+
+        lines = [json.loads(line) async for line in handler.stream(records)]
+
+        self.assertEqual(len(consumed), 4)
+        self.assertEqual([line["status"] for line in lines[:-1]], [200, 200, 200, 413])
+        self.assertEqual(lines[-1], {"summary": {"total": 4, "succeeded": 3, "failed": 1}})
+
+    async def test_every_record_after_the_first_is_charged(self):
+        """ The request paid for the first record; the first refused record ends the batch with a 429 """
+        charges = []
+
+        async def throttle():
+            charges.append(1)
+            return "Request was throttled." if len(charges) > 2 else None
+
+        handler = BatchHandler(FakeRequestHandler(), concurrency=4, max_records=1000, throttle=throttle)
+        records = [{"id": 0}, InvalidRecord("Invalid JSON"), {"id": 2}, {"id": 3}, {"id": 4}, {"id": 5}]
+
+        lines = await self.collect(handler, records)
+
+        self.assertEqual(len(charges), 3)
+        self.assertEqual([line["status"] for line in lines[:-1]], [200, 400, 200, 200, 429])
+        self.assertEqual(lines[-2], {"index": 4, "status": 429, "error": "Request was throttled."})
+
+    async def test_closing_the_stream_cancels_in_flight_records(self):
+        """ A client disconnect stops the records still in the window """
+        request_handler = FakeRequestHandler()
+        handler = BatchHandler(request_handler, concurrency=4, max_records=1000)
+        stream = handler.stream(iter([{"id": i} for i in range(100)]))
+
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(request_handler.running, 0)
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.backends import BackendProfile, start_backends
+from benchmarks.report import find_regressions, get_skew, percentile
+from benchmarks.run import load_replay, parse_args, run_strategy
+
+
+class TestBenchmarkReport(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 1001))
+
+        self.assertEqual(percentile(values, 50), 500)
+        self.assertEqual(percentile(values, 99), 990)
+        self.assertEqual(percentile(values, 99.9), 999)
+        self.assertIsNone(percentile([], 50))
+
+    def test_skew_accounts_for_weights(self):
+        self.assertEqual(get_skew({"app1": 100, "app2": 100}), 1.0)
+        self.assertEqual(get_skew({"app1": 150, "app2": 50}), 1.5)
+        self.assertEqual(get_skew({"app1": 200, "app2": 100}, {"app1": 2, "app2": 1}), 1.0)
+
+    def test_regressions(self):
+        def report(throughput, p99):
+            return {"results": [{"strategy": "round_robin", "throughput_rps": throughput, "latency_ms": {"p99": p99}}]}
+
+        self.assertEqual(find_regressions(report(1000, 10), report(950, 11), 0.15), [])
+        self.assertEqual(len(find_regressions(report(1000, 10), report(800, 20), 0.15)), 2)
+
+    def test_profile_parsing(self):
+        self.assertEqual(BackendProfile.parse("latency=0.02,error_rate=0.1"), BackendProfile(latency=0.02, error_rate=0.1))
+        with self.assertRaises(ValueError):
+            BackendProfile.parse("speed=1")
+
+    def test_replay(self):
+        lines = [{"body": {"gamerID": "A"}, "headers": {"Idempotency-Key": "1"}}, {"gamerID": "B"}]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as file:
+            file.write("\n".join(json.dumps(line) for line in lines) + "\n\n")
+        try:
+            payloads = load_replay(file.name)
+        finally:
+            os.remove(file.name)
+
+        self.assertEqual(payloads, [({"gamerID": "A"}, {"Idempotency-Key": "1"}), ({"gamerID": "B"}, {})])
+
+
+class TestBenchmarkRun(unittest.IsolatedAsyncioTestCase):
+
+    async def run_against(self, strategy, profiles, *args):
+        backends = await start_backends(profiles, seed=1)
+        try:
+            options = parse_args(["--requests", "200", "--warmup", "0", "--concurrency", "8", *args])
+            return await run_strategy(strategy, backends, [({"gamerID": "GYUTDTE"}, {})], options)
+        finally:
+            for backend in backends:
+                await backend.stop()
+
+    async def test_round_robin_against_stub_backends(self):
+        """ Real proxy, real HTTP on loopback: every request succeeds and lands evenly """
+        result = await self.run_against("round_robin", [BackendProfile(latency=0.001, jitter=0)] * 2)
+
+        self.assertEqual(result["succeeded"], 200)
+        self.assertEqual(result["distribution"], {"app1": 100, "app2": 100})
+        self.assertEqual(result["skew"], 1.0)
+        self.assertLessEqual(result["latency_ms"]["p50"], result["latency_ms"]["p99"])
+
+    async def test_failing_backend_is_retried_elsewhere(self):
+        profiles = [BackendProfile(latency=0.001), BackendProfile(latency=0.001, error_rate=1)]
+
+        result = await self.run_against("least_connections", profiles, "--recovery-time", "60")
+
+        self.assertEqual(result["succeeded"], 200)
+        self.assertEqual(result["marked_failed"], result["backend_errors"])
+        self.assertLessEqual(result["backend_errors"], 8)  # Only requests already in flight when it was taken out
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from api.adapters.circuit_breaker_adapter import CircuitBreaker, CircuitBreakerAdapter
+
+URL = "http://app1:8000/api/process/"
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, open_timeout=10, half_open_max_calls=1)
+
+    @patch("api.adapters.circuit_breaker_adapter.time.monotonic")
+    def test_opens_after_threshold_and_half_opens_after_timeout(self, mock_monotonic):
+        """ The circuit opens after repeated failures and lets one trial through after the timeout """
+        mock_monotonic.return_value = 0
+        self.assertFalse(self.breaker.record_failure())
+        self.assertTrue(self.breaker.record_failure())
+        self.assertFalse(self.breaker.allow_request())
+        self.assertTrue(self.breaker.is_open())
+
+        mock_monotonic.return_value = 10
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())  # Trial budget used up
+
+    @patch("api.adapters.circuit_breaker_adapter.time.monotonic", return_value=0)
+    def test_half_open_failure_reopens(self, mock_monotonic):
+        """ A failed trial opens the circuit again """
+        self.breaker.state = CircuitBreaker.HALF_OPEN
+
+        self.assertTrue(self.breaker.record_failure())
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_success_closes(self):
+        """ A successful trial closes the circuit """
+        self.breaker.state = CircuitBreaker.HALF_OPEN
+
+        self.assertTrue(self.breaker.record_success())
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestCircuitBreakerAdapter(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.inner = AsyncMock()
+        self.on_state_change = MagicMock()
+        self.adapter = CircuitBreakerAdapter(self.inner, on_state_change=self.on_state_change)
+
+    @patch("api.adapters.circuit_breaker_adapter.threading.Timer")
+    async def test_open_circuit_fails_fast(self, mock_timer):
+        """ Once open, requests return None without calling the backend """
+        self.inner.post.return_value = None
+        for _ in range(5):
+            await self.adapter.post(URL, json={})
+
+        self.assertTrue(self.adapter.is_open(URL))
+        self.on_state_change.assert_called_once()
+        mock_timer.return_value.start.assert_called_once()
+
+        self.inner.post.reset_mock()
+        self.assertIsNone(await self.adapter.post(URL, json={}))
+        self.inner.post.assert_not_called()
+        self.assertTrue(self.adapter.failed_fast())
+
+    async def test_server_errors_count_as_failures(self):
+        """ 5xx responses are returned but count against the circuit """
+        self.inner.post.return_value = MagicMock(status_code=503)
+
+        response = await self.adapter.post(URL, json={})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.adapter.get_breaker(URL).failures, 1)
+        self.assertFalse(self.adapter.failed_fast())  # A real failure, not a fail-fast
+
+    async def test_cancelled_trial_is_released(self):
+        """ A cancelled half-open trial frees its slot for the next request """
+        breaker = self.adapter.get_breaker(URL)
+        breaker.state = CircuitBreaker.HALF_OPEN
+
+        async def hang(url, json):
+            await asyncio.sleep(10)
+
+        self.inner.post.side_effect = hang
+        task = asyncio.create_task(self.adapter.post(URL, json={}))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertEqual(breaker.trials, 0)
@@ -0,0 +1,126 @@
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from api.monitoring.routing_table import RoutingTable
+from api.proxies.consistent_hash import ConsistentHashProxy
+
+INSTANCES = [f"http://app{number}:8000/api/process/" for number in range(1, 6)]
+KEYS = [f"PLAYER_{number}" for number in range(2000)]
+
+
+class TestConsistentHashProxy(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        """Setup mock dependencies before each test."""
+        self.mock_http_client = AsyncMock()
+        self.mock_health_checker = MagicMock()
+        self.mock_health_checker.get_healthy_instances.return_value = INSTANCES
+
+        self.proxy = ConsistentHashProxy(
+            instance_manager=MagicMock(),
+            http_client=self.mock_http_client,
+            health_checker=self.mock_health_checker,
+            system_monitor=MagicMock(),
+        )
+        self.mock_health_checker.add_listener.assert_called_once_with(self.proxy.on_routing_table)
+        self.publish(INSTANCES)
+
+    def publish(self, instances):
+        """Stands in for the health checker notifying its listeners"""
+        self.proxy.on_routing_table(RoutingTable(version=0, instances=tuple(instances)))
+
+    def route(self, instances, keys=KEYS):
+        self.publish(instances)
+        return {key: self.proxy.select_instance(instances, set(), key=key) for key in keys}
+
+    def test_same_key_routes_to_same_instance(self):
+        """Requests for one player keep hitting the same instance"""
+        first = self.route(INSTANCES)
+
+        self.assertEqual(first, self.route(INSTANCES))
+        self.assertEqual(set(first.values()), set(INSTANCES))
+
+    def test_removing_instance_only_moves_its_keys(self):
+        """Only keys owned by the removed instance are remapped"""
+        before = self.route(INSTANCES)
+        after = self.route(INSTANCES[:-1])
+
+        moved = [key for key in KEYS if before[key] != after[key]]
+        self.assertTrue(all(before[key] == INSTANCES[-1] for key in moved))
+        self.assertLess(len(moved), len(KEYS) * 0.35)
+
+    def test_adding_instance_back_restores_mapping(self):
+        """Incremental rebuilds end up with the same ring as a full build"""
+        before = self.route(INSTANCES)
+        self.route(INSTANCES[:-1])
+
+        self.assertEqual(before, self.route(INSTANCES))
+
+    def test_ring_is_replaced_not_mutated(self):
+        """Lookups running while the ring is rebuilt on another thread always see a complete ring"""
+        ring = self.proxy.update_ring(INSTANCES)
+        hashes = ring.hashes
+        self.proxy.update_ring(INSTANCES[:-1])
+        self.assertEqual(ring.hashes, hashes)  # The old snapshot is untouched
+
+        errors, stop = [], threading.Event()
+
+        def rebuild():
+            while not stop.is_set():
+                self.proxy.update_ring(list(INSTANCES[:-1]))
+                self.proxy.update_ring(list(INSTANCES))
+
+        thread = threading.Thread(target=rebuild)
+        thread.start()
+        try:
+            for key in KEYS * 5:
+                try:
+                    self.assertIn(self.proxy.select_instance(self.proxy.ring.source, set(), key=key), INSTANCES)
+                except Exception as exc:  # IndexError or a foreign owner from a half-built ring
+                    errors.append(exc)
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+    def test_lookups_do_not_rebuild_the_ring(self):
+        """select_instance only reads the published ring, whatever list it is handed"""
+        ring = self.proxy.ring
+
+        self.proxy.select_instance(INSTANCES[:2], set(), key="PLAYER_1")
+
+        self.assertIs(self.proxy.ring, ring)
+
+    def test_hot_key_spills_over_bounded_load(self):
+        """A key whose instance is at capacity is sent to the next instance on the ring"""
+        home = self.proxy.select_instance(INSTANCES, set(), key="HOT_PLAYER")
+        self.proxy.in_flight = {home: 10}
+
+        self.assertNotEqual(self.proxy.select_instance(INSTANCES, set(), key="HOT_PLAYER"), home)
+
+    def test_tried_instance_is_skipped(self):
+        """Retries move to the next instance on the ring"""
+        home = self.proxy.select_instance(INSTANCES, set(), key="PLAYER_1")
+
+        self.assertNotEqual(self.proxy.select_instance(INSTANCES, {home}, key="PLAYER_1"), home)
+
+    def test_hash_key_from_body_or_header(self):
+        """The header takes precedence over the body field when configured"""
+        self.assertEqual(self.proxy.get_hash_key({"gamerID": "TEST_USER"}), "TEST_USER")
+        self.assertIsNone(self.proxy.get_hash_key({"game": "Mobile Legends"}))
+
+        self.proxy.key_header = "X-Player"
+        self.assertEqual(self.proxy.get_hash_key({"gamerID": "TEST_USER"}, {"X-Player": "P1"}), "P1")
+
+    async def test_forward_request_uses_body_key(self):
+        """forward_request routes by the gamerID in the payload"""
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"gamerID": "TEST_USER"}
+        self.mock_http_client.post.return_value = mock_response
+        expected = self.proxy.select_instance(INSTANCES, set(), key="TEST_USER")
+
+        await self.proxy.forward_request({"gamerID": "TEST_USER"})
+
+        self.assertEqual(self.mock_http_client.post.await_args.args[0], expected)
+        self.assertEqual(self.proxy.in_flight, {})
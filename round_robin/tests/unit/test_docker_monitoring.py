@@ -1,7 +1,8 @@
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 import docker
-from api.monitoring.system_monitor_docker import DockerSystemMonitor
+from api.monitoring.system_monitor_docker import ContainerStats, DockerSystemMonitor
 
 class TestDockerSystemMonitor(unittest.TestCase):
 
@@ -117,3 +118,59 @@ class TestDockerSystemMonitor(unittest.TestCase):
 
         result = self.monitor.get_memory_usage("mock_container")
         self.assertIsNone(result)
+
+    def test_cached_reading_skips_docker_calls(self):
+        """ A fresh streamed reading is served without touching the Docker API """
+        self.monitor.readings["mock_container"] = ContainerStats(12.5, 34.0, time.monotonic())
+
+        self.assertEqual(self.monitor.get_cpu_usage("mock_container"), 12.5)
+        self.assertEqual(self.monitor.get_memory_usage("mock_container"), 34.0)
+        self.mock_client.containers.get.assert_not_called()
+
+    def test_stale_reading_falls_back_to_one_shot_stats(self):
+        """ Readings older than DOCKER_STATS_MAX_AGE are ignored """
+        self.monitor.readings["mock_container"] = ContainerStats(12.5, 34.0, time.monotonic() - 60)
+        mock_container = MagicMock()
+        mock_container.status = "exited"
+        self.mock_client.containers.get.return_value = mock_container
+
+        self.assertIsNone(self.monitor.get_cpu_usage("mock_container"))
+        self.mock_client.containers.get.assert_called_once_with("mock_container")
+
+    def test_collect_computes_cpu_and_memory_from_same_sample(self):
+        """ The collector caches CPU and Memory of each streamed sample and clears it when the stream ends """
+        samples = [
+            {"cpu_stats": {"cpu_usage": {"total_usage": 100}}, "precpu_stats": {"cpu_usage": {"total_usage": 0}}},
+            {
+                "cpu_stats": {"cpu_usage": {"total_usage": 300000}, "system_cpu_usage": 2000000},
+                "precpu_stats": {"cpu_usage": {"total_usage": 100000}, "system_cpu_usage": 1000000},
+                "memory_stats": {"usage": 250, "limit": 1000},
+            },
+        ]
+        seen = []
+
+        def stream():
+            for sample in samples:
+                yield sample
+                seen.append(self.monitor.readings.get("mock_container"))
+
+        self.mock_client.containers.get.return_value.stats.return_value = stream()
+        self.monitor.watched = frozenset({"mock_container"})
+
+        self.monitor.collect("mock_container")
+
+        self.assertIsNone(seen[0])  # First sample has no previous CPU reading
+        self.assertEqual(seen[1][:2], (20.0, 25.0))
+        self.assertNotIn("mock_container", self.monitor.readings)
+        self.mock_client.containers.get.return_value.stats.assert_called_once_with(stream=True, decode=True)
+
+    @patch("api.monitoring.system_monitor_docker.threading.Thread")
+    def test_watch_starts_one_collector_per_container(self, mock_thread):
+        """ Watching the same containers again does not start duplicate collectors """
+        mock_thread.return_value.is_alive.return_value = True
+
+        self.monitor.watch(["app1", "app2"])
+        self.monitor.watch(["app1", "app2"])
+
+        self.assertEqual(mock_thread.call_count, 2)
+        self.assertEqual(self.monitor.watched, frozenset({"app1", "app2"}))
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import time
+import threading
 from api.monitoring.health_checker import HealthChecker
 
 class TestHealthChecker(unittest.TestCase):
@@ -66,6 +67,38 @@ class TestHealthChecker(unittest.TestCase):
         result = self.health_checker.is_container_overloaded("mock_container")
         self.assertFalse(result)
 
+    def test_update_instance_weights_uses_headroom_and_labels(self):
+        """ Weights scale the Docker label weight by the remaining CPU/Memory headroom """
+        self.health_checker.instances = ["http://app1:8000/api/process/", "http://app2:8000/api/process/"]
+        self.mock_docker_adapter.get_container_labels.side_effect = lambda name: {"app1": {"lb.weight": "2"}}.get(name, {})
+        self.mock_system_monitor.get_cpu_usage.side_effect = lambda name: {"app1": 40, "app2": 60}[name]
+        self.mock_system_monitor.get_memory_usage.return_value = 20
+
+        self.health_checker.update_instance_weights()
+
+        self.assertEqual(self.health_checker.instance_weights, {
+            "http://app1:8000/api/process/": 2 * 0.5,  # CPU 40% of an 80% budget
+            "http://app2:8000/api/process/": 0.25,
+        })
+
+    def test_discovery_events_reread_weight_labels(self):
+        """ A container recreated under the same name may come back with a different weight label """
+        self.mock_docker_adapter.get_container_labels.return_value = {"lb.weight": "2"}
+        self.assertEqual(self.health_checker.get_static_weight("app1"), 2.0)
+
+        self.mock_docker_adapter.get_container_labels.return_value = {"lb.weight": "0"}
+        self.assertEqual(self.health_checker.get_static_weight("app1"), 2.0)  # Cached between events
+        self.health_checker.on_instances_changed(["http://app1:8000/api/process/"])
+
+        self.assertEqual(self.health_checker.get_static_weight("app1"), 0.0)
+
+    def test_headroom_is_floored(self):
+        """ Busy containers keep a minimum weight instead of dropping to zero """
+        self.mock_system_monitor.get_cpu_usage.return_value = 79.9
+        self.mock_system_monitor.get_memory_usage.return_value = None
+
+        self.assertEqual(self.health_checker.get_headroom("mock_container"), 0.1)
+
     def test_mark_failed(self):
         """ Test that a failed instance is correctly marked """
         instance_url = "http://mockserver:8000/api/process/"
@@ -97,7 +130,173 @@ class TestHealthChecker(unittest.TestCase):
         self.health_checker.check_instances_health()
         self.assertIn(instance_url, self.health_checker.failed_instances)
 
+    @patch("api.monitoring.health_checker.settings.HEALTH_PROBE_JITTER", 0)
+    def test_check_instances_health_probes_in_parallel(self):
+        """ A sweep over several slow probes takes about as long as one probe """
+        failed = [f"http://app{number}:8000/api/process/" for number in range(4)]
+        self.health_checker.failed_instances.update(failed)
+
+        def slow_probe(instance_url):
+            time.sleep(0.3)
+            return True
+
+        started = time.monotonic()
+        with patch.object(self.health_checker, "probe_instance", side_effect=slow_probe):
+            self.health_checker.check_instances_health()
+
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(self.health_checker.failed_instances, set())
+
+    @patch("api.monitoring.health_checker.settings.HEALTH_PROBE_JITTER", 0)
+    @patch("api.monitoring.health_checker.settings.HEALTH_PROBE_TIMEOUT", 0.1)
+    def test_check_instances_health_probe_deadline(self):
+        """ Probes that exceed their deadline leave the instance failed and are not resubmitted """
+        instance_url = "http://mockserver:8000/api/process/"
+        self.health_checker.failed_instances.add(instance_url)
+        release = threading.Event()
+
+        with patch.object(self.health_checker, "probe_instance", side_effect=lambda url: release.wait(2)) as probe:
+            self.health_checker.check_instances_health()
+            self.health_checker.check_instances_health()
+            release.set()
+
+        self.assertIn(instance_url, self.health_checker.failed_instances)
+        self.assertEqual(probe.call_count, 1)
+
+    def test_record_result_ejects_outlier_until_backoff_expires(self):
+        """ Ejected outliers leave the routing table and are not probed while their ejection runs """
+        instance_url = "http://mockserver:8000/api/process/"
+        self.health_checker.instances = [instance_url, "http://other:8000/api/process/"]
+        self.health_checker.outlier_detector = MagicMock()
+        self.health_checker.outlier_detector.record.return_value = True
+        self.health_checker.outlier_detector.is_ejected.return_value = True
+
+        self.health_checker.record_result(instance_url, 0.2, False)
+
+        self.assertNotIn(instance_url, self.health_checker.get_healthy_instances())
+        with patch.object(self.health_checker, "probe_instance") as probe:
+            self.health_checker.check_instances_health()
+        probe.assert_not_called()
+
+    def test_fail_fast_is_not_an_outlier_failure(self):
+        """ Requests rejected by an open circuit are not recorded again by outlier detection """
+        instance_url = "http://mockserver:8000/api/process/"
+        self.health_checker.outlier_detector = MagicMock()
+        self.health_checker.circuit_breakers = MagicMock()
+        self.health_checker.circuit_breakers.failed_fast.return_value = True
+
+        self.health_checker.record_result(instance_url, 0.0, False)
+        self.health_checker.outlier_detector.record.assert_not_called()
+
+        self.health_checker.circuit_breakers.failed_fast.return_value = False
+        self.health_checker.record_result(instance_url, 0.2, False)
+        self.health_checker.outlier_detector.record.assert_called_once()
+
+    def test_outlier_cap_uses_full_pool(self):
+        """ Sweeps cap ejections by every instance, like the request path does """
+        self.health_checker.instances = [f"http://app{number}:8000/api/process/" for number in range(1, 5)]
+        self.health_checker.failed_instances.add(self.health_checker.instances[0])
+        self.health_checker.publish_routing_table()
+        self.health_checker.outlier_detector = MagicMock()
+        self.health_checker.outlier_detector.analyze.return_value = []
+
+        self.health_checker.eject_outliers()
+
+        self.health_checker.outlier_detector.analyze.assert_called_once_with(self.health_checker.get_healthy_instances(), 4)
+
+    def test_open_circuits_are_skipped(self):
+        """ Instances with an open circuit are left out of the routing table """
+        self.health_checker.instances = ["http://app1:8000/api/process/", "http://app2:8000/api/process/"]
+        self.health_checker.circuit_breakers = MagicMock()
+        self.health_checker.circuit_breakers.is_open.side_effect = lambda url: "app1" in url
+
+        self.health_checker.publish_routing_table()
+
+        self.assertEqual(self.health_checker.get_healthy_instances(), ("http://app2:8000/api/process/",))
+
     def test_stop_health_checker(self):
         """ Ensures that stopping the health checker sets `running` to False. """
         self.health_checker.stop()
         self.assertFalse(self.health_checker.running)
+
+    def test_routing_table_published_on_failure_and_recovery(self):
+        """ Marking an instance failed or recovered publishes a new snapshot version """
+        instance_url = "http://mockserver:8000/api/process/"
+        self.health_checker.instances = [instance_url, "http://other:8000/api/process/"]
+        self.health_checker.publish_routing_table()
+        version = self.health_checker.routing_table.version
+
+        self.health_checker.mark_failed(instance_url)
+        self.assertEqual(self.health_checker.get_healthy_instances(), ("http://other:8000/api/process/",))
+        self.assertEqual(self.health_checker.routing_table.version, version + 1)
+
+        self.mock_docker_adapter.get_container_status.return_value = "running"
+        self.mock_system_monitor.get_cpu_usage.return_value = 10
+        self.mock_system_monitor.get_memory_usage.return_value = 10
+        with patch.object(self.health_checker, "is_application_healthy", return_value=True):
+            self.health_checker.check_instances_health()
+
+        self.assertEqual(self.health_checker.routing_table.version, version + 2)
+        self.assertIn(instance_url, self.health_checker.get_healthy_instances())
+
+    def test_on_instances_changed_publishes_immediately(self):
+        """ Discovery events update the routing table without waiting for the health loop """
+        self.mock_instance_manager.add_listener.assert_called_once_with(self.health_checker.on_instances_changed)
+
+        self.health_checker.on_instances_changed(["http://app4:8000/api/process/"])
+
+        self.assertEqual(self.health_checker.get_healthy_instances(), ("http://app4:8000/api/process/",))
+        self.mock_system_monitor.watch.assert_called_with(["app4"])
+
+    def test_get_healthy_instances_returns_snapshot_without_copying(self):
+        """ The request path reads the published tuple as-is """
+        self.health_checker.instances = ["http://mockserver:8000/api/process/"]
+        self.health_checker.publish_routing_table()
+
+        self.assertIs(self.health_checker.get_healthy_instances(), self.health_checker.get_healthy_instances())
+
+    def test_unchanged_instances_keep_version(self):
+        """ Re-publishing the same healthy set does not bump the version """
+        self.health_checker.instances = ["http://mockserver:8000/api/process/"]
+        self.health_checker.publish_routing_table()
+        table = self.health_checker.routing_table
+
+        self.health_checker.publish_routing_table()
+
+        self.assertIs(self.health_checker.routing_table, table)
+
+    def test_listeners_receive_published_tables(self):
+        """ A listener gets the current table right away, then every new version """
+        tables = []
+        self.health_checker.add_listener(tables.append)
+
+        self.health_checker.instances = ["http://mockserver:8000/api/process/"]
+        self.health_checker.publish_routing_table()
+        self.health_checker.publish_routing_table()
+
+        self.assertEqual([table.instances for table in tables], [(), ("http://mockserver:8000/api/process/",)])
+
+    @patch("api.monitoring.health_checker.settings.HEALTH_CHECK_INTERVAL", 0.01)
+    def test_failed_sweep_does_not_stop_health_loop(self):
+        """ An exception in one sweep (e.g. Docker unreachable) is logged and the next sweep still runs """
+        self.health_checker.stop()
+        calls = []
+
+        def get_instances():
+            calls.append(None)
+            if len(calls) == 2:
+                raise RuntimeError("Docker is unreachable")
+            return ["http://mockserver:8000/api/process/"]
+
+        self.mock_instance_manager.get_instances.side_effect = get_instances
+        with patch("api.monitoring.health_checker.DockerAdapter"):
+            health_checker = HealthChecker(self.mock_instance_manager, self.mock_system_monitor)
+        try:
+            with self.assertLogs("api.monitoring.health_checker", level="ERROR"):
+                deadline = time.monotonic() + 2
+                while len(calls) < 4 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+        finally:
+            health_checker.stop()
+
+        self.assertGreaterEqual(len(calls), 4)
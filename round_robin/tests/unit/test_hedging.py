@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from api.proxies.hedging import HedgingPolicy
+from api.proxies.round_robin import RoundRobinProxy
+
+INSTANCES = ("http://server1:8000/api/process", "http://server2:8000/api/process")
+IDEMPOTENT = {"Idempotency-Key": "abc"}
+
+
+def ok_response(body):
+    response = MagicMock(status_code=200)
+    response.json.return_value = body
+    return response
+
+
+class TestHedgingPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = HedgingPolicy()
+
+    def test_delay_follows_latency_percentile(self):
+        """ The hedge delay is the configured percentile of recent latencies """
+        self.assertIsNone(self.policy.delay())
+
+        for number in range(1, 101):
+            self.policy.record(number / 1000)
+
+        self.assertAlmostEqual(self.policy.delay(), 0.096)
+
+    def test_budget_caps_extra_load(self):
+        """ With a 10% budget only one hedge is allowed per ten requests """
+        hedges = 0
+        for _ in range(100):
+            self.policy.earn()
+            hedges += self.policy.try_spend()
+
+        self.assertEqual(hedges, 10)
+
+    def test_only_idempotent_requests_are_hedged(self):
+        """ Requests need the idempotency header unless every request is treated as idempotent """
+        self.assertTrue(self.policy.is_idempotent(IDEMPOTENT))
+        self.assertFalse(self.policy.is_idempotent({}))
+
+        self.policy.all_requests = True
+        self.assertTrue(self.policy.is_idempotent(None))
+
+
+class TestHedgedForwarding(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.mock_http_client = AsyncMock()
+        self.mock_health_checker = MagicMock()
+        self.mock_health_checker.get_healthy_instances.return_value = INSTANCES
+        self.proxy = RoundRobinProxy(MagicMock(), self.mock_http_client, self.mock_health_checker, MagicMock())
+        self.proxy.hedging = HedgingPolicy()
+        self.proxy.hedging.current_delay = 0.01
+        self.proxy.hedging.tokens = 100.0
+        self.cancelled = []
+
+        async def post(url, json):
+            if url == INSTANCES[0]:
+                try:
+                    await asyncio.sleep(5)  # Stalled backend
+                except asyncio.CancelledError:
+                    self.cancelled.append(url)
+                    raise
+            return ok_response({"served_by": url})
+
+        self.mock_http_client.post.side_effect = post
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        """ The hedge answers first and the stalled request is cancelled """
+        response, status = await asyncio.wait_for(self.proxy.forward_request({"test": "data"}, headers=IDEMPOTENT), 1)
+        await asyncio.sleep(0)
+
+        self.assertEqual((response, status), ({"served_by": INSTANCES[1]}, 200))
+        self.assertEqual(self.cancelled, [INSTANCES[0]])
+        self.mock_health_checker.record_result.assert_called_once()  # The cancelled loser is not a failure
+
+    async def test_no_hedge_without_budget(self):
+        """ Without budget the request waits for the first instance """
+        self.proxy.hedging.tokens = 0.0
+        self.proxy.hedging.budget_percent = 0.0
+
+        task = asyncio.create_task(self.proxy.forward_request({"test": "data"}, headers=IDEMPOTENT))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.mock_http_client.post.await_count, 1)
+        task.cancel()
+
+    async def test_non_idempotent_request_is_not_hedged(self):
+        """ Requests without the idempotency header are never duplicated """
+        task = asyncio.create_task(self.proxy.forward_request({"test": "data"}))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.mock_http_client.post.await_count, 1)
+        task.cancel()
+
+    async def test_budget_is_earned_once_per_request(self):
+        """ Retries of one client request do not add to the hedge budget """
+        self.proxy.hedging.current_delay = None
+        self.proxy.hedging.tokens = 0.0
+        self.mock_http_client.post.side_effect = [MagicMock(status_code=500), ok_response({"ok": True})]
+
+        response, status = await self.proxy.forward_request({"test": "data"}, headers=IDEMPOTENT)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(self.mock_http_client.post.await_count, 2)
+        self.assertEqual(self.proxy.hedging.tokens, self.proxy.hedging.budget_percent)
@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import httpx
+from api.adapters.httpx_adapter import HttpxAdapter
+
+
+def mock_transport(handler):
+    """ Builds an adapter whose pooled clients use an in-memory transport """
+    adapter = HttpxAdapter()
+    adapter.build_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler), limits=adapter.limits)
+    return adapter
+
+
+class TestHttpxAdapter(unittest.IsolatedAsyncioTestCase):
+
+    async def test_client_is_reused_per_backend(self):
+        """ Consecutive requests to the same backend share one pooled client """
+        adapter = mock_transport(lambda request: httpx.Response(200, json={"ok": True}))
+
+        first = adapter.get_client("http://app1:8000/api/process/")
+        await adapter.post("http://app1:8000/api/process/", json={"test": "data"})
+        second = adapter.get_client("http://app1:8000/api/process/health")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, adapter.get_client("http://app2:8000/api/process/"))
+
+    async def test_post_returns_response(self):
+        """ Upstream responses are returned unchanged """
+        adapter = mock_transport(lambda request: httpx.Response(200, json={"echo": True}))
+
+        response = await adapter.post("http://app1:8000/api/process/", json={"test": "data"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"echo": True})
+
+    async def test_post_returns_none_on_request_error(self):
+        """ Transport errors are reported as None so the proxy can retry """
+        def fail(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        adapter = mock_transport(fail)
+
+        self.assertIsNone(await adapter.post("http://app1:8000/api/process/", json={}))
+
+    async def test_stream_forwards_raw_bytes(self):
+        """ Pass-through requests send the body and headers unchanged and leave the response unread """
+        seen = {}
+
+        def handler(request):
+            seen["body"] = request.content
+            seen["type"] = request.headers["content-type"]
+            return httpx.Response(404, stream=httpx.ByteStream(b'{"detail":"nope"}'), headers={"X-Upstream": "app1"})
+
+        adapter = mock_transport(handler)
+        response = await adapter.stream(
+            "http://app1:8000/api/process/", b'{"test": "data"}', headers={"Content-Type": "application/json"}
+        )
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+        await response.aclose()
+
+        self.assertEqual(seen, {"body": b'{"test": "data"}', "type": "application/json"})
+        self.assertEqual((response.status_code, response.headers["x-upstream"], body), (404, "app1", b'{"detail":"nope"}'))
+
+    async def test_aclose_closes_pooled_clients(self):
+        """ Shutdown closes the clients of the running loop and a new one is created afterwards """
+        adapter = mock_transport(lambda request: httpx.Response(200))
+        client = adapter.get_client("http://app1:8000/api/process/")
+
+        await adapter.aclose()
+
+        self.assertTrue(client.is_closed)
+        self.assertIsNot(client, adapter.get_client("http://app1:8000/api/process/"))
+
+    def test_clients_are_scoped_to_event_loop(self):
+        """ Each event loop gets its own pool """
+        adapter = mock_transport(lambda request: httpx.Response(200))
+
+        async def get_client():
+            return adapter.get_client("http://app1:8000/api/process/")
+
+        self.assertIsNot(asyncio.run(get_client()), asyncio.run(get_client()))
+
+    def test_clients_of_closed_loops_are_evicted(self):
+        """ A new loop drops the pools of loops that were closed without aclose() """
+        adapter = mock_transport(lambda request: httpx.Response(200))
+
+        async def get_client():
+            return adapter.get_client("http://app1:8000/api/process/")
+
+        for _ in range(3):
+            asyncio.run(get_client())
+
+        self.assertEqual(len(adapter._clients), 1)
+
+    def test_explicit_zero_limits_are_kept(self):
+        """ 0 means "no keep-alive", not "use the default" """
+        adapter = HttpxAdapter(max_keepalive_connections=0, keepalive_expiry=0)
+
+        self.assertEqual((adapter.limits.max_keepalive_connections, adapter.limits.keepalive_expiry), (0, 0))
+
+    @patch("api.adapters.httpx_adapter.HTTP2_AVAILABLE", False)
+    def test_http2_falls_back_without_h2(self):
+        """ HTTP/2 is silently disabled when the h2 package is missing """
+        self.assertFalse(HttpxAdapter(http2=True).http2)
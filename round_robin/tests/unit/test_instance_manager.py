@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from api.proxies.instance_manager import InstanceManager
+
+
+def container_event(action, name):
+    return {"Type": "container", "Action": action, "Actor": {"Attributes": {"name": name}}}
+
+
+class TestInstanceManager(unittest.TestCase):
+
+    def setUp(self):
+        """ Set up an instance manager with a mocked Docker adapter """
+        with patch("api.proxies.instance_manager.DockerAdapter") as MockDockerAdapter:
+            self.mock_docker_adapter = MockDockerAdapter.return_value
+            self.manager = InstanceManager()
+        self.mock_docker_adapter.get_running_containers.return_value = ["app1", "app2"]
+        self.listener = MagicMock()
+        self.manager.add_listener(self.listener)
+
+    def test_get_instances_lists_containers_when_not_watching(self):
+        """ Without the event cache every call lists containers """
+        self.assertEqual(self.manager.get_instances(), [
+            "http://app1:8000/api/process/",
+            "http://app2:8000/api/process/",
+        ])
+        self.assertEqual(self.mock_docker_adapter.get_running_containers.call_count, 1)
+
+    def test_get_instances_uses_event_cache_after_resync(self):
+        """ Once synced, reads come from the cache without Docker calls """
+        self.manager.resync()
+        self.manager.get_instances()
+        self.manager.get_instances()
+
+        self.assertEqual(self.mock_docker_adapter.get_running_containers.call_count, 1)
+        self.listener.assert_called_once()
+
+    def test_start_event_adds_instance(self):
+        """ A started container is added and listeners are notified immediately """
+        self.manager.resync()
+        self.manager.handle_event(container_event("start", "app3"))
+
+        self.assertIn("http://app3:8000/api/process/", self.manager.get_instances())
+        self.listener.assert_called_with([
+            "http://app1:8000/api/process/",
+            "http://app2:8000/api/process/",
+            "http://app3:8000/api/process/",
+        ])
+
+    def test_die_and_unhealthy_events_remove_instance(self):
+        """ Dead or unhealthy containers stop receiving traffic """
+        self.manager.resync()
+        self.manager.handle_event(container_event("die", "app1"))
+        self.manager.handle_event(container_event("health_status: unhealthy", "app2"))
+
+        self.assertEqual(self.manager.get_instances(), [])
+
+    def test_unrelated_containers_are_ignored(self):
+        """ Events for containers outside the pool do not change anything """
+        self.manager.resync()
+        self.listener.reset_mock()
+
+        self.manager.handle_event(container_event("start", "redis_cache"))
+        self.manager.handle_event(container_event("start", "app1"))  # Already known
+
+        self.listener.assert_not_called()
+
+    def test_resync_corrects_missed_events(self):
+        """ A full resync replaces the cache with Docker's view """
+        self.manager.resync()
+        self.mock_docker_adapter.get_running_containers.return_value = ["app2"]
+
+        self.manager.resync()
+
+        self.assertEqual(self.manager.get_instances(), ["http://app2:8000/api/process/"])
@@ -0,0 +1,69 @@
+import datetime
+import decimal
+import json
+import random
+import unittest
+import uuid
+from unittest.mock import patch
+from api import json_codec
+from api.json_codec import dumps, loads, stdlib_dumps
+
+# Everything the proxy and the application instances send around, plus the awkward corners of JSON
+CORPUS = [
+    {"gamerID": "GYUTDTE", "earnedPoints": 20, "gameName": "Mobile Legend"},
+    {"status": "error", "retry_after_seconds": 30, "nested": {"list": [1, 2.5, None, True, False, "x"]}},
+    [],
+    {},
+    "",
+    0,
+    -1,
+    2 ** 63 - 1,
+    2 ** 70,  # Beyond orjson's 64-bit integers
+    {"unicode": "héllo wörld ✓ 🎮 日本語", "escapes": "quote \" backslash \\ slash / tab \t newline \n"},
+    {"control": "\x00\x01\x1f\x7f", "separators": "line paragraph "},
+    {"floats": [0.0, -0.0, 0.1, 1.5, 100.0, 3.141592653589793, 1e16, 1.5e300, 1e-5, 0.00012, 123456.789]},
+    {1: "int key", 2.5: "float key", None: "null key", True: "bool key"},  # Non-str keys
+    {"decimal": decimal.Decimal("1.10"), "uuid": uuid.UUID(int=1)},
+    {"when": datetime.datetime(2025, 3, 1, 12, 30, 15, 123456), "day": datetime.date(2025, 3, 1)},
+    {"deep": [[[[{"a": [{"b": "c"}]}]]]]},
+    ("tuple", "as", "list"),
+]
+
+
+def random_floats(count=2000, seed=7):
+    rng = random.Random(seed)
+    return [rng.uniform(-1, 1) * 10 ** rng.randint(-20, 20) for _ in range(count)]
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def test_dumps_matches_stdlib(self):
+        """ orjson output is byte-for-byte the stdlib reference, or the reference itself """
+        for value in CORPUS + random_floats():
+            with self.subTest(value=value):
+                self.assertEqual(dumps(value), stdlib_dumps(value))
+
+    def test_dumps_without_orjson(self):
+        """ Missing orjson falls back to the stdlib """
+        with patch.object(json_codec, "orjson", None):
+            for value in CORPUS:
+                self.assertEqual(dumps(value), stdlib_dumps(value))
+
+    def test_loads_matches_stdlib(self):
+        for value in CORPUS[:12] + random_floats(500):
+            encoded = json.dumps(value, default=str)
+            with self.subTest(encoded=encoded):
+                self.assertEqual(loads(encoded.encode()), json.loads(encoded))
+                self.assertEqual(loads(encoded), json.loads(encoded))
+
+    def test_loads_accepts_what_stdlib_accepts(self):
+        """ Inputs orjson rejects but json.loads accepts still parse """
+        for text in ['{"value": NaN}', '"\\ud800"', '[Infinity]']:
+            with self.subTest(text=text):
+                self.assertEqual(json.dumps(loads(text)), json.dumps(json.loads(text)))
+
+    def test_loads_rejects_invalid_json(self):
+        for text in [b"invalid json data", b"{", b"", b"\xff"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    loads(text)
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from api.proxies.least_connections import LeastConnectionsProxy
+
+INSTANCES = [
+    "http://server1:8000/api/process",
+    "http://server2:8000/api/process",
+    "http://server3:8000/api/process",
+]
+
+
+class TestLeastConnectionsProxy(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        """Setup mock dependencies before each test."""
+        self.mock_http_client = AsyncMock()
+        self.mock_health_checker = MagicMock()
+        self.mock_health_checker.get_healthy_instances.return_value = INSTANCES
+
+        self.proxy = LeastConnectionsProxy(
+            instance_manager=MagicMock(),
+            http_client=self.mock_http_client,
+            health_checker=self.mock_health_checker,
+            system_monitor=MagicMock(),
+        )
+
+    def test_select_instance_prefers_fewest_in_flight(self):
+        """The instance with the fewest outstanding requests is chosen"""
+        self.proxy.in_flight = {INSTANCES[0]: 3, INSTANCES[1]: 1, INSTANCES[2]: 2}
+
+        self.assertEqual(self.proxy.select_instance(INSTANCES, set()), INSTANCES[1])
+
+    def test_select_instance_skips_tried_instances(self):
+        """Instances that already failed for this request are not retried first"""
+        self.assertEqual(self.proxy.select_instance(INSTANCES, {INSTANCES[0], INSTANCES[1]}), INSTANCES[2])
+
+    @patch("api.proxies.least_connections.random.choice", side_effect=lambda items: items[-1])
+    def test_select_instance_random_tie_break(self, mock_choice):
+        """Ties between equally loaded instances are broken at random"""
+        self.proxy.in_flight = {INSTANCES[0]: 1}
+
+        self.assertEqual(self.proxy.select_instance(INSTANCES, set()), INSTANCES[2])
+        mock_choice.assert_called_once_with(INSTANCES[1:])
+
+    async def test_in_flight_tracks_concurrent_requests(self):
+        """In-flight counters go up while requests are pending and are cleared afterwards"""
+        release = asyncio.Event()
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"test": "data"}
+
+        async def slow_post(url, json):
+            await release.wait()
+            return mock_response
+
+        self.mock_http_client.post.side_effect = slow_post
+
+        tasks = [asyncio.create_task(self.proxy.forward_request({"test": "data"})) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        self.assertEqual(sorted(self.proxy.in_flight.values()), [1, 1, 1])
+
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        self.assertEqual(results, [({"test": "data"}, 200)] * 3)
+        self.assertEqual(self.proxy.in_flight, {})
+
+    async def test_forward_request_retries_next_instance(self):
+        """A failing instance is released and the request moves on to another one"""
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"test": "data"}
+        self.mock_http_client.post.side_effect = [None, mock_response]
+
+        response, status = await self.proxy.forward_request({"test": "data"})
+
+        self.assertEqual((response, status), ({"test": "data"}, 200))
+        self.assertEqual(self.mock_http_client.post.await_count, 2)
+        self.assertEqual(self.proxy.in_flight, {})
@@ -0,0 +1,82 @@
+import threading
+import unittest
+from unittest.mock import patch
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from api.throttling.local_throttle import GcraTable, LocalAnonRateThrottle, LocalRateThrottle
+
+
+class TestGcraTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = GcraTable(shards=4)
+
+    def test_limit_and_retry_after(self):
+        """ `burst` requests pass, the next one waits one interval """
+        results = [self.table.acquire("ip", interval=6, burst=10, now=0) for _ in range(11)]
+
+        self.assertEqual(results[:10], [None] * 10)
+        self.assertEqual(results[10], 6)
+        self.assertIsNone(self.table.acquire("ip", interval=6, burst=10, now=6))
+
+    def test_keys_are_independent(self):
+        self.table.acquire("a", interval=60, burst=1, now=0)
+
+        self.assertIsNotNone(self.table.acquire("a", interval=60, burst=1, now=0))
+        self.assertIsNone(self.table.acquire("b", interval=60, burst=1, now=0))
+
+    def test_idle_keys_are_evicted(self):
+        """ Sweeps drop keys whose bucket has refilled and keep active ones """
+        self.table.min_sweep_size = 8
+        self.table.sweep_at = [8] * 4
+        for i in range(100):
+            self.table.acquire(f"old-{i}", interval=1, burst=5, now=0)
+        for i in range(100):
+            self.table.acquire(f"new-{i}", interval=1, burst=5, now=10)
+
+        self.assertLess(len(self.table), 150)
+        remaining = {key for shard in self.table.shards for key in shard}
+        self.assertTrue({f"new-{i}" for i in range(100)} <= remaining)
+
+    def test_concurrent_requests_never_exceed_the_limit(self):
+        """ Lock striping keeps read-modify-write atomic per key """
+        allowed = []
+
+        def worker():
+            for _ in range(200):
+                if self.table.acquire("ip", interval=1, burst=100, now=0) is None:
+                    allowed.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(allowed), 100)
+
+
+class TestLocalRateThrottle(unittest.TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().post("/api/process/", REMOTE_ADDR="1.2.3.4")
+        self.request.user = AnonymousUser()
+        table = patch.object(LocalRateThrottle, "table", GcraTable(shards=2))
+        rate = patch.object(LocalAnonRateThrottle, "rate", "3/minute", create=True)
+        table.start()
+        rate.start()
+        self.addCleanup(table.stop)
+        self.addCleanup(rate.stop)
+
+    @patch("api.throttling.local_throttle.time.monotonic", return_value=1000)
+    def test_drop_in_for_anon_rate_throttle(self, mock_monotonic):
+        """ Same scope/key as AnonRateThrottle, one number of state, Retry-After of one interval """
+        results = []
+        for _ in range(4):
+            throttle = LocalAnonRateThrottle()
+            results.append(throttle.allow_request(self.request, None))
+
+        self.assertEqual(results, [True, True, True, False])
+        self.assertEqual(throttle.wait(), 20)
+        self.assertEqual(list(LocalRateThrottle.table.shards[hash(throttle.key) % 2]), [throttle.key])
+        self.assertEqual(throttle.key, "throttle_anon_1.2.3.4")
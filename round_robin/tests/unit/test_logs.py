@@ -0,0 +1,140 @@
+import io
+import json
+import logging
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+from api import logs
+from api.logs import (
+    REQUEST_ID, QueueLogHandler, RateLimitFilter, RequestIdFilter, RequestIdMiddleware, SamplingFilter,
+)
+
+
+def make_record(msg="⚠️ %s failed", args=("http://app1:8000",), level=logging.WARNING, **extra):
+    record = logging.LogRecord("api.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestFilters(unittest.TestCase):
+
+    @patch("api.logs.time")
+    def test_rate_limit_per_template(self, mock_time):
+        """ A burst per message template passes; the rest is counted and reported once the bucket refills """
+        mock_time.monotonic.return_value = 100.0
+        rate_limit = RateLimitFilter(rate=1, burst=3)
+
+        passed = [rate_limit.filter(make_record(args=(i,))) for i in range(10)]
+        other = rate_limit.filter(make_record("🔌 Circuit for %s closed."))
+        mock_time.monotonic.return_value = 101.0
+        record = make_record()
+
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+        self.assertTrue(other)
+        self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.suppressed, 7)
+
+    def test_rate_limit_disabled(self):
+        rate_limit = RateLimitFilter(rate=0, burst=1)
+
+        self.assertTrue(all(rate_limit.filter(make_record()) for _ in range(100)))
+
+    def test_sampling_keeps_warnings(self):
+        sampling = SamplingFilter(rate=0)
+
+        self.assertFalse(sampling.filter(make_record(level=logging.INFO)))
+        self.assertTrue(sampling.filter(make_record(level=logging.WARNING)))
+        self.assertTrue(SamplingFilter(rate=1).filter(make_record(level=logging.DEBUG)))
+
+    def test_request_id(self):
+        token = REQUEST_ID.set("req-1")
+        try:
+            inside = make_record()
+            RequestIdFilter().filter(inside)
+        finally:
+            REQUEST_ID.reset(token)
+        outside = make_record()
+        RequestIdFilter().filter(outside)
+
+        self.assertEqual(inside.request_id, "req-1")
+        self.assertEqual(outside.request_id, "-")
+
+
+class TestQueueLogHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = QueueLogHandler(max_size=100, stream=self.stream)
+        self.handler.addFilter(RequestIdFilter())
+
+    def tearDown(self):
+        self.handler.close()
+
+    def written(self):
+        self.handler.close()  # Drains the queue
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_lines(self):
+        """ Message args, extra fields, request id and tracebacks end up in one JSON object per record """
+        token = REQUEST_ID.set("req-1")
+        try:
+            self.handler.handle(make_record(backend="app1"))
+            try:
+                raise ValueError("boom")
+            except ValueError:
+                record = make_record("❌ Batch record %s failed", (3,), logging.ERROR)
+                record.exc_info = sys.exc_info()
+                self.handler.handle(record)
+        finally:
+            REQUEST_ID.reset(token)
+
+        first, second = self.written()
+
+        self.assertEqual(first["message"], "⚠️ http://app1:8000 failed")
+        self.assertEqual(first["level"], "WARNING")
+        self.assertEqual(first["request_id"], "req-1")
+        self.assertEqual(first["backend"], "app1")
+        self.assertEqual(second["message"], "❌ Batch record 3 failed")
+        self.assertIn("ValueError: boom", second["exception"])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """ Records that do not fit are counted and reported on the next one that does """
+        self.handler.listener.stop()
+        self.handler.listening = False
+        self.handler.queue.maxsize = 2
+
+        for i in range(5):
+            self.handler.handle(make_record(args=(i,)))
+        self.assertEqual(self.handler.dropped, 3)
+
+        self.handler.queue.get_nowait()
+        self.handler.handle(make_record())
+        self.assertEqual(self.handler.queue.queue[-1].dropped, 3)
+        self.assertEqual(self.handler.dropped, 0)
+
+    def test_text_format(self):
+        handler = QueueLogHandler(json_format=False, stream=self.stream)
+        handler.addFilter(RequestIdFilter())
+        handler.handle(make_record(suppressed=4))
+        handler.close()
+
+        self.assertRegex(self.stream.getvalue(), r"WARNING \[-\] api.test: ⚠️ http://app1:8000 failed \(4 suppressed\)\n$")
+
+
+class TestRequestIdMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    async def test_async_requests_see_their_id(self):
+        seen = {}
+
+        async def get_response(request):
+            seen["id"] = logs.REQUEST_ID.get()
+            return {}
+
+        request = MagicMock()
+        request.headers = {"X-Request-ID": "req-1"}
+
+        response = await RequestIdMiddleware(get_response)(request)
+
+        self.assertEqual(seen["id"], "req-1")
+        self.assertEqual(response["X-Request-ID"], "req-1")
+        self.assertIsNone(REQUEST_ID.get())
@@ -0,0 +1,139 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from api.monitoring import metrics
+from api.monitoring.metrics import Counter, Gauge, Histogram, Registry
+from api.proxies.round_robin import RoundRobinProxy
+
+DEAD_PID = 2 ** 22 + 1  # Above Linux's pid_max, so never a live process
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+        self.requests = Counter("requests_total", "Requests.", ("backend",), registry=self.registry)
+        self.in_flight = Gauge("in_flight", "In flight.", ("backend",), registry=self.registry)
+        self.latency = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1), registry=self.registry)
+
+    def test_threads_record_without_losing_updates(self):
+        """ Per-thread shards add up to the exact total """
+        def work():
+            for _ in range(10000):
+                self.requests.inc("app1")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.requests.collect(), [[["app1"], 80000]])
+
+    def test_gauge_deltas_from_different_threads(self):
+        self.in_flight.inc("app1")
+        self.in_flight.inc("app1")
+        worker = threading.Thread(target=self.in_flight.dec, args=("app1",))
+        worker.start()
+        worker.join()
+
+        self.assertEqual(self.in_flight.collect(), [[["app1"], 1]])
+
+    def test_shards_of_exited_threads_are_retired(self):
+        """ Short-lived threads (timers, collectors) leave their counts behind but not their shards """
+        for _ in range(20):
+            worker = threading.Thread(target=self.requests.inc, args=("app1",))
+            worker.start()
+            worker.join()
+            self.latency.observe(0.5)
+
+        self.assertLessEqual(len(self.requests.shards), 1)
+        self.assertEqual(self.requests.collect(), [[["app1"], 20]])
+        self.assertEqual(self.requests.shards, {})
+        self.assertEqual(self.latency.collect(), [[[], [0, 20, 0, 10.0]]])
+
+    def test_import_does_not_need_django_settings(self):
+        """ The metrics module only uses the stdlib, so scripts can import it without configuring Django """
+        env = {key: value for key, value in os.environ.items() if key != "DJANGO_SETTINGS_MODULE"}
+        code = "import sys, api.monitoring.metrics; sys.exit('django.conf' in sys.modules)"
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], env=env).returncode, 0)
+
+    def test_prometheus_text(self):
+        """ Cumulative buckets, _sum/_count and escaped label values """
+        self.requests.inc('http://app1:8000/"x"')
+        for value in (0.05, 0.1, 0.5, 3):
+            self.latency.observe(value)
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE requests_total counter\n", text)
+        self.assertIn('requests_total{backend="http://app1:8000/\\"x\\""} 1\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4\n', text)
+        self.assertIn("latency_seconds_sum 3.65\n", text)
+        self.assertIn("latency_seconds_count 4\n", text)
+
+    def test_workers_are_merged(self):
+        """ A scrape sums every worker's counters but drops gauges of dead workers """
+        self.requests.inc("app1")
+        self.in_flight.inc("app1")
+        other = {
+            "requests_total": [[["app1"], 2], [["app2"], 5]],
+            "in_flight": [[["app1"], 7]],
+            "latency_seconds": [[[], [1, 0, 0, 0.05]]],
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            for pid in (os.getppid(), DEAD_PID):
+                with open(os.path.join(directory, f"metrics-{pid}.json"), "w") as file:
+                    json.dump({"pid": pid, "metrics": other}, file)
+
+            text = self.registry.render(directory)
+            files = sorted(os.listdir(directory))
+
+        self.assertIn('requests_total{backend="app1"} 5\n', text)
+        self.assertIn('requests_total{backend="app2"} 10\n', text)
+        self.assertIn('in_flight{backend="app1"} 8\n', text)
+        self.assertIn("latency_seconds_count 2\n", text)
+        self.assertIn(f"metrics-{os.getpid()}.json", files)
+
+    def test_dead_snapshots_are_removed_on_start(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"metrics-{DEAD_PID}.json")
+            with open(path, "w") as file:
+                file.write("{}")
+
+            self.registry.remove_dead(directory)
+
+            self.assertFalse(os.path.exists(path))
+
+
+class TestProxyMetrics(unittest.IsolatedAsyncioTestCase):
+
+    async def test_send_records_outcome_latency_and_retries(self):
+        """ Proxy.send feeds the per-backend metrics; a second attempt counts as a retry """
+        health_checker = MagicMock()
+        health_checker.get_healthy_instances.return_value = ("http://m1:8000/api/process", "http://m2:8000/api/process")
+        http_client = AsyncMock()
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {}
+        http_client.post.side_effect = [None, ok]
+        proxy = RoundRobinProxy(MagicMock(), http_client, health_checker, MagicMock())
+
+        with patch.object(metrics, "UPSTREAM_REQUESTS") as requests, \
+                patch.object(metrics, "UPSTREAM_LATENCY") as latency, \
+                patch.object(metrics, "UPSTREAM_IN_FLIGHT") as in_flight, \
+                patch.object(metrics, "RETRIES") as retries:
+            await proxy.forward_request({"test": "data"})
+
+        outcomes = sorted(call.args[1] for call in requests.inc.call_args_list)
+        self.assertEqual(outcomes, ["2xx", "error"])
+        self.assertEqual(latency.observe.call_count, 2)
+        self.assertEqual(in_flight.inc.call_count, in_flight.dec.call_count)
+        retries.inc.assert_called_once()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import patch
+from api.monitoring.outlier_detector import OutlierDetector
+
+POOL = [f"http://app{number}:8000/api/process/" for number in range(10)]
+
+
+class TestOutlierDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = OutlierDetector()
+        self.detector.consecutive_failures = 3
+        self.detector.base_ejection_time = 10
+        self.detector.max_ejection_time = 35
+        self.detector.min_requests = 20
+
+    def fail(self, instance_url, times, pool_size=len(POOL)):
+        return [self.detector.record(instance_url, 0.01, False, pool_size) for _ in range(times)]
+
+    def test_consecutive_failures_trigger_ejection(self):
+        """ The Nth failure in a row ejects the instance """
+        self.assertEqual(self.fail(POOL[0], 3), [False, False, True])
+        self.assertTrue(self.detector.is_ejected(POOL[0]))
+
+    def test_success_resets_consecutive_failures(self):
+        """ A success in between failures starts the count again """
+        self.fail(POOL[0], 2)
+        self.detector.record(POOL[0], 0.01, True, len(POOL))
+
+        self.assertEqual(self.fail(POOL[0], 2), [False, False])
+
+    @patch("api.monitoring.outlier_detector.time.monotonic")
+    def test_ejection_time_grows_exponentially_and_is_capped(self, mock_monotonic):
+        """ Each ejection doubles the ejection time up to the maximum """
+        durations = []
+        for now in (0, 100, 200, 300):
+            mock_monotonic.return_value = now
+            self.fail(POOL[0], 3)
+            durations.append(self.detector.ejected_until[POOL[0]] - now)
+
+        self.assertEqual(durations, [10, 20, 35, 35])
+
+    @patch("api.monitoring.outlier_detector.time.monotonic", return_value=0)
+    def test_ejection_share_is_capped(self, mock_monotonic):
+        """ No more than OUTLIER_MAX_EJECTION_PERCENT of the pool is ejected, and never the last instance """
+        ejected = [self.fail(url, 3, pool_size=4)[-1] for url in POOL[:4]]
+        self.assertEqual(ejected, [True, True, False, False])
+
+        self.detector.ejected_until.clear()
+        self.assertEqual([self.fail(url, 3, pool_size=1)[-1] for url in POOL[:1]], [False])
+
+    def test_success_rate_outlier_is_ejected(self):
+        """ An instance far below the pool's mean success rate is ejected on analysis """
+        for url in POOL:
+            for number in range(50):
+                failed = url == POOL[3] and number % 2 == 0
+                self.detector.record(url, 0.01, not failed, len(POOL))
+
+        self.assertEqual(self.detector.analyze(POOL), [POOL[3]])
+
+    def test_latency_outlier_is_ejected(self):
+        """ An instance with a p99 several times its peers' is ejected on analysis """
+        for url in POOL[:4]:
+            latency = 0.5 if url == POOL[1] else 0.05
+            for _ in range(30):
+                self.detector.record(url, latency, True, 4)
+
+        self.assertEqual(self.detector.analyze(POOL[:4]), [POOL[1]])
+
+    def test_analysis_caps_by_given_pool_size(self):
+        """ The cap comes from the full pool, not just the instances analyzed """
+        for url in POOL:
+            for number in range(50):
+                self.detector.record(url, 0.01, not (url == POOL[3] and number % 2 == 0), len(POOL))
+
+        self.assertEqual(self.detector.analyze(POOL, pool_size=1), [])  # The last instance is never ejected
+
+    def test_analysis_needs_enough_requests(self):
+        """ Instances with too few requests are not compared """
+        self.fail(POOL[0], 2)
+        self.detector.record(POOL[1], 0.01, True, len(POOL))
+
+        self.assertEqual(self.detector.analyze(POOL), [])
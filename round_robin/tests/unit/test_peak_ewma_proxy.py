@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from api.monitoring.routing_table import RoutingTable
+from api.proxies.peak_ewma import LatencyStats, PeakEwmaProxy
+
+INSTANCES = [
+    "http://server1:8000/api/process",
+    "http://server2:8000/api/process",
+    "http://server3:8000/api/process",
+]
+
+
+class TestLatencyStats(unittest.TestCase):
+
+    def test_observe_jumps_to_peaks(self):
+        """A slower sample replaces the average immediately"""
+        stats = LatencyStats()
+        stats.observe(0.1, now=100.0, decay_time=10)
+        stats.observe(2.0, now=100.5, decay_time=10)
+
+        self.assertEqual(stats.ewma, 2.0)
+
+    def test_observe_decays_towards_faster_samples(self):
+        """Faster samples pull the average down gradually"""
+        stats = LatencyStats()
+        stats.observe(1.0, now=100.0, decay_time=10)
+        stats.observe(0.1, now=110.0, decay_time=10)
+
+        self.assertLess(stats.ewma, 1.0)
+        self.assertGreater(stats.ewma, 0.1)
+
+    def test_observe_blends_from_stored_value(self):
+        """The previous value is weighted once by exp(-elapsed / decay_time)"""
+        stats = LatencyStats()
+        stats.observe(1.0, now=100.0, decay_time=10)
+        stats.observe(0.1, now=110.0, decay_time=10)
+
+        self.assertAlmostEqual(stats.ewma, 1.0 * 0.36787944 + 0.1 * 0.63212056, places=6)  # 0.431092
+
+    def test_observe_compares_with_stored_value(self):
+        """A sample below the stored value is blended in even when it is above the decayed value"""
+        stats = LatencyStats()
+        stats.observe(1.0, now=100.0, decay_time=10)
+        stats.observe(0.5, now=110.0, decay_time=10)
+
+        self.assertAlmostEqual(stats.ewma, 1.0 * 0.36787944 + 0.5 * 0.63212056, places=6)  # 0.684060
+
+    def test_cost_penalizes_outstanding_requests(self):
+        """Cost grows with the number of outstanding requests"""
+        stats = LatencyStats()
+        stats.observe(0.2, now=100.0, decay_time=10)
+        idle_cost = stats.cost(100.0, 10, penalty=5.0)
+        stats.outstanding = 3
+
+        self.assertAlmostEqual(stats.cost(100.0, 10, penalty=5.0), idle_cost * 4)
+
+    def test_cost_of_unmeasured_instance(self):
+        """Without a sample an idle instance is free, a busy one costs the penalty in seconds"""
+        stats = LatencyStats()
+        self.assertEqual(stats.cost(100.0, 10, penalty=5.0), 0.0)
+
+        stats.outstanding = 2
+        self.assertEqual(stats.cost(100.0, 10, penalty=5.0), 10.0)
+
+
+class TestPeakEwmaProxy(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        """Setup mock dependencies before each test."""
+        self.mock_http_client = AsyncMock()
+        self.mock_health_checker = MagicMock()
+        self.mock_health_checker.get_healthy_instances.return_value = INSTANCES
+
+        self.proxy = PeakEwmaProxy(
+            instance_manager=MagicMock(),
+            http_client=self.mock_http_client,
+            health_checker=self.mock_health_checker,
+            system_monitor=MagicMock(),
+        )
+
+    @patch("api.proxies.peak_ewma.random.randrange", side_effect=[0, 0])
+    def test_select_instance_picks_cheaper_of_two(self, mock_randrange):
+        """Of the two sampled instances the one with the lower latency wins"""
+        self.proxy.get_stats(INSTANCES[0]).observe(1.5, now=0.0, decay_time=10)
+        self.proxy.get_stats(INSTANCES[1]).observe(0.1, now=0.0, decay_time=10)
+
+        with patch("api.proxies.peak_ewma.time.monotonic", return_value=0.0):
+            self.assertEqual(self.proxy.select_instance(INSTANCES, set()), INSTANCES[1])
+
+    @patch("api.proxies.peak_ewma.random.randrange", side_effect=[0, 0])
+    def test_busy_unmeasured_instance_loses_to_measured_one(self, mock_randrange):
+        """Each queued request on an unmeasured instance costs the penalty, so it stops taking the whole queue"""
+        self.proxy.get_stats(INSTANCES[0]).outstanding = 3
+        measured = self.proxy.get_stats(INSTANCES[1])
+        measured.observe(1.0, now=0.0, decay_time=10)
+        measured.outstanding = 3
+
+        with patch("api.proxies.peak_ewma.time.monotonic", return_value=0.0):
+            self.assertEqual(self.proxy.select_instance(INSTANCES, set()), INSTANCES[1])
+
+    def test_stats_of_removed_instances_are_pruned(self):
+        """Instances that leave the routing table are forgotten once they have no requests in flight"""
+        for instance in INSTANCES:
+            self.proxy.get_stats(instance).observe(0.1, now=0.0, decay_time=10)
+        self.proxy.get_stats(INSTANCES[2]).outstanding = 1
+
+        self.proxy.on_routing_table(RoutingTable(2, (INSTANCES[0],)))
+
+        self.assertEqual(set(self.proxy.stats), {INSTANCES[0], INSTANCES[2]})
+
+    @patch("api.proxies.peak_ewma.random.randrange", side_effect=[0, 0])
+    def test_select_instance_skips_tried_instance(self, mock_randrange):
+        """A sampled instance that already failed is not picked again"""
+        self.proxy.get_stats(INSTANCES[1]).observe(5.0, now=0.0, decay_time=10)
+
+        self.assertEqual(self.proxy.select_instance(INSTANCES, {INSTANCES[0]}), INSTANCES[1])
+
+    @patch("api.proxies.peak_ewma.random.randrange", side_effect=[0, 0])
+    def test_select_instance_falls_back_when_both_tried(self, mock_randrange):
+        """When both samples were tried the first untried instance is used"""
+        self.assertEqual(self.proxy.select_instance(INSTANCES, set(INSTANCES[:2])), INSTANCES[2])
+
+    async def test_failed_request_is_penalized(self):
+        """Transport failures are recorded as full timeouts and release the outstanding slot"""
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"test": "data"}
+        self.mock_http_client.post.side_effect = [None, mock_response]
+
+        response, status = await self.proxy.forward_request({"test": "data"})
+
+        self.assertEqual(status, 200)
+        penalties = sorted(stats.ewma for stats in self.proxy.stats.values())
+        self.assertGreaterEqual(penalties[-1], self.proxy.failure_penalty)
+        self.assertTrue(all(stats.outstanding == 0 for stats in self.proxy.stats.values()))
@@ -0,0 +1,27 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from django.test import override_settings
+from api.proxies.factory import STRATEGIES, ProxyFactory
+
+
+@patch("api.proxies.factory.ProxyFactory.create_dependencies", side_effect=lambda collect_weights: (MagicMock(),) * 4)
+class TestProxyFactory(unittest.TestCase):
+
+    def test_every_strategy_is_created_from_the_registry(self, mock_create_dependencies):
+        for strategy, proxy_class in STRATEGIES.items():
+            with self.subTest(strategy=strategy), override_settings(PROXY_STRATEGY=strategy):
+                self.assertIsInstance(ProxyFactory.get_proxy(), proxy_class)
+
+    def test_only_weighted_strategy_collects_weights(self, mock_create_dependencies):
+        with override_settings(PROXY_STRATEGY="weighted_round_robin"):
+            ProxyFactory.get_proxy()
+        mock_create_dependencies.assert_called_with(collect_weights=True)
+
+        with override_settings(PROXY_STRATEGY="round_robin"):
+            ProxyFactory.get_proxy()
+        mock_create_dependencies.assert_called_with(collect_weights=False)
+
+    def test_invalid_strategy(self, mock_create_dependencies):
+        with override_settings(PROXY_STRATEGY="random"):
+            with self.assertRaises(ValueError):
+                ProxyFactory.get_proxy()
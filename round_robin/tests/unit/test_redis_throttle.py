@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory
+from api.adapters.redis_adapter import RedisAdapter
+from api.throttling import gcra
+from api.throttling.redis_throttle import RedisAnonRateThrottle, RedisRateLimiter, RedisRateThrottle
+
+
+class FakeRedisClient:
+    """ In-memory stand-in for redis.asyncio.Redis that runs the GCRA script in Python """
+
+    def __init__(self):
+        self.store = {}
+        self.now_ms = 0.0
+        self.calls = 0
+        self.loaded = False
+        self.delay = 0
+
+    async def evalsha(self, sha, numkeys, *keys_and_args):
+        if not self.loaded:
+            raise Exception("NOSCRIPT No matching script. Please use EVAL.")
+        return await self.run(*keys_and_args)
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        self.loaded = True
+        return await self.run(*keys_and_args)
+
+    async def run(self, key, interval, burst, wanted):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        granted, tat, retry_after = gcra.acquire(self.store.get(key), self.now_ms, interval, burst, wanted)
+        if granted:
+            self.store[key] = tat
+        return [granted, int(retry_after)]
+
+
+class TestGcra(unittest.TestCase):
+
+    def test_burst_then_steady_rate(self):
+        """ `burst` requests pass at once, then one per interval """
+        tat = None
+        results = []
+        for _ in range(4):
+            granted, tat, retry_after = gcra.acquire(tat, 0, interval=10, burst=3)
+            results.append(granted)
+
+        self.assertEqual(results, [1, 1, 1, 0])
+        self.assertEqual(retry_after, 10)
+        self.assertEqual(gcra.acquire(tat, 10, interval=10, burst=3)[0], 1)
+
+    def test_batches_are_capped_by_available_tokens(self):
+        granted, tat, _ = gcra.acquire(None, 0, interval=10, burst=3, wanted=5)
+
+        self.assertEqual((granted, tat), (3, 30))
+
+
+class TestRedisRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.client = FakeRedisClient()
+        self.redis = RedisAdapter(client=self.client, timeout=0.05)
+        self.now = 100.0
+        clock = patch("api.throttling.redis_throttle.time")  # Only this module's clock; the event loop keeps real time
+        clock.start().monotonic.side_effect = lambda: self.now
+        self.addCleanup(clock.stop)
+
+    async def allowed(self, limiter, count, key="lb:throttle_anon_1.2.3.4"):
+        results = [await limiter.acquire(key, limit=10, duration=60) for _ in range(count)]
+        return sum(result is None for result in results)
+
+    async def test_limit_is_shared_between_replicas(self):
+        """ Two processes together never exceed the limit """
+        first = RedisRateLimiter(self.redis, batch_size=1, lease_time=1, backoff=5)
+        second = RedisRateLimiter(self.redis, batch_size=1, lease_time=1, backoff=5)
+
+        total = await self.allowed(first, 8) + await self.allowed(second, 8)
+
+        self.assertEqual(total, 10)
+
+    async def test_tokens_are_leased_in_batches(self):
+        """ One Redis round trip serves a whole batch """
+        limiter = RedisRateLimiter(self.redis, batch_size=5, lease_time=1, backoff=5)
+
+        self.assertEqual(await self.allowed(limiter, 10), 10)
+        self.assertEqual(self.client.calls, 2)
+
+    async def test_rejections_are_cached_until_retry_after(self):
+        """ A blocked client costs no Redis traffic until it may retry """
+        limiter = RedisRateLimiter(self.redis, batch_size=10, lease_time=1, backoff=5)
+        await self.allowed(limiter, 10)
+        calls = self.client.calls
+
+        wait = await limiter.acquire("lb:throttle_anon_1.2.3.4", limit=10, duration=60)
+        self.assertAlmostEqual(wait, 6)
+        self.assertEqual(await self.allowed(limiter, 5), 0)
+        self.assertEqual(self.client.calls, calls + 1)
+
+    async def test_fails_open_when_redis_is_slow(self):
+        """ Requests pass when Redis misses its deadline, and Redis is skipped for a while """
+        self.client.delay = 1
+        limiter = RedisRateLimiter(self.redis, batch_size=1, lease_time=1, backoff=5)
+
+        self.assertEqual(await self.allowed(limiter, 20), 20)
+        self.assertEqual(self.client.calls, 1)
+
+        self.client.delay = 0
+        self.now += 6
+        await self.allowed(limiter, 1)
+        self.assertEqual(self.client.calls, 2)
+
+    async def test_throttle_class_returns_retry_after(self):
+        """ The DRF throttle awaits the limiter and exposes wait() """
+        limiter = RedisRateLimiter(self.redis, batch_size=1, lease_time=1, backoff=5)
+        request = RequestFactory().post("/api/process/", REMOTE_ADDR="1.2.3.4")
+        request.user = AnonymousUser()
+
+        with patch.object(RedisRateThrottle, "limiter", limiter), \
+                patch.object(RedisAnonRateThrottle, "rate", "2/minute", create=True):
+            results = []
+            for _ in range(3):
+                throttle = RedisAnonRateThrottle()
+                results.append(await throttle.aallow_request(request, None))
+
+        self.assertEqual(results, [True, True, False])
+        self.assertAlmostEqual(throttle.wait(), 30)
+
+    def test_sync_allow_request_refuses(self):
+        """ A sync caller (e.g. a DRF APIView) gets an error instead of an always-truthy coroutine """
+        with self.assertRaises(ImproperlyConfigured):
+            RedisAnonRateThrottle().allow_request(RequestFactory().post("/api/process/"), None)
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from api.handlers.request_coalescer import RequestCoalescer
+from api.handlers.request_handler import RequestHandler
+
+
+class TestRequestCoalescer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.coalescer = RequestCoalescer(header_names=["Authorization"])
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def upstream(self, result=({"ok": True}, 200), error=None):
+        self.calls += 1
+        await self.release.wait()
+        if error:
+            raise error
+        return result
+
+    def test_key_is_canonical(self):
+        """ Key order and whitespace do not matter, selected headers do """
+        first = self.coalescer.make_key({"game": "ML", "points": 50}, {"Authorization": "a"})
+        same = self.coalescer.make_key({"points": 50, "game": "ML"}, {"Authorization": "a", "X-Other": "1"})
+        other = self.coalescer.make_key({"game": "ML", "points": 50}, {"Authorization": "b"})
+
+        self.assertEqual(first, same)
+        self.assertNotEqual(first, other)
+
+    def test_key_accepts_lone_surrogates(self):
+        """ JSON may decode to strings that are not valid UTF-8; they must not break the key """
+        key = self.coalescer.make_key(json.loads('{"gamerID": "\\ud800"}'))
+
+        self.assertNotEqual(key, self.coalescer.make_key({"gamerID": "\ufffd"}))
+
+    async def test_identical_requests_share_one_call(self):
+        """ Concurrent identical requests fan out one upstream result """
+        waiters = [asyncio.create_task(self.coalescer.run("key", self.upstream)) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(*waiters)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [({"ok": True}, 200)] * 5)
+        self.assertEqual(self.coalescer.in_flight, {})
+
+    async def test_errors_reach_every_waiter(self):
+        """ An upstream exception is raised in every waiter """
+        waiters = [
+            asyncio.create_task(self.coalescer.run("key", lambda: self.upstream(error=RuntimeError("boom"))))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(self.calls, 1)
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """ One waiter going away leaves the shared call running for the rest """
+        first = asyncio.create_task(self.coalescer.run("key", self.upstream))
+        second = asyncio.create_task(self.coalescer.run("key", self.upstream))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await second, ({"ok": True}, 200))
+        self.assertTrue(first.cancelled())
+
+    async def test_upstream_cancelled_when_all_waiters_leave(self):
+        """ The shared call is cancelled once no waiter is left """
+        waiter = asyncio.create_task(self.coalescer.run("key", self.upstream))
+        await asyncio.sleep(0)
+        flight = self.coalescer.in_flight["key"]
+
+        waiter.cancel()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertTrue(flight.task.cancelled())
+        self.assertEqual(self.coalescer.in_flight, {})
+
+    async def test_request_handler_coalesces_identical_payloads(self):
+        """ RequestHandler routes through the coalescer when one is configured """
+        proxy = MagicMock()
+        proxy.forward_request = AsyncMock(return_value=({"ok": True}, 200))
+        handler = RequestHandler(proxy=proxy, coalescer=self.coalescer)
+
+        results = await asyncio.gather(*[handler.handle_request({"gamerID": "P1"}) for _ in range(3)])
+
+        self.assertEqual(results, [({"ok": True}, 200)] * 3)
+        proxy.forward_request.assert_awaited_once()
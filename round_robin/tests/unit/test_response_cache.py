@@ -0,0 +1,163 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+from django.test import override_settings
+from api.adapters.redis_adapter import RedisAdapter
+from api.handlers.request_handler import RequestHandler
+from api.handlers.response_cache import CachedResponse, LocalCache, ResponseCache, parse_cache_control
+from api.proxies.proxy import ProxyResponse
+
+
+class FakeRedisClient:
+    """ In-memory stand-in for redis.asyncio.Redis (GET/SET only) """
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, px=None):
+        self.store[key] = value.encode() if isinstance(value, str) else value
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cache = ResponseCache(key_fields=["gamerID"], key_headers=["Authorization"], max_entries=2)
+        self.calls = 0
+        self.now = 1000.0
+        clock = patch("api.handlers.response_cache.time.time", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    async def upstream(self, headers=None, status=200):
+        self.calls += 1
+        return ProxyResponse({"call": self.calls}, status, headers)
+
+    def test_key_uses_configured_fields_and_headers(self):
+        """ Fields outside CACHE_KEY_FIELDS do not split the cache, selected headers do """
+        first = self.cache.make_key({"gamerID": "GYUTDTE", "points": 20}, {"Authorization": "a"})
+        same = self.cache.make_key({"gamerID": "GYUTDTE", "points": 50}, {"Authorization": "a"})
+        other = self.cache.make_key({"gamerID": "GYUTDTE"}, {"Authorization": "b"})
+
+        self.assertEqual(first, same)
+        self.assertNotEqual(first, other)
+
+    def test_key_accepts_lone_surrogates(self):
+        """ JSON may decode to strings that are not valid UTF-8; they must not break the key """
+        key = self.cache.make_key(json.loads('{"gamerID": "\\ud800"}'))
+
+        self.assertNotEqual(key, self.cache.make_key({"gamerID": "\ufffd"}))
+
+    async def test_hit_skips_upstream(self):
+        """ A fresh entry is served without calling the proxy again """
+        with self.settings_ttl(5, 0):
+            first = await self.cache.fetch("key", self.upstream)
+            self.now += 4
+            second = await self.cache.fetch("key", self.upstream)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first, second)
+
+    async def test_errors_and_no_store_are_not_cached(self):
+        """ Non-200 responses and Cache-Control: no-store always go upstream """
+        with self.settings_ttl(5, 0):
+            await self.cache.fetch("error", lambda: self.upstream(status=503))
+            await self.cache.fetch("error", lambda: self.upstream(status=503))
+            await self.cache.fetch("private", lambda: self.upstream({"Cache-Control": "no-store"}))
+            await self.cache.fetch("private", lambda: self.upstream({"Cache-Control": "no-store"}))
+
+        self.assertEqual(self.calls, 4)
+
+    async def test_upstream_max_age_overrides_default_ttl(self):
+        """ max-age from upstream decides freshness """
+        headers = {"cache-control": "public, max-age=60"}
+        with self.settings_ttl(1, 0):
+            await self.cache.fetch("key", lambda: self.upstream(headers))
+            self.now += 30
+            await self.cache.fetch("key", lambda: self.upstream(headers))
+
+        self.assertEqual(self.calls, 1)
+
+    async def test_stale_while_revalidate(self):
+        """ A stale entry is served immediately while a single background refresh runs """
+        with self.settings_ttl(5, 10):
+            await self.cache.fetch("key", self.upstream)
+            self.now += 6
+            stale = await asyncio.gather(*(self.cache.fetch("key", self.upstream) for _ in range(3)))
+            await asyncio.gather(*self.cache.revalidating.values())
+            fresh = await self.cache.fetch("key", self.upstream)
+
+        self.assertEqual([body for body, _ in stale], [{"call": 1}] * 3)
+        self.assertEqual(fresh[0], {"call": 2})
+        self.assertEqual(self.calls, 2)
+
+    async def test_expired_entry_is_refetched(self):
+        """ Past the stale window the caller waits for a fresh response """
+        with self.settings_ttl(5, 10):
+            await self.cache.fetch("key", self.upstream)
+            self.now += 16
+            body, _ = await self.cache.fetch("key", self.upstream)
+
+        self.assertEqual(body, {"call": 2})
+
+    def test_lru_eviction(self):
+        """ The least recently used entry is evicted first """
+        local = LocalCache(max_entries=2)
+        entry = CachedResponse("body", 200, {}, 10, 20)
+        local.set("a", entry)
+        local.set("b", entry)
+        local.get("a", now=0)
+        local.set("c", entry)
+
+        self.assertEqual(list(local.entries), ["a", "c"])
+
+    async def test_shared_tier_fills_other_processes(self):
+        """ An entry stored by one cache is found by another through Redis """
+        shared = RedisAdapter(client=FakeRedisClient())
+        writer = ResponseCache(shared=shared, key_fields=[], key_headers=[])
+        reader = ResponseCache(shared=shared, key_fields=[], key_headers=[])
+
+        with self.settings_ttl(5, 0):
+            await writer.fetch("key", lambda: self.upstream({"Cache-Control": "max-age=5"}))
+            body, status = await reader.fetch("key", self.upstream)
+
+        self.assertEqual((body, status), ({"call": 1}, 200))
+        self.assertEqual(self.calls, 1)
+
+    async def test_redis_errors_read_as_miss(self):
+        """ A failing Redis never fails the request """
+        client = FakeRedisClient()
+        client.get = AsyncMock(side_effect=ConnectionError("down"))
+        cache = ResponseCache(shared=RedisAdapter(client=client), key_fields=[], key_headers=[])
+
+        with self.settings_ttl(5, 0):
+            body, status = await cache.fetch("key", self.upstream)
+
+        self.assertEqual((body, status), ({"call": 1}, 200))
+
+    async def test_request_handler_serves_hits_without_proxy(self):
+        """ Cache hits never reach the proxy (and its health checker) """
+        proxy = AsyncMock()
+        proxy.forward_request.return_value = ProxyResponse({"ok": True}, 200)
+        handler = RequestHandler(proxy, cache=ResponseCache(key_fields=[], key_headers=[]))
+
+        with self.settings_ttl(5, 0):
+            for _ in range(3):
+                await handler.handle_request({"gamerID": "GYUTDTE"})
+
+        proxy.forward_request.assert_awaited_once()
+
+    def test_parse_cache_control(self):
+        self.assertIsNone(parse_cache_control({}))
+        self.assertEqual(parse_cache_control({"Cache-Control": "max-age=10, s-maxage=30"}), (30, 0))
+        self.assertEqual(parse_cache_control({"Cache-Control": "max-age=10, stale-while-revalidate=5"}), (10, 5))
+        self.assertEqual(parse_cache_control({"Cache-Control": "private, max-age=10"}), (0, 0))
+        self.assertEqual(parse_cache_control({"Cache-Control": "max-age=0"}), (0, 0))
+        self.assertIsNone(parse_cache_control({"Cache-Control": "public"}))
+        self.assertIsNone(parse_cache_control({"Cache-Control": "public, max-age=soon"}))
+
+    def settings_ttl(self, ttl, stale):
+        return override_settings(CACHE_TTL=ttl, CACHE_STALE_WHILE_REVALIDATE=stale)
@@ -1,4 +1,6 @@
 import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import AsyncMock, MagicMock
 from api.proxies.round_robin import RoundRobinProxy
 
@@ -94,4 +96,52 @@ class TestRoundRobinProxy(unittest.IsolatedAsyncioTestCase):
 
         # Verify that the third attempt succeeded
         self.assertEqual(response, {"test": "data"})
-        self.assertEqual(status, 200)
\ No newline at end of file
+        self.assertEqual(status, 200)
+
+    def test_select_instance_cycles_evenly(self):
+        """Each instance is picked once per cycle without an index reset"""
+        instances = ("http://server1:8000/api/process", "http://server2:8000/api/process", "http://server3:8000/api/process")
+
+        picks = [self.proxy.select_instance(instances, set()) for _ in range(6)]
+
+        self.assertEqual(picks, list(instances) * 2)
+
+    def test_select_instance_skips_tried_instances(self):
+        """A retry never returns an instance already tried by the same request"""
+        instances = ("http://server1:8000/api/process", "http://server2:8000/api/process")
+        first = self.proxy.select_instance(instances, set())
+        self.proxy.select_instance(instances, set())  # Another request advances the cursor
+
+        self.assertNotEqual(self.proxy.select_instance(instances, {first}), first)
+
+    def test_select_instance_is_thread_safe(self):
+        """Concurrent threads together still pick every instance equally often"""
+        instances = ("http://server1:8000/api/process", "http://server2:8000/api/process", "http://server3:8000/api/process")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            picks = list(pool.map(lambda _: self.proxy.select_instance(instances, set()), range(3000)))
+
+        self.assertEqual(Counter(picks), Counter({instance: 1000 for instance in instances}))
+
+    async def test_forward_raw_retries_server_errors(self):
+        """Pass-through retries 5xx on the next instance and returns any other status unread"""
+        self.mock_health_checker.get_healthy_instances.return_value = (
+            "http://server1:8000/api/process", "http://server2:8000/api/process"
+        )
+        failed = AsyncMock(status_code=502)
+        not_found = AsyncMock(status_code=404)
+        self.mock_http_client.stream.side_effect = [failed, not_found]
+
+        response = await self.proxy.forward_raw(b'{"test": "data"}', headers={"Content-Type": "application/json"})
+
+        self.assertIs(response, not_found)
+        failed.aclose.assert_awaited_once()
+        not_found.aclose.assert_not_awaited()
+        self.mock_health_checker.mark_failed.assert_called_once()
+        self.mock_http_client.post.assert_not_called()
+
+    async def test_forward_raw_returns_none_when_all_fail(self):
+        """The view turns None into the usual 503 error body"""
+        self.mock_health_checker.get_healthy_instances.return_value = ("http://server1:8000/api/process",)
+        self.mock_http_client.stream.return_value = None
+
+        self.assertIsNone(await self.proxy.forward_raw(b"{}"))
@@ -0,0 +1,97 @@
+import asyncio
+import random
+import unittest
+from benchmarks.simulate import parse_args, simulate_strategy
+from benchmarks.simulation import Incident, ServiceTime, SimulatedBackend, VirtualEventLoop
+
+
+class TestVirtualEventLoop(unittest.TestCase):
+
+    def test_sleeps_take_virtual_time(self):
+        """ An hour of sleeping finishes instantly, in order, on the virtual clock """
+        loop = VirtualEventLoop()
+        woke = []
+
+        async def sleeper(name, delay):
+            await asyncio.sleep(delay)
+            woke.append((name, loop.time()))
+
+        async def main():
+            await asyncio.gather(sleeper("b", 3600), sleeper("a", 1.5), sleeper("c", 3600))
+
+        loop.run_until_complete(main())
+        loop.close()
+
+        self.assertEqual(woke, [("a", 1.5), ("b", 3600), ("c", 3600)])
+
+    def test_timeouts(self):
+        loop = VirtualEventLoop()
+
+        async def main():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(asyncio.sleep(10), timeout=2)
+            return loop.time()
+
+        self.assertEqual(loop.run_until_complete(main()), 2)
+        loop.close()
+
+    def test_only_public_loop_hooks_are_overridden(self):
+        """ Private asyncio internals change between Python releases, so the loop must not override them """
+        overridden = {name for name in vars(VirtualEventLoop) if name.startswith("_") and not name.startswith("__")}
+
+        self.assertEqual(overridden, set())
+
+
+class TestSimulatedBackend(unittest.TestCase):
+
+    def test_requests_queue_for_free_workers(self):
+        backend = SimulatedBackend("http://app1:8000/api/process", ServiceTime("constant", 1.0), 2, random.Random(1))
+
+        delays = [backend.admit(0.0)[0] for _ in range(5)]
+
+        self.assertEqual(delays, [1.0, 1.0, 2.0, 2.0, 3.0])
+        self.assertEqual(backend.max_wait, 2.0)
+
+    def test_incidents(self):
+        incidents = [Incident.parse("backend=1,kind=down,start=5,end=10"), Incident.parse("backend=1,kind=slow,start=10,value=4")]
+        backend = SimulatedBackend("http://app1:8000/api/process", ServiceTime("constant", 1.0), 100, random.Random(1), incidents=incidents)
+
+        self.assertEqual(backend.admit(1)[0], 1.0)
+        self.assertIsNone(backend.admit(6))
+        self.assertEqual(backend.admit(11)[0], 4.0)
+        with self.assertRaises(ValueError):
+            Incident.parse("backend=1,kind=melted")
+
+
+class TestSimulation(unittest.TestCase):
+
+    def simulate(self, strategy, *args):
+        options = parse_args(["--requests", "3000", "--backends", "10", *args])
+        result = simulate_strategy(strategy, options)
+        result.pop("wall_seconds")
+        return result
+
+    def test_same_seed_same_report(self):
+        """ Every strategy gives an identical report for the same seed """
+        for strategy in ("round_robin", "least_connections", "peak_ewma", "consistent_hash"):
+            with self.subTest(strategy=strategy):
+                self.assertEqual(self.simulate(strategy), self.simulate(strategy))
+
+        self.assertNotEqual(self.simulate("peak_ewma"), self.simulate("peak_ewma", "--seed", "2"))
+
+    def test_round_robin_spreads_evenly(self):
+        result = self.simulate("round_robin", "--service", "exponential")
+
+        self.assertEqual(result["succeeded"], 3000)
+        self.assertEqual(result["load"], {"min": 300, "mean": 300.0, "max": 300})
+        self.assertEqual(result["skew"], 1.0)
+        self.assertLess(result["utilization"]["max"], 1)
+
+    def test_down_backend_fails_over(self):
+        """ Refused connections are retried elsewhere and the backend is taken out of rotation """
+        result = self.simulate("least_connections", "--incident", "backend=2,kind=down", "--recovery-time", "1000")
+
+        self.assertEqual(result["succeeded"], 3000)
+        self.assertGreater(result["refused"], 0)
+        self.assertEqual(result["load"]["min"], 0)
+        self.assertEqual(result["retries"], result["refused"])
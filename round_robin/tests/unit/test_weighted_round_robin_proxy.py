@@ -0,0 +1,64 @@
+import unittest
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock
+from api.proxies.weighted_round_robin import WeightedRoundRobinProxy
+
+INSTANCES = ["http://a:8000/api/process", "http://b:8000/api/process", "http://c:8000/api/process"]
+
+
+class TestWeightedRoundRobinProxy(unittest.TestCase):
+
+    def setUp(self):
+        """Setup mock dependencies before each test."""
+        self.mock_health_checker = MagicMock()
+        self.mock_health_checker.instance_weights = {}
+
+        self.proxy = WeightedRoundRobinProxy(
+            instance_manager=MagicMock(),
+            http_client=AsyncMock(),
+            health_checker=self.mock_health_checker,
+            system_monitor=MagicMock(),
+        )
+
+    def pick(self, count, instances=INSTANCES):
+        return [self.proxy.select_instance(instances, set()) for _ in range(count)]
+
+    def test_smooth_sequence_matches_nginx(self):
+        """Weights 5:1:1 produce nginx's interleaved sequence"""
+        self.mock_health_checker.instance_weights = dict(zip(INSTANCES, [5, 1, 1]))
+
+        names = [instance.split("//")[1][0] for instance in self.pick(7)]
+
+        self.assertEqual(names, ["a", "a", "b", "a", "c", "a", "a"])
+
+    def test_distribution_follows_dynamic_weights(self):
+        """A busier instance with a lower weight receives proportionally less traffic"""
+        self.mock_health_checker.instance_weights = dict(zip(INSTANCES, [1.0, 1.0, 0.5]))
+
+        counts = Counter(self.pick(500))
+
+        self.assertEqual(counts[INSTANCES[0]], 200)
+        self.assertEqual(counts[INSTANCES[2]], 100)
+
+    def test_missing_weights_default_to_equal_share(self):
+        """Before the first health sweep every instance gets the same share"""
+        self.assertEqual(Counter(self.pick(300)), Counter({instance: 100 for instance in INSTANCES}))
+
+    def test_zero_weight_drains_instance(self):
+        """An instance weighted 0 gets no traffic; when all are 0 they share it equally"""
+        self.mock_health_checker.instance_weights = dict(zip(INSTANCES, [1.0, 0.0, 2.0]))
+        self.assertEqual(Counter(self.pick(300)), Counter({INSTANCES[0]: 100, INSTANCES[2]: 200}))
+
+        self.mock_health_checker.instance_weights = dict.fromkeys(INSTANCES, 0.0)
+        self.assertEqual(Counter(self.pick(300)), Counter({instance: 100 for instance in INSTANCES}))
+
+    def test_tried_instances_are_skipped(self):
+        """Retries go to an instance that has not been tried yet"""
+        self.assertEqual(self.proxy.select_instance(INSTANCES, set(INSTANCES[:2])), INSTANCES[2])
+
+    def test_removed_instances_are_forgotten(self):
+        """Running weights of instances that left the pool are dropped"""
+        self.pick(3)
+        self.pick(2, INSTANCES[:2])
+
+        self.assertEqual(set(self.proxy.current_weights), set(INSTANCES[:2]))